@@ -0,0 +1,143 @@
+"""
+Micro-benchmarks for the keyword classifier and suggestion generator
+
+Times `analyze_complaint_description` one text at a time,
+`analyze_complaint_descriptions` on a whole batch, and `generate_suggestions`
+where the backend has it, over seeded corpora that vary text length, keyword
+density and language mix.
+
+    python -m benchmarks.classifier_bench --targets simple,fast --output classifier.json
+    python -m benchmarks.classifier_bench --baseline classifier.json --tolerance 0.10
+
+Each case is timed over several rounds and reported as nanoseconds per text
+(minimum and median). With --baseline, a case whose median grew by more than
+--tolerance is reported and the exit status is 1.
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.corpus import generate_corpus, profiles
+from services.classification_cache import ClassificationCache
+
+TARGETS = {'simple': 'main_simple', 'fast': 'main_fast'}
+
+
+def time_case(run: Callable[[], Any], items: int, rounds: int) -> Dict[str, float]:
+    """Run once to warm up, then `rounds` timed passes; returns per-item nanoseconds"""
+    run()
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter_ns()
+        run()
+        samples.append((time.perf_counter_ns() - started) / items)
+    return {
+        'min_ns': min(samples),
+        'median_ns': statistics.median(samples),
+        'ops_per_sec': 1e9 / statistics.median(samples),
+    }
+
+
+def benchmark_module(module: Any, size: int, rounds: int, seed: int) -> Dict[str, Dict[str, float]]:
+    keywords = module.complaint_keyword_rules.keywords
+    analyze = module.analyze_complaint_description
+    analyze_batch = module.analyze_complaint_descriptions
+    suggest = getattr(module, 'generate_suggestions', None)
+    # Time the classifier, not the memoization in front of it: with an empty
+    # cache every lookup misses, as it does for a text seen for the first time
+    analysis_cache = getattr(module, 'analysis_cache', None)
+    if analysis_cache is not None:
+        module.analysis_cache = ClassificationCache(max_size=0)
+
+    cases: Dict[str, Dict[str, float]] = {}
+    try:
+        for name, length, density, languages in profiles():
+            corpus = generate_corpus(size, keywords, length, density, languages, seed)
+            cases[f"single/{name}"] = time_case(lambda: [analyze(text) for text in corpus], size, rounds)
+            cases[f"batch/{name}"] = time_case(lambda: analyze_batch(corpus), size, rounds)
+            if suggest is not None:
+                labelled = [(result['category'], result['priority'], text.lower())
+                            for result, text in zip(analyze_batch(corpus), corpus)]
+                cases[f"suggestions/{name}"] = time_case(
+                    lambda: [suggest(category, priority, text) for category, priority, text in labelled], size, rounds
+                )
+    finally:
+        if analysis_cache is not None:
+            module.analysis_cache = analysis_cache
+    return cases
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Describe every case whose median per-text time grew by more than `tolerance`"""
+    regressions = []
+    for target, current in results['results'].items():
+        previous = baseline.get('results', {}).get(target, {})
+        for case, timing in current.get('cases', {}).items():
+            before = previous.get('cases', {}).get(case)
+            if before and timing['median_ns'] > before['median_ns'] * (1 + tolerance):
+                regressions.append(f"{target} {case}: {before['median_ns']:.0f} -> {timing['median_ns']:.0f} ns")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', default="simple,fast", help="comma-separated: simple, fast")
+    parser.add_argument('--size', type=int, default=500, help="texts per corpus")
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default="classifier_results.json")
+    parser.add_argument('--baseline', help="earlier results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    results = {
+        'created_at': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'size': args.size, 'rounds': args.rounds, 'seed': args.seed},
+        'results': {}
+    }
+    for target in args.targets.split(","):
+        try:
+            module = importlib.import_module(TARGETS[target])
+        except Exception as e:
+            results['results'][target] = {'status': 'skipped', 'reason': repr(e)}
+            print(f"{target}: skipped ({e!r})")
+            continue
+        cases = benchmark_module(module, args.size, args.rounds, args.seed)
+        results['results'][target] = {'status': 'ok', 'cases': cases}
+        for case, timing in cases.items():
+            print(f"{target:<7} {case:<36} {timing['median_ns']:>10.0f} ns/text  (min {timing['min_ns']:.0f})")
+
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
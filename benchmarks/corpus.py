@@ -0,0 +1,64 @@
+"""
+Seeded synthetic complaint corpus for classifier benchmarks
+"""
+
+import random
+from typing import Dict, List, Sequence, Tuple
+
+# Filler vocabulary per language; keywords are mixed in separately
+FILLER = {
+    'en': (
+        "i the my a to and it is was have been for this on with that we our they please "
+        "yesterday today order customer team since again still after before week month called "
+        "told said waiting ticket number reply email phone store shop help issue problem"
+    ).split(),
+    'es': (
+        "el la mi de que y en un una por para con mi pedido cliente ayer hoy semana todavia "
+        "despues llame dijeron esperando correo tienda problema ayuda factura cuenta"
+    ).split(),
+    'hi': (
+        "mera meri hai tha ki ke ko se aur nahi kal aaj hafte mahine abhi bhi phir "
+        "maine unhone kaha intezaar dukaan madad samasya khata bill"
+    ).split(),
+}
+
+# name -> (minimum words, maximum words)
+LENGTHS = {'short': (5, 15), 'medium': (30, 80), 'long': (200, 400)}
+# name -> share of words that are classifier keywords
+DENSITIES = {'none': 0.0, 'sparse': 0.03, 'dense': 0.2}
+# name -> language weights
+LANGUAGE_MIXES = {'en': {'en': 1.0}, 'mixed': {'en': 0.6, 'es': 0.2, 'hi': 0.2}}
+
+
+def generate_corpus(
+    size: int,
+    keywords: Sequence[str],
+    length: Tuple[int, int] = LENGTHS['medium'],
+    keyword_density: float = DENSITIES['sparse'],
+    languages: Dict[str, float] = LANGUAGE_MIXES['en'],
+    seed: int = 1
+) -> List[str]:
+    """Build `size` complaint texts; the same arguments always give the same corpus"""
+    rng = random.Random(seed)
+    names, weights = list(languages), list(languages.values())
+    corpus = []
+    for _ in range(size):
+        language = rng.choices(names, weights)[0]
+        filler = FILLER[language]
+        words = [
+            rng.choice(keywords) if keywords and rng.random() < keyword_density else rng.choice(filler)
+            for _ in range(rng.randint(*length))
+        ]
+        text = " ".join(words)
+        corpus.append(text[0].upper() + text[1:] + ".")
+    return corpus
+
+
+def profiles() -> List[Tuple[str, Tuple[int, int], float, Dict[str, float]]]:
+    """Every (name, length, density, languages) combination benchmarked by default"""
+    return [
+        (f"{length_name}-{density_name}-{mix_name}", length, density, mix)
+        for length_name, length in LENGTHS.items()
+        for density_name, density in DENSITIES.items()
+        for mix_name, mix in LANGUAGE_MIXES.items()
+    ]
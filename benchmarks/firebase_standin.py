@@ -0,0 +1,143 @@
+"""
+In-memory Firebase stand-in for benchmarking main.py without a Firebase project
+"""
+
+import functools
+import sys
+import types
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from benchmarks.firestore_standin import DESCENDING, Increment, StandInFirestore
+
+
+class StandInFirebaseService:
+    """
+    Implements the FirebaseService calls main.py makes, backed by memory.
+
+    Bearer tokens are taken as user ids; ids starting with "admin" get the
+    admin role. Complaints are documents in a stand-in Firestore `db`, shared
+    with the `firestore.client()` that `install` provides, so queries main.py
+    runs against Firestore directly see them too.
+    """
+
+    def __init__(self, db: Optional[StandInFirestore] = None):
+        self.db = db or StandInFirestore()
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.chat_messages: Dict[str, List[Dict[str, Any]]] = {}
+
+    async def verify_token(self, token: str) -> Dict[str, Any]:
+        return {'uid': token}
+
+    async def create_custom_token(self, uid: str) -> str:
+        return uid
+
+    def _user(self, uid: str, **fields: Any) -> Dict[str, Any]:
+        if uid not in self.users:
+            self.users[uid] = {
+                'id': uid,
+                'email': f"{uid}@bench.local",
+                'name': uid,
+                'role': 'admin' if uid.startswith('admin') else 'user',
+                'created_at': datetime.now().isoformat()
+            }
+        self.users[uid].update(fields)
+        return self.users[uid]
+
+    async def get_user(self, uid: str) -> Dict[str, Any]:
+        return self._user(uid)
+
+    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return next((user for user in self.users.values() if user['email'] == email), None)
+
+    async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self._user(str(uuid.uuid4()), **user_data)
+
+    async def update_user(self, uid: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        return self._user(uid, **changes)
+
+    async def create_complaint(self, complaint_data: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.now().isoformat()
+        complaint = {
+            'status': 'registered',
+            'escalation_level': 0,
+            **complaint_data,
+            'created_at': now,
+            'updated_at': now
+        }
+        ref = self.db.collection('complaints').document(str(uuid.uuid4()))
+        ref.set(complaint)
+        return {**complaint, 'id': ref.id}
+
+    async def get_complaint(self, complaint_id: str) -> Optional[Dict[str, Any]]:
+        snapshot = self.db.collection('complaints').document(complaint_id).get()
+        return {**snapshot.to_dict(), 'id': snapshot.id} if snapshot.exists else None
+
+    async def update_complaint(self, complaint_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        ref = self.db.collection('complaints').document(complaint_id)
+        if not ref.get().exists:
+            return None
+        ref.update({**changes, 'updated_at': datetime.now().isoformat()})
+        return await self.get_complaint(complaint_id)
+
+    async def get_all_complaints(self, filters: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        query = self.db.collection('complaints')
+        for field, value in filters.items():
+            query = query.where(field, '==', value)
+        query = query.order_by('created_at', direction=DESCENDING).limit(limit)
+        return [{**snapshot.to_dict(), 'id': snapshot.id} for snapshot in query.stream()]
+
+    async def get_user_complaints(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        return await self.get_all_complaints({'user_id': user_id}, limit)
+
+    async def save_chat_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        self.chat_messages.setdefault(message['session_id'], []).append(message)
+        return message
+
+    async def get_chat_history(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return self.chat_messages.get(session_id, [])[-limit:]
+
+
+def _run_transaction(func, transaction, *args, **kwargs):
+    transaction._begin()
+    try:
+        result = func(transaction, *args, **kwargs)
+        transaction._commit()
+        return result
+    except BaseException:
+        transaction._rollback()
+        raise
+
+
+def install():
+    """Make `firebase_admin` and `services.firebase_service` resolve to the stand-in"""
+    db = StandInFirestore()
+    firebase_admin = types.ModuleType('firebase_admin')
+    firebase_admin._apps = {'[DEFAULT]': object()}
+    firebase_admin.initialize_app = lambda *args, **kwargs: None
+
+    credentials = types.ModuleType('firebase_admin.credentials')
+    credentials.Certificate = lambda path: path
+
+    firestore = types.ModuleType('firebase_admin.firestore')
+    firestore.client = lambda: db
+    firestore.Increment = Increment
+    # Stand-in transactions apply their writes as they commit, without retries
+    firestore.transactional = lambda func: functools.partial(_run_transaction, func)
+    firestore.Query = types.SimpleNamespace(ASCENDING='ASCENDING', DESCENDING='DESCENDING')
+
+    auth = types.ModuleType('firebase_admin.auth')
+
+    firebase_admin.credentials, firebase_admin.firestore, firebase_admin.auth = credentials, firestore, auth
+    service_module = types.ModuleType('services.firebase_service')
+    service_module.FirebaseService = lambda: StandInFirebaseService(db)
+
+    sys.modules.update({
+        'firebase_admin': firebase_admin,
+        'firebase_admin.credentials': credentials,
+        'firebase_admin.firestore': firestore,
+        'firebase_admin.auth': auth,
+        'services.firebase_service': service_module
+    })
+
@@ -0,0 +1,243 @@
+"""
+In-memory Firestore client for the benchmark stand-in and the store tests
+"""
+
+import copy
+import itertools
+import types
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+DOCUMENT_ID = '__name__'
+
+_MISSING = object()
+# Firestore orders values of different types by type first
+_TYPE_ORDER = {type(None): 0, bool: 1, int: 2, float: 2, datetime: 3, str: 4}
+
+
+class Increment:
+    def __init__(self, value: float):
+        self.value = value
+
+
+def _is_increment(value: Any) -> bool:
+    # Accepts the real firestore.Increment as well as the stand-in's
+    return type(value).__name__ == 'Increment' and hasattr(value, 'value')
+
+
+def _apply(data: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    result = dict(data)
+    for field, value in changes.items():
+        if _is_increment(value):
+            result[field] = result.get(field, 0) + value.value
+        else:
+            result[field] = copy.deepcopy(value)
+    return result
+
+
+def _order_value(value: Any) -> Tuple[int, Any]:
+    return (_TYPE_ORDER.get(type(value), 5), value)
+
+
+class DocumentSnapshot:
+    def __init__(self, reference: "DocumentReference", data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data)
+
+    def get(self, field: str) -> Any:
+        if self._data is None or field not in self._data:
+            raise KeyError(field)
+        return copy.deepcopy(self._data[field])
+
+    def _value(self, field: str) -> Any:
+        if field == DOCUMENT_ID:
+            return self.id
+        return self._data.get(field, _MISSING)
+
+
+class DocumentReference:
+    def __init__(self, client: "StandInFirestore", collection: str, document_id: str):
+        self._client = client
+        self._collection = collection
+        self.id = document_id
+
+    @property
+    def _documents(self) -> Dict[str, Dict[str, Any]]:
+        return self._client._collections.setdefault(self._collection, {})
+
+    def get(self, transaction: Any = None) -> DocumentSnapshot:
+        return DocumentSnapshot(self, copy.deepcopy(self._documents.get(self.id)))
+
+    def set(self, data: Dict[str, Any], merge: bool = False):
+        existing = self._documents.get(self.id, {}) if merge else {}
+        self._documents[self.id] = _apply(existing, data)
+
+    def create(self, data: Dict[str, Any]):
+        if self.id in self._documents:
+            raise ValueError(f"Document {self._collection}/{self.id} already exists")
+        self.set(data)
+
+    def update(self, changes: Dict[str, Any]):
+        if self.id not in self._documents:
+            raise ValueError(f"No document to update: {self._collection}/{self.id}")
+        self._documents[self.id] = _apply(self._documents[self.id], changes)
+
+    def delete(self):
+        self._documents.pop(self.id, None)
+
+
+class Query:
+    def __init__(self, client: "StandInFirestore", collection: str, filters=(), orders=(), cursor=None, limit=None):
+        self._client = client
+        self._collection = collection
+        self._filters: Tuple[Tuple[str, str, Any], ...] = tuple(filters)
+        self._orders: Tuple[Tuple[str, str], ...] = tuple(orders)
+        self._cursor = cursor
+        self._limit = limit
+
+    def _copy(self, **changes: Any) -> "Query":
+        options = {'filters': self._filters, 'orders': self._orders, 'cursor': self._cursor, 'limit': self._limit}
+        return Query(self._client, self._collection, **{**options, **changes})
+
+    def where(self, field: str, op: str, value: Any) -> "Query":
+        if op not in ('==', 'in'):
+            raise NotImplementedError(f"The stand-in does not support '{op}' filters")
+        return self._copy(filters=self._filters + ((field, op, value),))
+
+    def order_by(self, field: str, direction: str = ASCENDING) -> "Query":
+        return self._copy(orders=self._orders + ((field, direction),))
+
+    def start_after(self, cursor: Any) -> "Query":
+        if isinstance(cursor, DocumentSnapshot):
+            cursor = {**cursor.to_dict(), DOCUMENT_ID: cursor.id}
+        values = []
+        for field, _ in self._orders:
+            value = cursor[field]
+            values.append(getattr(value, 'id', value) if field == DOCUMENT_ID else value)
+        return self._copy(cursor=tuple(values))
+
+    def limit(self, count: int) -> "Query":
+        return self._copy(limit=count)
+
+    def _matches(self, snapshot: DocumentSnapshot) -> bool:
+        for field, op, value in self._filters:
+            actual = snapshot._value(field)
+            if actual is _MISSING or (actual != value if op == '==' else actual not in value):
+                return False
+        # Documents missing an ordered field are left out, as in Firestore
+        return all(snapshot._value(field) is not _MISSING for field, _ in self._orders)
+
+    def _after_cursor(self, snapshot: DocumentSnapshot) -> bool:
+        for (field, direction), cursor in zip(self._orders, self._cursor):
+            value, cursor = _order_value(snapshot._value(field)), _order_value(cursor)
+            if value != cursor:
+                return value < cursor if direction == DESCENDING else value > cursor
+        return False
+
+    def stream(self):
+        documents = self._client._collections.get(self._collection, {})
+        snapshots = [
+            DocumentSnapshot(DocumentReference(self._client, self._collection, document_id), copy.deepcopy(data))
+            for document_id, data in documents.items()
+        ]
+        snapshots = [snapshot for snapshot in snapshots if self._matches(snapshot)]
+        orders = self._orders + ((DOCUMENT_ID, self._orders[-1][1] if self._orders else ASCENDING),)
+        for field, direction in reversed(orders):
+            snapshots.sort(key=lambda snapshot: _order_value(snapshot._value(field)), reverse=direction == DESCENDING)
+        if self._cursor is not None:
+            snapshots = [snapshot for snapshot in snapshots if self._after_cursor(snapshot)]
+        return iter(snapshots[:self._limit] if self._limit is not None else snapshots)
+
+    def get(self) -> List[DocumentSnapshot]:
+        return list(self.stream())
+
+    def count(self):
+        query = self
+        return types.SimpleNamespace(get=lambda **options: [[types.SimpleNamespace(alias='count', value=len(query.get()))]])
+
+
+class CollectionReference(Query):
+    def __init__(self, client: "StandInFirestore", collection: str):
+        super().__init__(client, collection)
+
+    def document(self, document_id: Optional[str] = None) -> DocumentReference:
+        return DocumentReference(self._client, self._collection, document_id or uuid.uuid4().hex[:20])
+
+
+class WriteBatch:
+    """Collects writes and applies them together on `commit`"""
+
+    def __init__(self):
+        self._writes: List[Tuple[str, DocumentReference, Tuple[Any, ...]]] = []
+
+    def set(self, reference: DocumentReference, data: Dict[str, Any], merge: bool = False):
+        self._writes.append(('set', reference, (data, merge)))
+
+    def update(self, reference: DocumentReference, changes: Dict[str, Any]):
+        self._writes.append(('update', reference, (changes,)))
+
+    def delete(self, reference: DocumentReference):
+        self._writes.append(('delete', reference, ()))
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        for method, reference, args in writes:
+            getattr(reference, method)(*args)
+
+
+class Transaction(WriteBatch):
+    """
+    Enough of the client transaction for `firestore.transactional`: reads go
+    straight to the store and writes are applied on commit.
+    """
+
+    _read_only = False
+    _max_attempts = 1
+    _ids = itertools.count(1)
+
+    def __init__(self):
+        super().__init__()
+        self._id = None
+
+    def _clean_up(self):
+        self._writes, self._id = [], None
+
+    def _begin(self, retry_id: Any = None):
+        self._id = next(self._ids)
+
+    def _commit(self):
+        self.commit()
+        self._clean_up()
+
+    def _rollback(self):
+        self._clean_up()
+
+
+class StandInFirestore:
+    """Firestore client with the calls the services make, backed by dicts"""
+
+    def __init__(self):
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def collection(self, name: str) -> CollectionReference:
+        return CollectionReference(self, name)
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch()
+
+    def transaction(self) -> Transaction:
+        return Transaction()
+
+    def get_all(self, references: List[DocumentReference]):
+        return iter([reference.get() for reference in references])
@@ -0,0 +1,314 @@
+"""
+Load test for the complaint backends
+
+Starts each backend in its own uvicorn process, drives it with a fixed mix of
+complaint creation, listing, chat turns and WebSocket sessions at a set
+concurrency, and reports latency percentiles, throughput and server memory.
+
+    python -m benchmarks.load_test --targets fast,simple,main --concurrency 32 --duration 20
+    python -m benchmarks.load_test --output new.json --baseline baseline.json
+
+Results are written as JSON. With --baseline, any target whose p95/p99
+latency or peak RSS grew, or whose throughput fell, by more than --tolerance
+is reported and the exit status is 1.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import websockets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (operation, weight) for the request mix
+OPERATIONS = (
+    ('create_complaint', 30),
+    ('list_complaints', 30),
+    ('chat_message', 25),
+    ('websocket_session', 15),
+)
+
+COMPLAINTS = [
+    ("Refund not processed", "I was charged twice and the payment failed to refund"),
+    ("Internet down", "The wifi router keeps disconnecting and internet is slow"),
+    ("Rude staff", "The support agent was rude and unhelpful on the call"),
+    ("Package missing", "My delivery never arrived and tracking shows shipped"),
+    ("Cannot login", "The website shows an error when I try to login to my account"),
+]
+CHAT_LINES = [
+    "Hello",
+    "I want to file a complaint about my bill",
+    "What is the status of my complaint?",
+    "Help",
+    "This is urgent, my service is down",
+]
+WEBSOCKET_TURNS = 3
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'mean_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+class LoadClient:
+    """One simulated user running the operation mix"""
+
+    def __init__(self, base_url: str, user_id: str, rng: random.Random):
+        self.base_url = base_url
+        self.ws_url = base_url.replace("http://", "ws://", 1)
+        self.user_id = user_id
+        self.rng = rng
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {user_id}"},
+            timeout=30
+        )
+
+    async def close(self):
+        await self.http.aclose()
+
+    async def create_complaint(self):
+        title, description = self.rng.choice(COMPLAINTS)
+        response = await self.http.post("/complaints", json={'title': title, 'description': description})
+        response.raise_for_status()
+
+    async def list_complaints(self):
+        response = await self.http.get("/complaints", params={'limit': 20})
+        response.raise_for_status()
+
+    async def chat_message(self):
+        response = await self.http.post("/chat/message", json={'message': self.rng.choice(CHAT_LINES)})
+        response.raise_for_status()
+
+    async def websocket_session(self):
+        async with websockets.connect(f"{self.ws_url}/ws/chat/{self.user_id}?token={self.user_id}") as websocket:
+            for _ in range(WEBSOCKET_TURNS):
+                await websocket.send(json.dumps({'message': self.rng.choice(CHAT_LINES)}))
+                reply = json.loads(await asyncio.wait_for(websocket.recv(), 30))
+                if 'error' in reply:
+                    raise RuntimeError(reply['error'])
+
+
+async def run_load(base_url: str, concurrency: int, duration: float, warmup: float, seed: int, users: int):
+    """Run the mix; returns (latencies by operation, errors by operation, measured seconds)"""
+    names = [name for name, _ in OPERATIONS]
+    weights = [weight for _, weight in OPERATIONS]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    async def worker(number: int):
+        rng = random.Random(seed * 1000 + number)
+        client = LoadClient(base_url, f"bench_user_{number % users}", rng)
+        try:
+            while True:
+                now = time.perf_counter()
+                if now >= stop_at:
+                    return
+                name = rng.choices(names, weights)[0]
+                operation: Callable[[], Awaitable[None]] = getattr(client, name)
+                try:
+                    await operation()
+                    ok = True
+                except Exception:
+                    ok = False
+                if now >= measure_from:
+                    if ok:
+                        latencies[name].append(time.perf_counter() - now)
+                    else:
+                        errors[name] += 1
+        finally:
+            await client.close()
+
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+    # Requests in flight at stop_at still count, so the window runs until the last one finished
+    return latencies, errors, time.perf_counter() - measure_from
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_up(base_url: str, process: subprocess.Popen, timeout: float = 30.0) -> Optional[str]:
+    """None once /health answers, or the reason the server did not come up"""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                return process.stderr.read().decode().strip() or f"exited with status {process.returncode}"
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return None
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    return f"no /health response within {timeout:.0f}s"
+
+
+async def benchmark_target(target: str, args: argparse.Namespace) -> Dict[str, Any]:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.serve", target, "--port", str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    try:
+        reason = await wait_until_up(base_url, process)
+        if reason is not None:
+            return {'status': 'skipped', 'reason': reason}
+
+        rss_samples: List[float] = []
+
+        async def sample_rss():
+            while True:
+                rss = read_rss_mb(process.pid)
+                if rss is not None:
+                    rss_samples.append(rss)
+                await asyncio.sleep(0.5)
+
+        sampler = asyncio.ensure_future(sample_rss())
+        try:
+            latencies, errors, elapsed = await run_load(
+                base_url, args.concurrency, args.duration, args.warmup, args.seed, args.users
+            )
+        finally:
+            sampler.cancel()
+
+        everything = [value for values in latencies.values() for value in values]
+        return {
+            'status': 'ok',
+            **summarize(everything, sum(errors.values()), elapsed),
+            'operations': {name: summarize(latencies[name], errors[name], elapsed) for name in latencies},
+            'rss_peak_mb': max(rss_samples, default=None),
+            'rss_end_mb': rss_samples[-1] if rss_samples else None,
+        }
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Describe every metric that regressed by more than `tolerance` against the baseline"""
+    regressions = []
+    for target, current in results['results'].items():
+        previous = baseline.get('results', {}).get(target)
+        if current.get('status') != 'ok' or not previous or previous.get('status') != 'ok':
+            continue
+        for metric in ('p95_ms', 'p99_ms', 'rss_peak_mb'):
+            before, after = previous.get(metric), current.get(metric)
+            if before and after and after > before * (1 + tolerance):
+                regressions.append(f"{target}: {metric} {before:.1f} -> {after:.1f}")
+        if previous.get('rps') and current['rps'] < previous['rps'] * (1 - tolerance):
+            regressions.append(f"{target}: rps {previous['rps']:.1f} -> {current['rps']:.1f}")
+    return regressions
+
+
+def print_report(results: Dict[str, Any]):
+    print(f"{'target':<8} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'rss MB':>8}")
+    for target, result in results['results'].items():
+        if result['status'] != 'ok':
+            print(f"{target:<8} skipped: {result['reason'].splitlines()[-1]}")
+            continue
+        rss = f"{result['rss_peak_mb']:.1f}" if result['rss_peak_mb'] is not None else "n/a"
+        print(f"{target:<8} {result['rps']:>9.1f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+              f"{result['p99_ms']:>9.1f} {result['errors']:>7} {rss:>8}")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'users': args.users,
+            'mix': dict(OPERATIONS),
+        },
+        'results': {}
+    }
+    for target in args.targets.split(","):
+        print(f"Benchmarking {target}...", file=sys.stderr)
+        results['results'][target] = await benchmark_target(target, args)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', default="fast,simple,main", help="comma-separated: fast, simple, main")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20.0, help="measured seconds per target")
+    parser.add_argument('--warmup', type=float, default=3.0, help="unmeasured seconds before measuring")
+    parser.add_argument('--users', type=int, default=50, help="distinct simulated users")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default="benchmark_results.json")
+    parser.add_argument('--baseline', help="earlier results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    print_report(results)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Run one backend under uvicorn for the load test
+"""
+
+import argparse
+import importlib
+import os
+import sys
+
+import uvicorn
+
+TARGETS = {'fast': 'main_fast', 'simple': 'main_simple', 'main': 'main'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('target', choices=sorted(TARGETS))
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.target == 'main':
+        from benchmarks import firebase_standin
+        firebase_standin.install()
+        os.environ.setdefault("FIREBASE_SERVICE_ACCOUNT_KEY", "stand-in")
+
+    try:
+        module = importlib.import_module(TARGETS[args.target])
+    except Exception as e:
+        print(f"Cannot import {TARGETS[args.target]}: {e!r}", file=sys.stderr)
+        sys.exit(3)
+
+    uvicorn.run(module.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
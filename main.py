@@ -1,7 +1,7 @@
-from fastapi import FastAPI, HTTPException, Depends, status, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Depends, status, WebSocket, Request, Response, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
 import os
@@ -9,31 +9,87 @@ from dotenv import load_dotenv
 from datetime import datetime
 import uvicorn
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 import uuid
+import asyncio
+import hashlib
+import hmac
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
 
 # Import models and services
 from models.user import User, UserCreate, UserLogin, UserUpdate
 from models.complaint import Complaint, ComplaintCreate, ComplaintUpdate, ComplaintFilter, ComplaintAnalytics
 from models.chat import ChatMessage, ChatSession, ChatMessageCreate, ChatResponse
-from services.firebase_service import FirebaseService
-from services.ai_service import AIService
-from services.chatbot_service import ChatbotService
-from services.notification_service import NotificationService
+from services.ttl_cache import TTLCache
+from services.executors import BoundedExecutor, ExecutorBusy
+from services import ai_worker
+from services.chat_buffer import ChatTranscriptBuffer
+from services.chat_store import ChatMessageStore
+from services.chat_stream import ChatConnection
+from services.session_bus import create_session_backend
+from services.analytics import AnalyticsScan, ComplaintAnalyticsAggregator
+from services.pagination import CursorKey, complaint_page, cursor_key, decode_cursor
+from services.complaint_query import ComplaintQuery
+from services.complaint_export import csv_export, iter_complaints, ndjson_export
+from services.escalation import EscalationScheduler, escalation_deadline
+from services.jobs import JobRegistry
+from services.notification_pipeline import NotificationPipeline, NotificationQueueFull, notification_event
+from services.notification_store import NotificationStore
+from services.event_stream import EventBroker, TooManyConnections
+from services.metrics import Instrumented, LoopLagMonitor, registry as metrics, request_spans, span
+from services.profiling import RequestProfiler
+from services.lazy import AsyncServiceProxy, LazyService
+from services.classification_cache import MISSING, ClassificationCache
+from services.micro_batcher import MicroBatcher, run_batch
+from services.fused_analysis import FusedAnalyzer
+from services.model_training import ModelHistory, load_model, remove_stale_files, train_model, write_ndjson
+from services.online_learning import CorrectionFeed, CorrectionModel, correction_example
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Firebase
-if not firebase_admin._apps:
-    cred = credentials.Certificate(os.getenv("FIREBASE_SERVICE_ACCOUNT_KEY"))
-    firebase_admin.initialize_app(cred)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up_task = asyncio.ensure_future(warm_up_services())
+    chat_buffer.start()
+    notification_pipeline.start()
+    if ONLINE_LEARNING:
+        correction_feed.start()
+    loop_lag.start()
+    events_task = asyncio.ensure_future(relay("events", deliver_event))
+    chat_relay_task = asyncio.ensure_future(relay("chat", deliver_chat_reply))
+    reconcile_task = asyncio.ensure_future(reconcile_analytics_periodically())
+    escalation_task = asyncio.ensure_future(run_escalation_scheduler()) if ESCALATION_SCHEDULER else None
+    yield
+    warm_up_task.cancel()
+    reconcile_task.cancel()
+    if escalation_task is not None:
+        escalation_task.cancel()
+    await escalation_scheduler.close()
+    await notification_pipeline.close()
+    await correction_feed.close()
+    for batcher in ai_batchers.values():
+        await batcher.close()
+    # uvicorn turns SIGTERM into this shutdown phase, so buffered chat is drained here
+    # Open event streams would otherwise hold shutdown until their clients leave
+    event_broker.close()
+    events_task.cancel()
+    chat_relay_task.cancel()
+    await chat_buffer.close()
+    await session_backend.close()
+    await loop_lag.close()
+    io_executor.shutdown()
+    ai_executor.shutdown()
+    training_executor.shutdown(wait=False)
 
 # Create FastAPI app
 app = FastAPI(
     title="Complaint Management System API",
     description="AI-powered complaint management system with chatbot integration",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -48,30 +104,565 @@ app.add_middleware(
 # Security
 security = HTTPBearer()
 
-# Initialize services
-firebase_service = FirebaseService()
-ai_service = AIService()
-chatbot_service = ChatbotService()
-notification_service = NotificationService(firebase_service)
+# Request timing. Latency histograms and span timings are served at /metrics
+# in Prometheus format. With PROFILING_ENABLED=true, adding ?profile=1 or an
+# `X-Profile: 1` header returns a cProfile report instead of the response body.
+# /metrics needs an admin's token, or METRICS_TOKEN for a Prometheus scraper.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response starts", ("method", "route", "status")
+)
+loop_lag = LoopLagMonitor()
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    spans = []
+    spans_token = request_spans.set(spans)
+    profiler = None
+    if PROFILING_ENABLED and "1" in (request.query_params.get("profile"), request.headers.get("x-profile")):
+        profiler = RequestProfiler()
+        if not profiler.start():
+            profiler = None
+    
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        elapsed = time.perf_counter() - started
+        if profiler is not None:
+            profiler.stop()
+        request_spans.reset(spans_token)
+        # Label by route template so ids in paths do not create new series
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        request_seconds.observe(elapsed, request.method, route, str(status_code))
+    
+    totals: Dict[str, float] = {}
+    for name, seconds in spans:
+        totals[name] = totals.get(name, 0.0) + seconds
+    timings = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items()]
+    response.headers["Server-Timing"] = ", ".join(timings + [f"total;dur={elapsed * 1000:.1f}"])
+    
+    if profiler is None or response.headers.get("content-type", "").startswith("text/event-stream"):
+        return response
+    async for _ in response.body_iterator:
+        pass
+    return JSONResponse({
+        "status_code": status_code,
+        "duration_ms": elapsed * 1000,
+        "spans": [{"name": name, "duration_ms": seconds * 1000} for name, seconds in spans],
+        "profile": profiler.report()
+    })
+
+# Initialize services. Each one is created on first use or by the warm-up task
+# started with the app, so the server accepts connections before Firebase is
+# initialized and models are loaded; /ready reports which are warm.
+def create_firebase_service():
+    if not firebase_admin._apps:
+        cred = credentials.Certificate(os.getenv("FIREBASE_SERVICE_ACCOUNT_KEY"))
+        firebase_admin.initialize_app(cred)
+    from services.firebase_service import FirebaseService
+    return FirebaseService()
+
+def create_ai_service():
+    from services.ai_service import AIService
+    return FusedAnalyzer(AIService(), correction_model.get() if ONLINE_LEARNING else None)
+
+def create_notification_service():
+    from services.notification_service import NotificationService
+    return NotificationService(Instrumented(lazy_services['firebase'].get(), "firebase"))
+
+lazy_services = {
+    'firebase': LazyService('firebase', create_firebase_service),
+    'ai': LazyService('ai', create_ai_service),
+    'chatbot': LazyService('chatbot', "services.chatbot_service:ChatbotService"),
+    'notifications': LazyService('notifications', create_notification_service)
+}
+def run_on_io(func):
+    return io_executor.run(func)
+
+# Every Firebase call is timed as a `firebase.<method>` span. A call made before
+# the service exists creates it on the I/O executor, not on the event loop.
+firebase_service = Instrumented(AsyncServiceProxy(lazy_services['firebase'], run_on_io), "firebase")
+ai_service = lazy_services['ai']
+chatbot_service = lazy_services['chatbot']
+notification_service = lazy_services['notifications']
+
+def firestore_client():
+    # The Firebase app is initialized along with the service
+    lazy_services['firebase'].get()
+    return firestore.client()
+
+# FirebaseService has no keyset paging, so complaint listings query Firestore directly
+complaint_query = ComplaintQuery(collection=os.getenv("COMPLAINTS_COLLECTION", "complaints"), client=firestore_client)
+
+async def fetch_complaints(filters: Dict[str, Any], limit: int, after: Optional[CursorKey] = None) -> List[Dict[str, Any]]:
+    """Up to `limit` complaints newest first, starting after the `after` key"""
+    return await run_blocking(io_executor, complaint_query.page, filters, limit, after, span_name="firestore.complaints.page")
+
+# Services warmed in the background at startup, in order, and those /ready waits for
+WARM_UP_SERVICES = [name for name in os.getenv("WARM_UP_SERVICES", "firebase,chatbot,ai").split(",") if name]
+READY_REQUIRES = [name for name in os.getenv("READY_REQUIRES", "firebase").split(",") if name]
+ai_workers_warm = False
+
+async def warm_up_services():
+    """Create the configured services one after another, off the event loop"""
+    global ai_workers_warm
+    for name in WARM_UP_SERVICES:
+        try:
+            if name == 'ai' and AI_EXECUTOR == "process":
+                # Each worker process loads its own models as it starts
+                loaded = await asyncio.gather(*(ai_executor.run(ai_worker.ready) for _ in range(AI_WORKERS)))
+                if not all(loaded):
+                    raise RuntimeError(f"{loaded.count(False)} of {AI_WORKERS} AI workers have no models loaded")
+                ai_workers_warm = True
+            else:
+                await lazy_services[name].warm_up()
+            print(f"Warmed up {name}")
+        except Exception as e:
+            print(f"Warm-up of {name} failed: {e}")
+
+def service_status() -> Dict[str, Any]:
+    services = {name: service.status() for name, service in lazy_services.items()}
+    if AI_EXECUTOR == "process":
+        services['ai'] = {"state": "ready" if ai_workers_warm else "cold", "executor": "process"}
+    return services
+
+# Chat transcripts are buffered and written in batched commits after the reply
+# is sent. CHAT_COLLECTION must be the collection chat history is read from.
+chat_store = ChatMessageStore(collection=os.getenv("CHAT_COLLECTION", "chat_messages"), client=firestore_client)
+chat_buffer = ChatTranscriptBuffer(
+    lambda messages: io_executor.run(chat_store.save_batch, messages),
+    max_batch=int(os.getenv("CHAT_BUFFER_MAX_BATCH", "200")),
+    flush_interval=float(os.getenv("CHAT_BUFFER_FLUSH_INTERVAL", "1.0"))
+)
+
+def chat_transcript(user_id: str, message: str, response: ChatResponse, complaint_id: Optional[str] = None,
+                    received_at: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Build the user and bot message records for one chat turn. They are
+    timestamped when the message arrived and when the reply was made, not when
+    the buffer writes them.
+    """
+    replied_at = datetime.now()
+    user_message_data = {
+        'session_id': response.session_id,
+        'user_id': user_id,
+        'message': message,
+        'message_type': 'user',
+        'role': 'user',
+        'complaint_id': complaint_id,
+        'timestamp': received_at or replied_at
+    }
+    
+    bot_message_data = {
+        'session_id': response.session_id,
+        'user_id': user_id,
+        'message': response.message,
+        'message_type': 'bot',
+        'role': 'assistant',
+        'intent': response.intent,
+        'confidence': response.confidence,
+        'complaint_id': response.complaint_id,
+        'timestamp': replied_at
+    }
+    
+    return [user_message_data, bot_message_data]
+
+# Chat session registry and message bus. Set SESSION_BACKEND_URL=redis://host:port/db
+# so that sessions and WebSocket fan-out are shared by every worker and node.
+session_backend = create_session_backend(
+    os.getenv("SESSION_BACKEND_URL"),
+    session_ttl=float(os.getenv("CHAT_SESSION_TTL", "3600"))
+)
+
+async def record_chat_turn(user_id: str, response: ChatResponse, origin: Optional[str] = None):
+    """Refresh the chat session and fan the reply out to the user's open connections"""
+    try:
+        await session_backend.register_session({
+            'session_id': response.session_id,
+            'user_id': user_id,
+            'last_intent': response.intent,
+            'complaint_id': response.complaint_id,
+            'last_activity': datetime.now().isoformat()
+        })
+        await session_backend.publish("chat", {'user_id': user_id, 'origin': origin, 'response': response.dict()})
+    except Exception as e:
+        print(f"Failed to record chat session {response.session_id}: {e}")
+
+# Chat WebSockets open on this worker, by user id and then connection id. Each
+# worker holds one subscription to the "chat" channel and routes replies to
+# these, rather than one backend subscription per socket.
+chat_connections: Dict[str, Dict[str, ChatConnection]] = {}
+
+def deliver_chat_reply(message: Dict[str, Any]):
+    """Send a reply published by any worker to the user's other sockets on this worker"""
+    frame = json.dumps(message['response'], default=str)
+    for connection_id, connection in list(chat_connections.get(message['user_id'], {}).items()):
+        if connection_id != message.get('origin'):
+            connection.offer(frame)
+
+# Dashboard counters are kept up to date by the complaint routes and rebuilt
+# from a full scan every ANALYTICS_RECONCILE_INTERVAL seconds, which also picks
+# up changes made by other workers.
+ANALYTICS_RECONCILE_INTERVAL = float(os.getenv("ANALYTICS_RECONCILE_INTERVAL", "900"))
+ANALYTICS_RECONCILE_PAGE_SIZE = int(os.getenv("ANALYTICS_RECONCILE_PAGE_SIZE", "1000"))
+complaint_analytics = ComplaintAnalyticsAggregator()
+
+async def reconcile_analytics():
+    """Rebuild the analytics counters from the complaint collection"""
+    # Pages are folded into the counted fields of each complaint as they arrive,
+    # so memory does not grow with the size of the documents
+    scan, after = AnalyticsScan(), None
+    # Complaints recorded while the scan runs are journaled and laid over it
+    complaint_analytics.begin_reconcile()
+    try:
+        while True:
+            page = await fetch_complaints({}, ANALYTICS_RECONCILE_PAGE_SIZE, after)
+            scan.add(page)
+            if len(page) < ANALYTICS_RECONCILE_PAGE_SIZE:
+                break
+            after = cursor_key(page[-1])
+    except BaseException:
+        complaint_analytics.end_reconcile()
+        raise
+    complaint_analytics.reconcile(scan)
+
+async def reconcile_analytics_periodically():
+    while True:
+        try:
+            await reconcile_analytics()
+        except Exception as e:
+            print(f"Analytics reconcile failed: {e}")
+        await asyncio.sleep(ANALYTICS_RECONCILE_INTERVAL)
+
+# Server-Sent Events. Events are published through the session backend, so with
+# SESSION_BACKEND_URL=redis://... a change made on any worker reaches streams on
+# every worker. Replay ids are per worker; resuming elsewhere yields a reset.
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))
+event_broker = EventBroker(
+    max_connections=int(os.getenv("SSE_MAX_CONNECTIONS", "1000")),
+    max_per_user=int(os.getenv("SSE_MAX_CONNECTIONS_PER_USER", "5")),
+    replay_size=int(os.getenv("SSE_REPLAY_SIZE", "1000"))
+)
+
+async def publish_event(user_id: Optional[str], event_type: str, data: Dict[str, Any]):
+    """Push an event to the user's open /events streams"""
+    if not user_id:
+        return
+    try:
+        await session_backend.publish("events", {'user_id': user_id, 'type': event_type, 'data': data})
+    except Exception as e:
+        print(f"Failed to publish {event_type} event: {e}")
+
+def deliver_event(message: Dict[str, Any]):
+    event_broker.publish(message['user_id'], message['type'], message['data'])
+
+async def relay(channel: str, deliver: Callable[[Dict[str, Any]], Any]):
+    """Hand everything any worker publishes on `channel` to `deliver`, resubscribing after failures"""
+    while True:
+        try:
+            subscription = await session_backend.subscribe(channel)
+            try:
+                async for message in subscription:
+                    deliver(message)
+            finally:
+                await subscription.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Subscription to {channel} failed: {e}")
+        await asyncio.sleep(1)
+
+# Notifications are queued, coalesced per user and sent through
+# NotificationService in batches by a small worker pool, so endpoints return a
+# job id without waiting.
+jobs = JobRegistry(int(os.getenv("JOB_HISTORY_SIZE", "1000")))
+notification_store = NotificationStore(client=firestore_client)
+
+async def send_notifications(events: List[Dict[str, Any]]) -> List[Any]:
+    """Send each event with NotificationService, then count the sent ones as unread"""
+    service = await notification_service.resolve(run_on_io)
+    results = await asyncio.gather(*(
+        service.send_complaint_notification(event['complaint_id'], event['notification_type']) for event in events
+    ), return_exceptions=True)
+    sent = [event for event, result in zip(events, results) if result is not False and not isinstance(result, BaseException)]
+    unread: Dict[str, int] = {}
+    for event in sent:
+        unread[event['user_id']] = unread.get(event['user_id'], 0) + 1
+    if unread:
+        await io_executor.run(notification_store.add_unread, unread)
+    for event in sent:
+        await publish_event(event['user_id'], 'notification', {
+            'complaint_id': event['complaint_id'],
+            'type': event['notification_type'],
+            'created_at': event['created_at']
+        })
+    return results
+
+notification_pipeline = NotificationPipeline(
+    send_notifications,
+    jobs,
+    max_queue=int(os.getenv("NOTIFICATION_QUEUE_SIZE", "1000")),
+    workers=int(os.getenv("NOTIFICATION_WORKERS", "4")),
+    coalesce_window=float(os.getenv("NOTIFICATION_COALESCE_WINDOW", "2.0")),
+    write_batch_size=int(os.getenv("NOTIFICATION_WRITE_BATCH", "100"))
+)
+
+def queue_notifications(events: List[Dict[str, Any]], job_id: Optional[str] = None):
+    """Hand events to the notification pipeline, turning a full queue into 503"""
+    try:
+        notification_pipeline.submit(events, job_id)
+    except NotificationQueueFull as e:
+        if job_id is not None:
+            jobs.update(job_id, status='failed', error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+
+# Open complaints are escalated when their deadline passes. With
+# ESCALATION_SCHEDULER=on every worker competes for a lease in the session
+# backend and only the holder keeps a schedule, so one worker escalates (one
+# per process without a shared SESSION_BACKEND_URL). The holder reloads the
+# schedule from the store every ESCALATION_RESYNC_INTERVAL seconds to pick up
+# complaints created on other workers. A complaint is re-read before
+# escalating, so a stale schedule never escalates twice.
+ESCALATION_SCHEDULER = os.getenv("ESCALATION_SCHEDULER", "off") == "on"
+ESCALATION_TICK = float(os.getenv("ESCALATION_TICK", "60"))
+ESCALATION_RESYNC_INTERVAL = float(os.getenv("ESCALATION_RESYNC_INTERVAL", "300"))
+ESCALATION_LEASE_TTL = float(os.getenv("ESCALATION_LEASE_TTL", "90"))
+
+async def escalate(complaint: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+    """Raise a complaint's escalation level by one and queue a notification about it"""
+    changes = {
+        'escalation_level': (complaint.get('escalation_level') or 0) + 1,
+        'updated_at': datetime.now().isoformat()
+    }
+    try:
+        await firebase_service.update_complaint(complaint['id'], changes)
+    except Exception as e:
+        if job_id is not None:
+            jobs.update(job_id, status='failed', error=str(e))
+        raise
+    updated = {**complaint, **changes}
+    complaint_analytics.record(complaint, updated)
+    await publish_event(complaint.get('user_id'), 'complaint.escalated', {
+        'complaint_id': complaint['id'],
+        'escalation_level': changes['escalation_level']
+    })
+    try:
+        queue_notifications([notification_event(updated, "escalated")], job_id)
+    except HTTPException as e:
+        # The escalation itself is stored; only the notification is lost
+        print(f"Escalation notification for complaint {complaint['id']} dropped: {e.detail}")
+    return updated
+
+async def escalate_if_due(complaint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    current = await firebase_service.get_complaint(complaint['id'])
+    if not current:
+        return None
+    current = {**current, 'id': complaint['id']}
+    deadline = escalation_deadline(current)
+    if deadline is None or deadline > time.time():
+        # Closed, reprioritised or escalated since it was scheduled
+        return current
+    return await escalate(current)
+
+escalation_scheduler = EscalationScheduler(escalate_if_due, tick_interval=ESCALATION_TICK)
+
+def schedule_escalation(complaint: Dict[str, Any]):
+    """Track a new or changed complaint, if this worker is the one escalating"""
+    if escalation_scheduler.running:
+        escalation_scheduler.schedule(complaint)
+
+async def load_escalation_schedule():
+    """Rebuild the escalation schedule from the open complaints in the store"""
+    def fetch_page(after: Optional[CursorKey], limit: int):
+        return fetch_complaints({}, limit, after)
+    
+    # Only complaints that can still escalate are kept while the store is read
+    complaints = [
+        complaint async for complaint in iter_complaints(fetch_page, EXPORT_PAGE_SIZE)
+        if escalation_deadline(complaint) is not None
+    ]
+    escalation_scheduler.replace(complaints)
+
+async def run_escalation_scheduler():
+    """Escalate from this worker while it holds the escalation lease, reloading the schedule periodically"""
+    owner = str(uuid.uuid4())
+    next_resync = 0.0
+    while True:
+        try:
+            leader = await session_backend.acquire_lease("escalation", owner, ESCALATION_LEASE_TTL)
+        except Exception as e:
+            print(f"Escalation lease check failed: {e}")
+            leader = False
+        if leader:
+            if time.time() >= next_resync:
+                try:
+                    await load_escalation_schedule()
+                    next_resync = time.time() + ESCALATION_RESYNC_INTERVAL
+                except Exception as e:
+                    print(f"Failed to load escalation schedule: {e}")
+            escalation_scheduler.start()
+        elif escalation_scheduler.running:
+            await escalation_scheduler.close()
+            escalation_scheduler.clear()
+            next_resync = 0.0
+        # Renewed well within the TTL, so a live holder never loses the lease
+        await asyncio.sleep(ESCALATION_LEASE_TTL / 3)
+
+# Executors for blocking service calls. Chatbot calls go to an I/O thread pool;
+# AI inference goes to a CPU pool that runs threads by default, or worker
+# processes with their own AIService when AI_EXECUTOR=process.
+IO_WORKERS = int(os.getenv("IO_WORKERS", "16"))
+IO_QUEUE_DEPTH = int(os.getenv("IO_QUEUE_DEPTH", "256"))
+IO_TIMEOUT = float(os.getenv("IO_TIMEOUT", "30"))
+AI_EXECUTOR = os.getenv("AI_EXECUTOR", "thread")
+AI_WORKERS = int(os.getenv("AI_WORKERS", str(os.cpu_count() or 2)))
+AI_QUEUE_DEPTH = int(os.getenv("AI_QUEUE_DEPTH", "64"))
+AI_TIMEOUT = float(os.getenv("AI_TIMEOUT", "30"))
+TRAINING_TIMEOUT = float(os.getenv("TRAINING_TIMEOUT", "3600"))
+
+io_executor = BoundedExecutor(
+    "io", ThreadPoolExecutor(IO_WORKERS, thread_name_prefix="io"), IO_QUEUE_DEPTH, IO_TIMEOUT
+)
+if AI_EXECUTOR == "process":
+    ai_executor = BoundedExecutor(
+        "ai", ProcessPoolExecutor(AI_WORKERS, initializer=ai_worker.init_worker), AI_QUEUE_DEPTH, AI_TIMEOUT
+    )
+else:
+    ai_executor = BoundedExecutor(
+        "ai", ThreadPoolExecutor(AI_WORKERS, thread_name_prefix="ai"), AI_QUEUE_DEPTH, AI_TIMEOUT
+    )
+# Training runs one job at a time in its own process and produces a model file,
+# which is then loaded and swapped in for the live models
+training_executor = BoundedExecutor("training", ProcessPoolExecutor(1), 1, TRAINING_TIMEOUT)
+MODEL_DIR = os.getenv("MODEL_DIR", "trained_models")
+TRAINING_DATA_DIR = os.getenv("TRAINING_DATA_DIR", "training_data")
+MAX_TRAINING_UPLOAD_BYTES = int(os.getenv("MAX_TRAINING_UPLOAD_MB", "512")) * 1024 * 1024
+# An upload is deleted once a training job has used it; one never used is
+# deleted after TRAINING_UPLOAD_TTL_HOURS
+TRAINING_UPLOAD_TTL = float(os.getenv("TRAINING_UPLOAD_TTL_HOURS", "24")) * 3600
+# Category and priority corrections made by admins are learned incrementally.
+# Each worker process would learn from a different share of them, so this is
+# only available with the thread executor.
+ONLINE_LEARNING = os.getenv("ONLINE_LEARNING", "true").lower() == "true" and AI_EXECUTOR != "process"
+# What is learned from corrections is saved after every batch and shared by all
+# model versions, so it survives restarts and model swaps
+CORRECTIONS_PATH = os.path.join(MODEL_DIR, "corrections.pkl")
+
+def load_corrections() -> CorrectionModel:
+    if os.path.exists(CORRECTIONS_PATH):
+        return CorrectionModel.load(CORRECTIONS_PATH)
+    return CorrectionModel()
+
+def save_corrections():
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    correction_model.get().save(CORRECTIONS_PATH)
+
+correction_model = LazyService('corrections', load_corrections)
+
+async def run_blocking(executor: BoundedExecutor, func, *args, timeout: Optional[float] = None, span_name: Optional[str] = None):
+    """Run a blocking call on an executor, turning overload into 503 and timeouts into 504"""
+    try:
+        with span(span_name or f"{executor.name}.{getattr(func, '__name__', 'call')}"):
+            return await executor.run(func, *args, timeout=timeout)
+    except ExecutorBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"{executor.name} call timed out"
+        )
+
+async def ai_call(method: str, *args):
+    """Call an AIService method on the AI executor"""
+    if AI_EXECUTOR == "process":
+        return await run_blocking(ai_executor, ai_worker.call, method, *args, span_name=f"ai.{method}")
+    return await run_blocking(ai_executor, ai_service.method(method), *args, span_name=f"ai.{method}")
+
+def call_ai_batch(method: str, calls: List[tuple]) -> List[Any]:
+    return run_batch(ai_service.get(), method, calls)
+
+async def ai_call_batch(method: str, calls: List[tuple]) -> List[Any]:
+    """Call an AIService method for many argument tuples in one executor call"""
+    if AI_EXECUTOR == "process":
+        return await run_blocking(ai_executor, ai_worker.call_batch, method, calls, span_name=f"ai.{method}_batch")
+    return await run_blocking(ai_executor, call_ai_batch, method, calls, span_name=f"ai.{method}_batch")
+
+# Concurrent complaint analyses can be grouped into batches of up to
+# AI_BATCH_MAX_SIZE, waiting at most AI_BATCH_MAX_WAIT_MS for a batch to fill.
+# A batch runs on one AI thread, so this only pays off when AIService has an
+# `analyze_batch` with a batched forward pass; the default of 1 sends every call
+# on its own, spread across the AI_WORKERS threads.
+AI_BATCH_MAX_SIZE = int(os.getenv("AI_BATCH_MAX_SIZE", "1"))
+AI_BATCH_MAX_WAIT = float(os.getenv("AI_BATCH_MAX_WAIT_MS", "5")) / 1000
+ai_batch_queue_wait = metrics.histogram(
+    "ai_batch_queue_wait_seconds", "Time an AI call waited for its batch to be dispatched", ("method",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+ai_batch_sizes = metrics.histogram(
+    "ai_batch_size", "Items per dispatched AI batch", ("method",), buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+ai_batchers = {
+    method: MicroBatcher(
+        lambda calls, method=method: ai_call_batch(method, calls),
+        AI_BATCH_MAX_SIZE, AI_BATCH_MAX_WAIT, method, ai_batch_queue_wait, ai_batch_sizes
+    )
+    for method in ('analyze',)
+}
+
+async def batched_ai_call(method: str, *args):
+    """ai_call for a single item, sent to the model as part of a batch"""
+    if AI_BATCH_MAX_SIZE <= 1:
+        return await ai_call(method, *args)
+    return await ai_batchers[method].submit(args)
+
+# Auth caches: verified tokens keyed by token hash, and user documents keyed by
+# user id. Entries never outlive the token's `exp`.
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))
+token_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+user_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
 
 # Dependency to get current user
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+    with span("auth"):
+        return await authenticate(credentials)
+
+async def authenticate(credentials: HTTPAuthorizationCredentials) -> Dict[str, Any]:
     try:
         token = credentials.credentials
-        decoded_token = await firebase_service.verify_token(token)
+        token_key = hashlib.sha256(token.encode()).hexdigest()
+        decoded_token = token_cache.get(token_key)
         if not decoded_token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials"
-            )
+            decoded_token = await firebase_service.verify_token(token)
+            if not decoded_token:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid authentication credentials"
+                )
+            token_cache.set(token_key, decoded_token, expires_at=decoded_token.get('exp'))
         
         user_id = decoded_token['uid']
-        user = await firebase_service.get_user(user_id)
+        user = user_cache.get(user_id)
         if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+            user = await firebase_service.get_user(user_id)
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found"
+                )
+            user_cache.set(user_id, user, expires_at=decoded_token.get('exp'))
         
         return user
     except Exception as e:
@@ -80,10 +671,268 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Invalid authentication credentials"
         )
 
+# Classifier results keyed by normalized text and model version; /ai/train moves
+# to a new version, so results from the previous model are never served
+classification_cache = ClassificationCache(
+    int(os.getenv("CLASSIFICATION_CACHE_SIZE", "10000")),
+    float(os.getenv("CLASSIFICATION_CACHE_TTL", "3600"))
+)
+
+# The live model version and the one before it, for rollback. Swaps are serialized.
+model_history = ModelHistory()
+model_lock = asyncio.Lock()
+training_job_id: Optional[str] = None
+training_data_in_use: Optional[str] = None
+
+def load_ai_model(model_path: Optional[str]):
+    """AIService for a model version; a version without a file is the one loaded at startup"""
+    if not model_path:
+        return create_ai_service()
+    return FusedAnalyzer(load_model(model_path), correction_model.get() if ONLINE_LEARNING else None)
+
+async def install_model(version: Dict[str, Any], instance: Any = None) -> Any:
+    """
+    Serve new AI calls from a model version and return the model it replaced.
+    Calls already running finish on the model they started with.
+    """
+    loop = asyncio.get_running_loop()
+    if AI_EXECUTOR == "process":
+        pool = ProcessPoolExecutor(AI_WORKERS, initializer=ai_worker.init_worker, initargs=(version['model_path'],))
+        try:
+            # Every new worker loads the model before the pool takes traffic
+            await asyncio.gather(*(loop.run_in_executor(pool, ai_worker.ready) for _ in range(AI_WORKERS)))
+        except Exception:
+            pool.shutdown(wait=False)
+            raise
+        old_pool, ai_executor.executor = ai_executor.executor, pool
+        old_pool.shutdown(wait=False)
+        return None
+    if instance is None:
+        instance = await loop.run_in_executor(None, load_ai_model, version['model_path'])
+    return ai_service.swap(instance)
+
+async def run_training(job_id: str, data_path: str, records: Optional[List[Dict[str, Any]]] = None):
+    """Train a model in the training process, then swap it in; the training data is deleted afterwards"""
+    global training_job_id, training_data_in_use
+    training_data_in_use = data_path
+    version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{job_id[:8]}"
+    model_path = os.path.join(MODEL_DIR, f"{version}.pkl")
+    try:
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        if records is not None:
+            await run_blocking(io_executor, write_ndjson, data_path, records)
+        jobs.update(job_id, status='running', version=version)
+        try:
+            result = await training_executor.run(train_model, data_path, model_path)
+        except asyncio.TimeoutError:
+            restart_training_pool()
+            raise
+        
+        jobs.update(job_id, status='activating')
+        async with model_lock:
+            replaced = await install_model({'version': version, 'model_path': model_path})
+            dropped = model_history.promote(
+                {'version': version, 'model_path': model_path, 'job_id': job_id, 'records': result['records']},
+                replaced
+            )
+            classification_cache.invalidate(version)
+        if dropped is not None and dropped.get('model_path'):
+            os.remove(dropped['model_path'])
+        jobs.update(job_id, status='completed', records=result['records'])
+    except Exception as e:
+        jobs.update(job_id, status='failed', error=str(e) or type(e).__name__)
+    finally:
+        # Only cleared once the training process has finished or been stopped
+        training_job_id = None
+        training_data_in_use = None
+        try:
+            await asyncio.shield(io_executor.run(remove_training_data, data_path))
+        except Exception as e:
+            print(f"Failed to remove training data {data_path}: {e}")
+
+def remove_training_data(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+def restart_training_pool():
+    """Stop a training run that overran TRAINING_TIMEOUT and give the next one a fresh process"""
+    pool, training_executor.executor = training_executor.executor, ProcessPoolExecutor(1)
+    # A running call cannot be cancelled, so its worker process is terminated.
+    # ProcessPoolExecutor.terminate_workers() exists from Python 3.14; before
+    # that the workers are only reachable through the private `_processes`
+    # (present in CPython 3.8 to 3.13).
+    if hasattr(pool, 'terminate_workers'):
+        pool.terminate_workers()
+        return
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False)
+
+def training_data_path(upload_id: str) -> str:
+    try:
+        uuid.UUID(upload_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid upload id"
+        )
+    return os.path.join(TRAINING_DATA_DIR, f"{upload_id}.ndjson")
+
+online_updates = 0
+
+async def apply_corrections(examples: List[Dict[str, Any]]):
+    """Feed a micro-batch of corrections to the live model"""
+    global online_updates
+    await run_blocking(ai_executor, ai_service.method('partial_fit'), examples, span_name="ai.partial_fit")
+    await run_blocking(io_executor, save_corrections)
+    online_updates += 1
+    # Cached analyses predate what the model just learned
+    classification_cache.invalidate(f"{model_history.current['version']}+{online_updates}")
+
+correction_feed = CorrectionFeed(
+    apply_corrections,
+    batch_size=int(os.getenv("ONLINE_LEARNING_BATCH_SIZE", "32")),
+    flush_interval=float(os.getenv("ONLINE_LEARNING_INTERVAL", "30"))
+)
+
+async def memoized_ai_call(method: str, *args):
+    """ai_call, reusing the result of an earlier call with the same normalized text"""
+    key = classification_cache.key(method, *args)
+    result = classification_cache.get(key)
+    if result is MISSING:
+        result = await batched_ai_call(method, *args)
+        classification_cache.set(key, result)
+    return result
+
+async def classify_complaint(title: str, description: str, category: Optional[str] = None, priority: Optional[str] = None) -> Dict[str, Any]:
+    """Categorize, prioritize and get AI suggestions for a complaint"""
+    # One fused call; AI is used for the category and priority only if not provided
+    return await memoized_ai_call('analyze', title, description, category, priority)
+
+async def classify_complaints(records: List[Dict[str, Any]]) -> List[Any]:
+    """Classify a batch of complaint records; a record that fails gets its exception in place of an analysis"""
+    # Records are classified a chunk at a time: enough calls to fill a batch or
+    # keep every AI thread busy, without flooding the AI executor
+    analyses: List[Any] = []
+    chunk = max(AI_BATCH_MAX_SIZE, AI_WORKERS)
+    for start in range(0, len(records), chunk):
+        analyses.extend(await asyncio.gather(*(
+            classify_complaint(
+                record.get('title', ''),
+                record.get('description', ''),
+                record.get('category'),
+                record.get('priority')
+            )
+            for record in records[start:start + chunk]
+        ), return_exceptions=True))
+    return analyses
+
+def batch_error(index: int, error: Exception) -> str:
+    """NDJSON line reporting that one record of a batch failed"""
+    detail = error.detail if isinstance(error, HTTPException) else str(error) or type(error).__name__
+    return json.dumps({"index": index, "status": "error", "detail": detail}) + "\n"
+
+def build_complaint_doc(complaint_data: ComplaintCreate, user_id: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a complaint document from request data and its AI analysis"""
+    return {
+        'user_id': user_id,
+        'title': complaint_data.title,
+        'description': complaint_data.description,
+        'category': analysis['category'],
+        'priority': analysis['priority'],
+        'ai_confidence': (analysis['category_confidence'] + analysis['priority_confidence']) / 2,
+        'ai_suggestions': list(analysis['suggestions']),
+        'tags': complaint_data.tags or [],
+        'attachments': complaint_data.attachments or []
+    }
+
+# Bulk import limits
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))
+BATCH_WRITE_SIZE = int(os.getenv("BATCH_WRITE_SIZE", "500"))
+
+def check_batch_size(records: List[Dict[str, Any]]):
+    if len(records) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch too large: {len(records)} records (max {MAX_BATCH_SIZE})"
+        )
+
+# Listing endpoints return pages of at most MAX_PAGE_SIZE complaints
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "500"))
+
+def page_size(limit: int) -> int:
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+def parse_cursor(cursor: Optional[str]) -> Optional[CursorKey]:
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+async def page_complaints(filters: Dict[str, Any], limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+    """Fetch one page of complaints, newest first, keyed on (created_at, id)"""
+    after = parse_cursor(cursor)
+    limit = page_size(limit)
+    complaints = await fetch_complaints(filters, limit + 1, after)
+    return complaint_page(complaints, limit)
+
+# Scrape-time gauges
+metrics.gauge("event_loop_lag_seconds", "Latest event-loop wake-up delay", lambda: loop_lag.lag)
+metrics.gauge(
+    "executor_pending_calls", "Calls queued or running on each executor",
+    lambda: {(("executor", e.name),): e.pending for e in (io_executor, ai_executor, training_executor)}
+)
+metrics.gauge("chat_buffer_messages", "Chat messages waiting to be written", lambda: chat_buffer.stats()["buffered_messages"])
+metrics.gauge(
+    "classification_cache_hit_ratio", "Share of classifier calls served from the cache",
+    lambda: {(("operation", operation),): rate for operation, rate in classification_cache.hit_rates().items()}
+)
+metrics.gauge("sse_connections", "Open /events streams on this worker", lambda: event_broker.connections)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Prometheus metrics, for a bearer token equal to METRICS_TOKEN or an admin's token"""
+    if not (METRICS_TOKEN and hmac.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode())):
+        current_user = await authenticate(credentials)
+        if current_user.get('role') != 'admin':
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin access required"
+            )
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the services in READY_REQUIRES are warm, 503 until then"""
+    services = service_status()
+    ready = all(services.get(name, {}).get('state') == 'ready' for name in READY_REQUIRES)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"ready": ready, "requires": READY_REQUIRES, "services": services}
+    )
+
 # Health check
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "event_loop": loop_lag.stats(),
+        "chat_buffer": chat_buffer.stats(),
+        "escalation": escalation_scheduler.stats(),
+        "notifications": notification_pipeline.stats(),
+        "events": event_broker.stats(),
+        "classification_cache": classification_cache.stats(),
+        "ai_batching": {method: batcher.stats() for method, batcher in ai_batchers.items()},
+        "models": model_history.stats(),
+        "online_learning": {"enabled": ONLINE_LEARNING, "updates": online_updates, **correction_feed.stats()}
+    }
 
 @app.get("/")
 async def root():
@@ -145,6 +994,7 @@ async def update_user_info(
             current_user['id'],
             update_data.dict(exclude_unset=True)
         )
+        user_cache.delete(current_user['id'])
         return updated_user
     except Exception as e:
         raise HTTPException(
@@ -159,64 +1009,95 @@ async def create_complaint(
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     try:
-        # Use AI to categorize and prioritize if not provided
-        if not complaint_data.category:
-            category, confidence = ai_service.categorize_complaint(
-                complaint_data.title, complaint_data.description
-            )
-        else:
-            category = complaint_data.category
-            confidence = 0.8
-        
-        if not complaint_data.priority:
-            priority, pri_confidence = ai_service.prioritize_complaint(
-                complaint_data.title, complaint_data.description, category
-            )
-        else:
-            priority = complaint_data.priority
-            pri_confidence = 0.8
-        
-        # Get AI suggestions
-        suggestions = ai_service.get_ai_suggestions({
-            'title': complaint_data.title,
-            'description': complaint_data.description,
-            'category': category,
-            'priority': priority
-        })
-        
-        # Create complaint
-        complaint_doc = {
-            'user_id': current_user['id'],
-            'title': complaint_data.title,
-            'description': complaint_data.description,
-            'category': category,
-            'priority': priority,
-            'ai_confidence': (confidence + pri_confidence) / 2,
-            'ai_suggestions': suggestions,
-            'tags': complaint_data.tags or [],
-            'attachments': complaint_data.attachments or []
-        }
+        analysis = await classify_complaint(
+            complaint_data.title, complaint_data.description,
+            complaint_data.category, complaint_data.priority
+        )
+        complaint_doc = build_complaint_doc(complaint_data, current_user['id'], analysis)
         
         complaint = await firebase_service.create_complaint(complaint_doc)
+        complaint_analytics.record(None, complaint)
+        schedule_escalation(complaint)
         
         return {
             "message": "Complaint created successfully",
             "complaint": complaint
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
-@app.get("/complaints", response_model=List[Dict[str, Any]])
+@app.post("/complaints/batch")
+async def create_complaints_batch(
+    records: List[Dict[str, Any]],
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Create many complaints at once, streaming one NDJSON result line per record"""
+    check_batch_size(records)
+    is_admin = current_user.get('role') == 'admin'
+    
+    async def results():
+        valid = []
+        for index, record in enumerate(records):
+            try:
+                # Admins importing a backlog may file complaints on behalf of other users
+                user_id = record.get('user_id') if is_admin and record.get('user_id') else current_user['id']
+                valid.append((index, ComplaintCreate(**record), user_id))
+            except Exception as e:
+                yield batch_error(index, e)
+        
+        # Each chunk is classified together and then written in bulk. Failures
+        # are reported per record, so one bad record (or a busy AI executor)
+        # never cuts the stream short.
+        for start in range(0, len(valid), BATCH_WRITE_SIZE):
+            chunk = valid[start:start + BATCH_WRITE_SIZE]
+            analyses = await classify_complaints([
+                {
+                    'title': complaint_data.title,
+                    'description': complaint_data.description,
+                    'category': complaint_data.category,
+                    'priority': complaint_data.priority
+                }
+                for _, complaint_data, _ in chunk
+            ])
+            indexes, docs = [], []
+            for (index, complaint_data, user_id), analysis in zip(chunk, analyses):
+                try:
+                    if isinstance(analysis, Exception):
+                        raise analysis
+                    docs.append(build_complaint_doc(complaint_data, user_id, analysis))
+                    indexes.append(index)
+                except Exception as e:
+                    yield batch_error(index, e)
+            created = await asyncio.gather(
+                *[firebase_service.create_complaint(doc) for doc in docs],
+                return_exceptions=True
+            )
+            for index, complaint in zip(indexes, created):
+                if isinstance(complaint, Exception):
+                    yield batch_error(index, complaint)
+                else:
+                    complaint_analytics.record(None, complaint)
+                    schedule_escalation(complaint)
+                    yield json.dumps({"index": index, "status": "created", "complaint": complaint}, default=str) + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.get("/complaints", response_model=Dict[str, Any])
 async def get_user_complaints(
     current_user: Dict[str, Any] = Depends(get_current_user),
-    limit: int = 50
+    limit: int = 50,
+    cursor: Optional[str] = None
 ):
+    """List the user's complaints newest first; pass `next_cursor` back as `cursor` for the next page"""
     try:
-        complaints = await firebase_service.get_user_complaints(current_user['id'], limit)
-        return complaints
+        return await page_complaints({'user_id': current_user['id']}, limit, cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -271,12 +1152,22 @@ async def update_complaint(
                 detail="Access denied"
             )
         
-        updated_complaint = await firebase_service.update_complaint(
-            complaint_id,
-            update_data.dict(exclude_unset=True)
-        )
+        changes = update_data.dict(exclude_unset=True)
+        updated_complaint = await firebase_service.update_complaint(complaint_id, changes)
+        complaint_analytics.record(complaint, {**complaint, **changes})
+        if ONLINE_LEARNING and current_user.get('role') == 'admin':
+            example = correction_example(complaint, changes)
+            if example:
+                correction_feed.add(example)
+        schedule_escalation({**complaint, **changes, 'id': complaint_id})
+        await publish_event(complaint.get('user_id'), 'complaint.updated', {
+            'complaint_id': complaint_id,
+            'changes': changes
+        })
         
         return updated_complaint
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -284,13 +1175,14 @@ async def update_complaint(
         )
 
 # Admin routes
-@app.get("/admin/complaints", response_model=List[Dict[str, Any]])
+@app.get("/admin/complaints", response_model=Dict[str, Any])
 async def get_all_complaints_admin(
     current_user: Dict[str, Any] = Depends(get_current_user),
     status_filter: Optional[str] = None,
     category_filter: Optional[str] = None,
     priority_filter: Optional[str] = None,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
     if current_user.get('role') != 'admin':
         raise HTTPException(
@@ -307,16 +1199,64 @@ async def get_all_complaints_admin(
         if priority_filter:
             filters['priority'] = priority_filter
         
-        complaints = await firebase_service.get_all_complaints(filters, limit)
-        return complaints
+        return await page_complaints(filters, limit, cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
+@app.get("/admin/complaints/export")
+async def export_complaints_admin(
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    export_format: str = Query("ndjson", alias="format"),
+    status_filter: Optional[str] = None,
+    category_filter: Optional[str] = None,
+    priority_filter: Optional[str] = None
+):
+    """Stream every matching complaint as NDJSON or CSV, one store page at a time"""
+    if current_user.get('role') != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    if export_format not in ("ndjson", "csv"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be 'ndjson' or 'csv'"
+        )
+    
+    filters = {}
+    if status_filter:
+        filters['status'] = status_filter
+    if category_filter:
+        filters['category'] = category_filter
+    if priority_filter:
+        filters['priority'] = priority_filter
+    
+    def fetch_page(after: Optional[CursorKey], limit: int):
+        return fetch_complaints(filters, limit, after)
+    
+    complaints = iter_complaints(fetch_page, EXPORT_PAGE_SIZE)
+    if export_format == "csv":
+        body, media_type = csv_export(complaints), "text/csv"
+    else:
+        body, media_type = ndjson_export(complaints), "application/x-ndjson"
+    filename = f"complaints-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @app.get("/admin/analytics", response_model=Dict[str, Any])
-async def get_analytics(current_user: Dict[str, Any] = Depends(get_current_user)):
+async def get_analytics(
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    refresh: bool = False
+):
+    """Serve the precomputed dashboard counters; `refresh=true` rebuilds them first"""
     if current_user.get('role') != 'admin':
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -324,58 +1264,87 @@ async def get_analytics(current_user: Dict[str, Any] = Depends(get_current_user)
         )
     
     try:
-        analytics = await firebase_service.get_complaint_analytics()
-        return analytics
+        if refresh or complaint_analytics.reconciled_at is None:
+            await reconcile_analytics()
+        return complaint_analytics.snapshot()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
+# Event stream
+@app.get("/events")
+async def stream_events(
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    types: Optional[str] = None,
+    all_users: bool = False
+):
+    """
+    Server-Sent Events for the current user's complaints and notifications.
+    
+    `types` is a comma-separated filter (complaint.updated, complaint.escalated,
+    notification). Admins may pass `all_users=true` to see every user's events.
+    Reconnecting with Last-Event-ID replays what was missed.
+    """
+    if all_users and current_user.get('role') != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    # Checked here so a full worker answers 503; the connection itself is only
+    # counted once the stream starts
+    try:
+        subscription = event_broker.subscribe(
+            None if all_users else current_user['id'],
+            last_event_id=request.headers.get("last-event-id"),
+            types=set(types.split(",")) if types else None
+        )
+    except TooManyConnections as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    
+    return StreamingResponse(
+        event_broker.stream(subscription, SSE_HEARTBEAT),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Chat routes
 @app.post("/chat/message", response_model=Dict[str, Any])
 async def send_chat_message(
     message_data: ChatMessageCreate,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
+    received_at = datetime.now()
     try:
         # Process message through chatbot
-        response = chatbot_service.process_message(
+        response = await run_blocking(
+            io_executor,
+            chatbot_service.method('process_message'),
             current_user['id'],
             message_data.message,
             message_data.session_id
         )
         
-        # Save user message to database
-        user_message_data = {
-            'session_id': response.session_id,
-            'user_id': current_user['id'],
-            'message': message_data.message,
-            'message_type': 'user',
-            'role': 'user',
-            'complaint_id': message_data.complaint_id
-        }
-        
-        await firebase_service.save_chat_message(user_message_data)
-        
-        # Save bot response to database
-        bot_message_data = {
-            'session_id': response.session_id,
-            'user_id': current_user['id'],
-            'message': response.message,
-            'message_type': 'bot',
-            'role': 'assistant',
-            'intent': response.intent,
-            'confidence': response.confidence,
-            'complaint_id': response.complaint_id
-        }
-        
-        await firebase_service.save_chat_message(bot_message_data)
+        # Save user message and bot response to database in the background
+        chat_buffer.add(
+            response.session_id,
+            chat_transcript(current_user['id'], message_data.message, response, message_data.complaint_id, received_at)
+        )
+        await record_chat_turn(current_user['id'], response)
         
         return {
             "message": "Message processed successfully",
             "response": response.dict()
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -399,11 +1368,8 @@ async def get_chat_history(
 @app.get("/chat/sessions", response_model=List[Dict[str, Any]])
 async def get_user_chat_sessions(current_user: Dict[str, Any] = Depends(get_current_user)):
     try:
-        # Get active sessions for the user
-        active_sessions = chatbot_service.get_active_sessions()
-        user_sessions = [s for s in active_sessions if s.user_id == current_user['id']]
-        
-        return [session.dict() for session in user_sessions]
+        # Get active sessions for the user from every worker
+        return await session_backend.get_user_sessions(current_user['id'])
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -412,33 +1378,174 @@ async def get_user_chat_sessions(current_user: Dict[str, Any] = Depends(get_curr
 
 # WebSocket for real-time chat
 @app.websocket("/ws/chat/{user_id}")
-async def websocket_chat(websocket: WebSocket, user_id: str):
-    await websocket.accept()
+async def websocket_chat(websocket: WebSocket, user_id: str, token: str = "", stream: bool = False):
+    """Chat for the user whose ID token is passed as `?token=`; other sockets of theirs get the replies too"""
+    # Browsers cannot set headers on a WebSocket, so the token comes in the query string
     try:
-        while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-            message_data = json.loads(data)
-            
-            # Process message through chatbot
-            response = chatbot_service.process_message(
+        current_user = await authenticate(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+    except HTTPException:
+        current_user = None
+    if current_user is None or current_user['id'] != user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    
+    async def handle(message_data: Dict[str, Any]) -> Dict[str, Any]:
+        received_at = datetime.now()
+        # Process message through chatbot
+        try:
+            response = await io_executor.run(
+                chatbot_service.method('process_message'),
                 user_id,
                 message_data['message'],
                 message_data.get('session_id')
             )
-            
-            # Send response back to client
-            await websocket.send_text(json.dumps(response.dict()))
-            
-    except WebSocketDisconnect:
-        print(f"WebSocket disconnected for user {user_id}")
+        except (ExecutorBusy, asyncio.TimeoutError):
+            return {"error": "Chat service is busy, please retry"}
+        
+        chat_buffer.add(
+            response.session_id,
+            chat_transcript(user_id, message_data['message'], response, message_data.get('complaint_id'), received_at)
+        )
+        await record_chat_turn(user_id, response, origin=connection_id)
+        return response.dict()
+    
+    connection_id = str(uuid.uuid4())
+    connection = ChatConnection(websocket, handle, stream=stream)
+    
+    # Replies produced for this user on other connections or workers
+    chat_connections.setdefault(user_id, {})[connection_id] = connection
+    try:
+        await connection.serve()
+    finally:
+        connections = chat_connections.get(user_id, {})
+        connections.pop(connection_id, None)
+        if not connections:
+            chat_connections.pop(user_id, None)
+    print(f"WebSocket disconnected for user {user_id}")
+
+TRAINING_UPLOAD_WRITE_SIZE = 1024 * 1024
+
+def open_training_upload(path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return open(path, 'wb')
+
+def discard_training_upload(f, path: str):
+    f.close()
+    os.remove(path)
+
+@app.post("/ai/training-data", status_code=status.HTTP_201_CREATED)
+async def upload_training_data(
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Store training records sent as NDJSON (one JSON object per line) for POST /ai/train?upload_id="""
+    if current_user.get('role') != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    # Uploads that no training job used are cleared out before another is stored
+    keep = [training_data_in_use] if training_data_in_use else []
+    await run_blocking(io_executor, remove_stale_files, TRAINING_DATA_DIR, TRAINING_UPLOAD_TTL, keep)
+    
+    upload_id = str(uuid.uuid4())
+    path = training_data_path(upload_id)
+    size = 0
+    lines = 0
+    last_byte = b"\n"
+    # Streamed to disk, so the upload never has to fit in memory; the training
+    # job parses the lines. File calls run on the I/O executor, a buffer at a time.
+    f = await run_blocking(io_executor, open_training_upload, path)
+    try:
+        buffered: List[bytes] = []
+        buffered_size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > MAX_TRAINING_UPLOAD_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Training data is larger than {MAX_TRAINING_UPLOAD_BYTES} bytes"
+                )
+            if chunk:
+                lines += chunk.count(b"\n")
+                last_byte = chunk[-1:]
+                buffered.append(chunk)
+                buffered_size += len(chunk)
+            if buffered_size >= TRAINING_UPLOAD_WRITE_SIZE:
+                await run_blocking(io_executor, f.write, b"".join(buffered))
+                buffered, buffered_size = [], 0
+        if buffered:
+            await run_blocking(io_executor, f.write, b"".join(buffered))
+        await run_blocking(io_executor, f.close)
+    except BaseException:
+        await asyncio.shield(io_executor.run(discard_training_upload, f, path))
+        raise
+    if last_byte != b"\n":
+        lines += 1
+    
+    return {"upload_id": upload_id, "bytes": size, "lines": lines}
 
 # AI model training endpoint
-@app.post("/ai/train")
+@app.post("/ai/train", status_code=status.HTTP_202_ACCEPTED)
 async def train_ai_models(
-    training_data: List[Dict[str, Any]],
+    training_data: Optional[List[Dict[str, Any]]] = Body(None),
+    upload_id: Optional[str] = None,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
+    """Start training on the posted records or an uploaded NDJSON file; poll GET /admin/jobs/{job_id}"""
+    global training_job_id
+    if current_user.get('role') != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    if training_job_id is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Training job {training_job_id} is still running"
+        )
+    
+    if upload_id:
+        data_path = training_data_path(upload_id)
+        if not os.path.exists(data_path):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Training data upload not found"
+            )
+        job = jobs.create('training', upload_id=upload_id)
+        task = asyncio.ensure_future(run_training(job['id'], data_path))
+    elif training_data:
+        job = jobs.create('training', records=len(training_data))
+        data_path = os.path.join(TRAINING_DATA_DIR, f"job-{job['id']}.ndjson")
+        os.makedirs(TRAINING_DATA_DIR, exist_ok=True)
+        task = asyncio.ensure_future(run_training(job['id'], data_path, training_data))
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Send training records in the body or an upload_id"
+        )
+    training_job_id = job['id']
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    
+    return {"message": "Training started", "job_id": job['id']}
+
+@app.get("/ai/models", response_model=Dict[str, Any])
+async def get_models(current_user: Dict[str, Any] = Depends(get_current_user)):
+    """The live model version and the previous one"""
+    if current_user.get('role') != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return {**model_history.stats(), "training_job_id": training_job_id}
+
+@app.post("/ai/models/rollback", response_model=Dict[str, Any])
+async def rollback_model(current_user: Dict[str, Any] = Depends(get_current_user)):
+    """Swap the previous model back in; rolling back twice returns to the newer model"""
     if current_user.get('role') != 'admin':
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -446,24 +1553,74 @@ async def train_ai_models(
         )
     
     try:
-        ai_service.train_models(training_data)
-        return {"message": "AI models trained successfully"}
+        async with model_lock:
+            target = model_history.previous
+            if target is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="No previous model to roll back to"
+                )
+            replaced = await install_model(target, model_history.instance(target['version']))
+            model_history.rollback(replaced)
+            classification_cache.invalidate(target['version'])
+        return {"message": f"Rolled back to model {target['version']}", **model_history.stats()}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
+@app.post("/ai/classify/batch")
+async def classify_batch(
+    records: List[Dict[str, Any]],
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Classify many complaints at once, streaming one NDJSON result line per record"""
+    check_batch_size(records)
+    
+    analyses = await classify_complaints(records)
+    
+    def results():
+        for index, analysis in enumerate(analyses):
+            if isinstance(analysis, Exception):
+                yield batch_error(index, analysis)
+            else:
+                yield json.dumps({"index": index, **analysis}, default=str) + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 # Notification routes
-@app.get("/notifications", response_model=List[Dict[str, Any]])
+@app.get("/notifications", response_model=Dict[str, Any])
 async def get_user_notifications(
+    request: Request,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    limit: int = 50
+    limit: int = 50,
+    since: Optional[str] = None
 ):
-    """Get notifications for the current user"""
+    """
+    Get notifications for the current user with their unread count.
+    
+    Without `since`, returns the newest notifications. With `since`, returns only
+    those created after that cursor, oldest first. Either way `cursor` is what to
+    send as `since` on the next poll. The ETag changes whenever the user's
+    notifications do, so a poll with a matching If-None-Match gets a bare 304.
+    """
     try:
-        notifications = await notification_service.get_user_notifications(current_user['id'], limit)
-        return notifications
+        after = parse_cursor(since)
+        headers, page = await run_blocking(
+            io_executor, notification_store.poll,
+            current_user['id'], page_size(limit), after, request.headers.get("if-none-match")
+        )
+        if page is None:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        response.headers.update(headers)
+        return page
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -477,7 +1634,7 @@ async def mark_notification_read(
 ):
     """Mark a notification as read"""
     try:
-        success = await notification_service.mark_notification_read(notification_id)
+        success = await run_blocking(io_executor, notification_store.mark_read, current_user['id'], notification_id)
         if success:
             return {"message": "Notification marked as read"}
         else:
@@ -485,6 +1642,25 @@ async def mark_notification_read(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Notification not found"
             )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@app.post("/notifications/read")
+async def mark_notifications_read(
+    notification_ids: Optional[List[str]] = Body(None),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Mark the listed notifications as read, or every unread one when no list is sent"""
+    try:
+        marked = await run_blocking(io_executor, notification_store.mark_all_read, current_user['id'], notification_ids)
+        return {"message": "Notifications marked as read", "marked_read": marked}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -514,28 +1690,51 @@ async def escalate_complaint(
                 detail="Complaint not found"
             )
         
-        # Update escalation level
-        current_level = complaint.get('escalation_level', 0)
-        await firebase_service.update_complaint(complaint_id, {
-            'escalation_level': current_level + 1,
-            'updated_at': datetime.now().isoformat()
-        })
-        
-        # Send escalation notification
-        await notification_service.send_complaint_notification(complaint_id, "escalated")
+        # Escalate now; the scheduler picks up the next deadline from the new level
+        job = jobs.create('notification', complaint_id=complaint_id, total=0, delivered=0, failed=0)
+        updated = await escalate({**complaint, 'id': complaint_id}, job['id'])
+        schedule_escalation(updated)
         
-        return {"message": "Complaint escalated successfully"}
+        return {"message": "Complaint escalated successfully", "job_id": job['id']}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
-@app.post("/admin/auto-escalate")
+async def run_auto_escalation(job_id: str, rescan: bool):
+    jobs.update(job_id, status='running')
+    try:
+        # A worker that is not escalating keeps no schedule, so it reads the store
+        # for this run and drops the schedule again afterwards
+        scheduling = escalation_scheduler.running
+        if rescan or not scheduling:
+            await load_escalation_schedule()
+        try:
+            escalated_complaints = await escalation_scheduler.run_due()
+        finally:
+            if not scheduling and not escalation_scheduler.running:
+                escalation_scheduler.clear()
+        jobs.update(
+            job_id,
+            status='completed',
+            escalated_count=len(escalated_complaints),
+            escalated_complaints=escalated_complaints
+        )
+    except Exception as e:
+        jobs.update(job_id, status='failed', error=str(e))
+
+# Keeps background job tasks referenced until they finish
+background_tasks = set()
+
+@app.post("/admin/auto-escalate", status_code=status.HTTP_202_ACCEPTED)
 async def auto_escalate_complaints(
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    rescan: bool = False
 ):
-    """Automatically escalate complaints that meet escalation criteria"""
+    """Start escalating every complaint that is past its deadline; `rescan=true` first rebuilds the schedule from the store"""
     try:
         # Check if user is admin
         if current_user.get('role') != 'admin':
@@ -544,26 +1743,50 @@ async def auto_escalate_complaints(
                 detail="Admin access required"
             )
         
-        escalated_complaints = await notification_service.auto_escalate_complaints()
+        job = jobs.create('auto-escalation', rescan=rescan)
+        task = asyncio.ensure_future(run_auto_escalation(job['id'], rescan))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
         
         return {
-            "message": f"Auto-escalation completed",
-            "escalated_count": len(escalated_complaints),
-            "escalated_complaints": escalated_complaints
+            "message": "Auto-escalation started",
+            "job_id": job['id']
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
-@app.post("/complaints/{complaint_id}/notify")
+@app.get("/admin/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_job(
+    job_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Status of a background job started by an admin endpoint"""
+    if current_user.get('role') != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+@app.post("/complaints/{complaint_id}/notify", status_code=status.HTTP_202_ACCEPTED)
 async def send_complaint_notification(
     complaint_id: str,
     notification_type: str,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
-    """Send a notification for a specific complaint"""
+    """Queue a notification for a specific complaint"""
     try:
         # Check if user is admin
         if current_user.get('role') != 'admin':
@@ -572,15 +1795,19 @@ async def send_complaint_notification(
                 detail="Admin access required"
             )
         
-        success = await notification_service.send_complaint_notification(complaint_id, notification_type)
-        
-        if success:
-            return {"message": "Notification sent successfully"}
-        else:
+        complaint = await firebase_service.get_complaint(complaint_id)
+        if not complaint:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Complaint not found"
             )
+        
+        job = jobs.create('notification', complaint_id=complaint_id, total=0, delivered=0, failed=0)
+        queue_notifications([notification_event({**complaint, 'id': complaint_id}, notification_type)], job['id'])
+        
+        return {"message": "Notification queued", "job_id": job['id']}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
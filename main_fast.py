@@ -1,7 +1,7 @@
-from fastapi import FastAPI, HTTPException, Depends, status, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Depends, status, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import os
 from datetime import datetime
 import uvicorn
@@ -10,6 +10,12 @@ from typing import List, Dict, Any, Optional
 import uuid
 from pydantic import BaseModel
 
+from services.chat_stream import ChatConnection
+from services.classification_cache import MISSING, ClassificationCache
+from services.complaint_store import ComplaintStore
+from services.keyword_rules import KeywordRules
+from services.pagination import CursorKey, complaint_page, decode_cursor
+
 # Pydantic models for request/response
 class UserCreate(BaseModel):
     email: str
@@ -74,33 +80,30 @@ security = HTTPBearer(auto_error=False)
 
 # Demo data storage
 demo_users = {}
-demo_complaints = {}
+demo_complaints = ComplaintStore()
 demo_chat_sessions = {}
 
-# Simple AI analysis function
-def analyze_complaint_description(description: str) -> Dict[str, Any]:
+# Keyword tables, in precedence order; compiled once at import
+complaint_keyword_rules = KeywordRules({
+    "category": [
+        ("billing", 0.8, ["payment", "billing", "charge", "invoice", "money"]),
+        ("account", 0.8, ["login", "password", "authentication", "access"]),
+        ("technical", 0.8, ["error", "bug", "crash", "freeze", "not working"]),
+        ("service", 0.8, ["service", "outage", "down", "unavailable"]),
+    ],
+    "priority": [
+        ("urgent", 0.8, ["urgent", "emergency", "critical", "immediate"]),
+        ("high", 0.8, ["cannot", "unable", "broken", "down", "error"]),
+        ("low", 0.8, ["suggestion", "improvement", "enhancement"]),
+    ],
+})
+
+def keyword_analysis(description: str) -> Dict[str, Any]:
     """Simple keyword-based analysis"""
-    description_lower = description.lower()
-    
-    # Category classification
-    category = "general"
-    if any(word in description_lower for word in ["payment", "billing", "charge", "invoice", "money"]):
-        category = "billing"
-    elif any(word in description_lower for word in ["login", "password", "authentication", "access"]):
-        category = "account"
-    elif any(word in description_lower for word in ["error", "bug", "crash", "freeze", "not working"]):
-        category = "technical"
-    elif any(word in description_lower for word in ["service", "outage", "down", "unavailable"]):
-        category = "service"
+    matches = complaint_keyword_rules.match(description.lower())
     
-    # Priority determination
-    priority = "medium"
-    if any(word in description_lower for word in ["urgent", "emergency", "critical", "immediate"]):
-        priority = "urgent"
-    elif any(word in description_lower for word in ["cannot", "unable", "broken", "down", "error"]):
-        priority = "high"
-    elif any(word in description_lower for word in ["suggestion", "improvement", "enhancement"]):
-        priority = "low"
+    category = matches["category"][0] if matches["category"] else "general"
+    priority = matches["priority"][0] if matches["priority"] else "medium"
     
     return {
         "category": category,
@@ -114,6 +117,80 @@ def analyze_complaint_description(description: str) -> Dict[str, Any]:
         ]
     }
 
+# Analyses are memoized by lower-cased description, so resubmitted complaints and
+# repeated chat messages skip the keyword scan
+analysis_cache = ClassificationCache(
+    int(os.getenv("CLASSIFICATION_CACHE_SIZE", "10000")),
+    float(os.getenv("CLASSIFICATION_CACHE_TTL", "3600"))
+)
+
+def analyze_complaint_description(description: str) -> Dict[str, Any]:
+    """Keyword-based analysis, served from the cache when the same text was analyzed recently"""
+    # Matching is case-insensitive; whitespace only counts with multi-word keywords
+    key = analysis_cache.key(
+        "analyze", description.lower(), normalize=complaint_keyword_rules.whitespace_insensitive
+    )
+    analysis = analysis_cache.get(key)
+    if analysis is MISSING:
+        analysis = keyword_analysis(description)
+        analysis_cache.set(key, analysis)
+    return analysis
+
+def analyze_complaint_descriptions(descriptions: List[str]) -> List[Dict[str, Any]]:
+    """Analyze a batch of complaint descriptions in one call"""
+    return [analyze_complaint_description(description) for description in descriptions]
+
+def build_complaint(complaint_data: ComplaintCreate, user_id: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a complaint record from request data and its AI analysis"""
+    now = datetime.now().isoformat()
+    return {
+        'id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'title': complaint_data.title,
+        'description': complaint_data.description,
+        'category': complaint_data.category or analysis["category"],
+        'priority': complaint_data.priority or analysis["priority"],
+        'status': 'registered',
+        'created_at': now,
+        'updated_at': now,
+        'tags': complaint_data.tags or [],
+        'attachments': complaint_data.attachments or [],
+        'ai_analysis': {
+            'category_confidence': analysis['category_confidence'],
+            'priority_confidence': analysis['priority_confidence'],
+            'suggestions': list(analysis['suggestions']),
+            'analyzed_at': now
+        }
+    }
+
+# Bulk import limits
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))
+BATCH_WRITE_SIZE = int(os.getenv("BATCH_WRITE_SIZE", "500"))
+
+def check_batch_size(records: List[Dict[str, Any]]):
+    if len(records) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch too large: {len(records)} records (max {MAX_BATCH_SIZE})"
+        )
+
+# Listing endpoints return pages of at most MAX_PAGE_SIZE complaints
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+
+def page_size(limit: int) -> int:
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+def parse_cursor(cursor: Optional[str]) -> Optional[CursorKey]:
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 # Dependency to get current user
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
     if not credentials:
@@ -140,7 +217,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 # Health check
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {"status": "healthy", "timestamp": datetime.now().isoformat(), "analysis_cache": analysis_cache.stats()}
 
 @app.get("/")
 async def root():
@@ -206,31 +283,9 @@ async def create_complaint(
         # Analyze the complaint description
         analysis = analyze_complaint_description(complaint_data.description)
         
-        category = complaint_data.category or analysis["category"]
-        priority = complaint_data.priority or analysis["priority"]
+        complaint = build_complaint(complaint_data, current_user['id'], analysis)
         
-        complaint_id = str(uuid.uuid4())
-        complaint = {
-            'id': complaint_id,
-            'user_id': current_user['id'],
-            'title': complaint_data.title,
-            'description': complaint_data.description,
-            'category': category,
-            'priority': priority,
-            'status': 'registered',
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat(),
-            'tags': complaint_data.tags or [],
-            'attachments': complaint_data.attachments or [],
-            'ai_analysis': {
-                'category_confidence': analysis['category_confidence'],
-                'priority_confidence': analysis['priority_confidence'],
-                'suggestions': analysis['suggestions'],
-                'analyzed_at': datetime.now().isoformat()
-            }
-        }
-        
-        demo_complaints[complaint_id] = complaint
+        demo_complaints.add(complaint)
         
         return {
             "message": "Complaint created successfully with AI analysis",
@@ -243,17 +298,47 @@ async def create_complaint(
             detail=str(e)
         )
 
-@app.get("/complaints", response_model=List[Dict[str, Any]])
+@app.post("/complaints/batch")
+async def create_complaints_batch(
+    records: List[Dict[str, Any]],
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Create many complaints at once, streaming one NDJSON result line per record"""
+    check_batch_size(records)
+    
+    def results():
+        valid = []
+        for index, record in enumerate(records):
+            try:
+                valid.append((index, ComplaintCreate(**record)))
+            except Exception as e:
+                yield json.dumps({"index": index, "status": "error", "detail": str(e)}) + "\n"
+        
+        # Classify everything in one call, then write in bulk chunks
+        analyses = analyze_complaint_descriptions([data.description for _, data in valid])
+        for start in range(0, len(valid), BATCH_WRITE_SIZE):
+            chunk = [
+                (index, build_complaint(data, current_user['id'], analysis))
+                for (index, data), analysis in zip(valid[start:start + BATCH_WRITE_SIZE], analyses[start:start + BATCH_WRITE_SIZE])
+            ]
+            demo_complaints.add_many(complaint for _, complaint in chunk)
+            for index, complaint in chunk:
+                yield json.dumps({"index": index, "status": "created", "complaint": complaint}) + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.get("/complaints", response_model=Dict[str, Any])
 async def get_user_complaints(
     current_user: Dict[str, Any] = Depends(get_current_user),
-    limit: int = 50
+    limit: int = 50,
+    cursor: Optional[str] = None
 ):
+    """List the user's complaints newest first; pass `next_cursor` back as `cursor` for the next page"""
+    after = parse_cursor(cursor)
+    limit = page_size(limit)
     try:
-        user_complaints = [
-            complaint for complaint in demo_complaints.values()
-            if complaint['user_id'] == current_user['id']
-        ]
-        return user_complaints[:limit]
+        complaints = demo_complaints.query({'user_id': current_user['id']}, limit + 1, descending=True, after=after)
+        return complaint_page(complaints, limit)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -359,40 +444,50 @@ async def send_chat_message(
             detail=str(e)
         )
 
+# AI routes
+@app.post("/ai/classify/batch")
+async def classify_batch(
+    records: List[Dict[str, Any]],
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Classify many descriptions at once, streaming one NDJSON result line per record"""
+    check_batch_size(records)
+    analyses = analyze_complaint_descriptions([record.get('description', '') for record in records])
+    
+    def results():
+        for index, analysis in enumerate(analyses):
+            yield json.dumps({"index": index, **analysis}) + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 # WebSocket for real-time chat
+def build_websocket_reply(message_data: Dict[str, Any]) -> Dict[str, Any]:
+    user_message = message_data['message'].lower()
+    response_message = ""
+    
+    if "complaint" in user_message or "issue" in user_message:
+        response_message = "I can help you log a complaint. Please provide a brief title for your issue, and I'll guide you through the process."
+    elif "status" in user_message or "check" in user_message:
+        response_message = "I can help you check the status of your complaints. Do you have a specific complaint ID, or would you like me to show your recent complaints?"
+    elif "help" in user_message:
+        response_message = "I'm here to help! You can:\n• Log new complaints\n• Check complaint status\n• Get information about our services\n• Ask general questions"
+    elif "hello" in user_message or "hi" in user_message:
+        response_message = "Hello! How can I assist you today?"
+    else:
+        response_message = "I understand you're asking about that. Let me help you with your complaint management needs."
+    
+    return {
+        'session_id': message_data.get('session_id', str(uuid.uuid4())),
+        'message': response_message,
+        'intent': 'general',
+        'confidence': 0.8
+    }
+
 @app.websocket("/ws/chat/{user_id}")
-async def websocket_chat(websocket: WebSocket, user_id: str):
+async def websocket_chat(websocket: WebSocket, user_id: str, stream: bool = False):
     await websocket.accept()
-    try:
-        while True:
-            data = await websocket.receive_text()
-            message_data = json.loads(data)
-            
-            user_message = message_data['message'].lower()
-            response_message = ""
-            
-            if "complaint" in user_message or "issue" in user_message:
-                response_message = "I can help you log a complaint. Please provide a brief title for your issue, and I'll guide you through the process."
-            elif "status" in user_message or "check" in user_message:
-                response_message = "I can help you check the status of your complaints. Do you have a specific complaint ID, or would you like me to show your recent complaints?"
-            elif "help" in user_message:
-                response_message = "I'm here to help! You can:\n• Log new complaints\n• Check complaint status\n• Get information about our services\n• Ask general questions"
-            elif "hello" in user_message or "hi" in user_message:
-                response_message = "Hello! How can I assist you today?"
-            else:
-                response_message = "I understand you're asking about that. Let me help you with your complaint management needs."
-            
-            response = {
-                'session_id': message_data.get('session_id', str(uuid.uuid4())),
-                'message': response_message,
-                'intent': 'general',
-                'confidence': 0.8
-            }
-            
-            await websocket.send_text(json.dumps(response))
-            
-    except WebSocketDisconnect:
-        print(f"WebSocket disconnected for user {user_id}")
+    await ChatConnection(websocket, build_websocket_reply, stream=stream).serve()
+    print(f"WebSocket disconnected for user {user_id}")
 
 if __name__ == "__main__":
     print("🚀 Starting Complaint Management System Backend (Fast Mode)")
@@ -0,0 +1,40 @@
+"""
+Process-pool entry points for AIService calls
+
+Each worker process loads its own AIService in `init_worker`, so only the
+method name and its (picklable) arguments cross the process boundary. The
+service is wrapped in FusedAnalyzer, so `analyze` is always available.
+"""
+
+from typing import Any, List, Optional, Sequence
+
+from services.micro_batcher import run_batch
+
+_ai_service = None
+
+
+def init_worker(model_path: Optional[str] = None):
+    """Load the worker's AIService, from a trained model file if one is given"""
+    global _ai_service
+    from services.fused_analysis import FusedAnalyzer
+    if model_path:
+        from services.model_training import load_model
+        _ai_service = FusedAnalyzer(load_model(model_path))
+    else:
+        from services.ai_service import AIService
+        _ai_service = FusedAnalyzer(AIService())
+
+
+def call(method: str, *args: Any) -> Any:
+    """Call an AIService method on this worker's instance"""
+    return getattr(_ai_service, method)(*args)
+
+
+def call_batch(method: str, calls: Sequence[Sequence[Any]]) -> List[Any]:
+    """Call an AIService method for a batch of argument tuples on this worker's instance"""
+    return run_batch(_ai_service, method, calls)
+
+
+def ready() -> bool:
+    """Whether this worker has loaded its models; used to warm the pool at startup"""
+    return _ai_service is not None
@@ -0,0 +1,145 @@
+"""
+Incrementally maintained complaint analytics
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+DIMENSIONS = ('status', 'category', 'priority', 'escalation_level')
+
+# A complaint reduced to what the counters need: its value for each dimension,
+# then its creation day
+Counted = Tuple[Any, ...]
+
+
+def _day(value: Any) -> Optional[str]:
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, str) and len(value) >= 10:
+        return value[:10]
+    return None
+
+
+def _value(value: Any) -> Any:
+    # Enum members are counted under their plain value
+    return getattr(value, 'value', value)
+
+
+def counted(complaint: Dict[str, Any]) -> Counted:
+    return tuple(
+        _value(complaint.get(dimension, 0 if dimension == 'escalation_level' else None)) for dimension in DIMENSIONS
+    ) + (_day(complaint.get('created_at')),)
+
+
+class AnalyticsScan:
+    """
+    Complaints read for a reconcile, folded page by page into their counted
+    values by id, so a scan of the whole collection never holds the documents
+    """
+
+    def __init__(self):
+        self.by_id: Dict[Any, Counted] = {}
+        self.unidentified: List[Counted] = []
+
+    def add(self, complaints: Iterable[Dict[str, Any]]):
+        for complaint in complaints:
+            if complaint.get('id') is None:
+                self.unidentified.append(counted(complaint))
+            else:
+                self.by_id[complaint['id']] = counted(complaint)
+
+
+class ComplaintAnalyticsAggregator:
+    """
+    Running complaint counters by status, category, priority, escalation level and day.
+
+    Call `record(old, new)` whenever a complaint is created or changed; reading
+    the counters never touches the store. `reconcile` rebuilds everything from a
+    full scan, given as an AnalyticsScan, to correct drift, e.g. from writes
+    made by other workers.
+
+    A scan takes a while, and complaints recorded meanwhile may be missing from
+    it or read in their old state. Call `begin_reconcile` before the scan: from
+    then on each recorded complaint's latest state is journaled by id and laid
+    over the scan results, so those changes are not lost.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Counter] = {dimension: Counter() for dimension in DIMENSIONS}
+        self._by_day: Counter = Counter()
+        self.total = 0
+        self.updated_at: Optional[str] = None
+        self.reconciled_at: Optional[str] = None
+        # Latest counted values of each complaint recorded since a scan began (None once deleted)
+        self._journal: Optional[Dict[Any, Optional[Counted]]] = None
+        self._scans = 0
+
+    def _apply(self, values: Counted, delta: int):
+        self.total += delta
+        for dimension, value in zip(DIMENSIONS, values):
+            self._counters[dimension][value] += delta
+        day = values[-1]
+        if day:
+            self._by_day[day] += delta
+
+    def record(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """Account for a complaint going from `old` to `new` (None for create or delete)"""
+        if old is not None:
+            self._apply(counted(old), -1)
+        if new is not None:
+            self._apply(counted(new), 1)
+        complaint_id = (new or old or {}).get('id')
+        if self._journal is not None and complaint_id is not None:
+            self._journal[complaint_id] = counted(new) if new is not None else None
+        self.updated_at = datetime.now().isoformat()
+
+    def begin_reconcile(self):
+        """Start journaling recorded changes for a scan that is about to be passed to `reconcile`"""
+        if self._journal is None:
+            self._journal = {}
+        self._scans += 1
+
+    def end_reconcile(self):
+        """Stop journaling for a scan that will not be reconciled, e.g. because it failed"""
+        self._scans = max(self._scans - 1, 0)
+        if not self._scans:
+            self._journal = None
+
+    def reconcile(self, scan: Union[AnalyticsScan, Iterable[Dict[str, Any]]]):
+        """
+        Rebuild every counter from a full scan (or list) of complaints, overlaid
+        with the changes recorded since `begin_reconcile`
+        """
+        if not isinstance(scan, AnalyticsScan):
+            complaints, scan = scan, AnalyticsScan()
+            scan.add(complaints)
+        latest: Dict[Any, Optional[Counted]] = scan.by_id
+        if self._journal is not None:
+            latest.update(self._journal)
+            self.end_reconcile()
+
+        self._counters = {dimension: Counter() for dimension in DIMENSIONS}
+        self._by_day = Counter()
+        self.total = 0
+        for values in scan.unidentified:
+            self._apply(values, 1)
+        for values in latest.values():
+            if values is not None:
+                self._apply(values, 1)
+        self.reconciled_at = self.updated_at = datetime.now().isoformat()
+
+    def snapshot(self) -> Dict[str, Any]:
+        def counts(counter: Counter) -> Dict[str, int]:
+            return {str(key): count for key, count in counter.items() if count and key is not None}
+
+        return {
+            'total_complaints': self.total,
+            'by_status': counts(self._counters['status']),
+            'by_category': counts(self._counters['category']),
+            'by_priority': counts(self._counters['priority']),
+            'by_escalation_level': counts(self._counters['escalation_level']),
+            'by_day': dict(sorted(counts(self._by_day).items())),
+            'updated_at': self.updated_at,
+            'reconciled_at': self.reconciled_at
+        }
@@ -0,0 +1,138 @@
+"""
+Write-behind chat transcript buffer
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# (enqueued_at, message, attempts)
+BufferedMessage = Tuple[float, Dict[str, Any], int]
+
+
+class ChatTranscriptBuffer:
+    """
+    Buffers chat messages per session and writes them to the store in bulk.
+
+    A flush happens every `flush_interval` seconds, or sooner once `max_batch`
+    messages are waiting. Everything buffered goes to `save_batch` in batches
+    of up to `write_batch_size` messages, one store write each, and each
+    session's messages are written in the order they were added. A failed
+    batch is retried on the next flush, ahead of newer messages, up to
+    `max_attempts` times.
+    """
+
+    def __init__(
+        self,
+        save_batch: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        max_batch: int = 200,
+        flush_interval: float = 1.0,
+        max_attempts: int = 3,
+        write_batch_size: int = 500
+    ):
+        self._save_batch = save_batch
+        self.max_batch = max_batch
+        self.write_batch_size = write_batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+
+        self._buffers: Dict[str, List[BufferedMessage]] = {}
+        self._size = 0
+        self._flush_lock = asyncio.Lock()
+        self._flush_needed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.flushed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.last_flush_lag = 0.0
+        self.last_flush_seconds = 0.0
+
+    def add(self, session_id: str, messages: List[Dict[str, Any]]):
+        """Buffer messages for a session; returns without waiting for the store"""
+        now = time.monotonic()
+        self._buffers.setdefault(session_id, []).extend((now, message, 0) for message in messages)
+        self._size += len(messages)
+        if self._size >= self.max_batch:
+            self._flush_needed.set()
+
+    def start(self):
+        """Start the periodic flush task"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_needed.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_needed.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Chat transcript flush failed: {e}")
+
+    async def flush(self):
+        """Write everything buffered so far"""
+        async with self._flush_lock:
+            if not self._buffers:
+                return
+            buffers, self._buffers, self._size = self._buffers, {}, 0
+
+            started = time.monotonic()
+            self.last_flush_lag = started - min(entries[0][0] for entries in buffers.values())
+            pending = [(session_id, entry) for session_id, entries in buffers.items() for entry in entries]
+            for start in range(0, len(pending), self.write_batch_size):
+                batch = pending[start:start + self.write_batch_size]
+                try:
+                    await self._save_batch([message for _, (_, message, _) in batch])
+                    self.flushed += len(batch)
+                except Exception as e:
+                    self.failed += len(batch)
+                    print(f"Chat transcript batch of {len(batch)} messages failed: {e}")
+                    # Later batches wait too, so no session's messages are written out of order
+                    self._requeue(pending[start:], failed=len(batch))
+                    break
+            self.last_flush_seconds = time.monotonic() - started
+
+    def _requeue(self, pending: List[Tuple[str, BufferedMessage]], failed: int):
+        """Put messages back in front of anything buffered since, counting an attempt for the first `failed`"""
+        retry: Dict[str, List[BufferedMessage]] = {}
+        for position, (session_id, (enqueued_at, message, attempts)) in enumerate(pending):
+            if position < failed:
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    self.dropped += 1
+                    print(f"Dropping chat message for session {session_id} after {attempts} attempts")
+                    continue
+            retry.setdefault(session_id, []).append((enqueued_at, message, attempts))
+        for session_id, entries in retry.items():
+            self._buffers[session_id] = entries + self._buffers.get(session_id, [])
+            self._size += len(entries)
+
+    async def close(self):
+        """Stop the flush task and drain the buffer"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Each pass writes or counts an attempt against at least one batch, so this terminates
+        while self._buffers:
+            await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        oldest = min((entries[0][0] for entries in self._buffers.values()), default=None)
+        return {
+            "buffered_messages": self._size,
+            "buffered_sessions": len(self._buffers),
+            "flush_lag_seconds": time.monotonic() - oldest if oldest is not None else 0.0,
+            "last_flush_lag_seconds": self.last_flush_lag,
+            "last_flush_seconds": self.last_flush_seconds,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "dropped": self.dropped
+        }
@@ -0,0 +1,45 @@
+"""
+Batched chat message writes to Firestore
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+from firebase_admin import firestore
+
+# Firestore allows 500 writes per batch
+MAX_BATCH_WRITES = 500
+
+
+class ChatMessageStore:
+    """
+    Writes chat messages to `chat_messages` with one batched commit per
+    MAX_BATCH_WRITES messages, instead of one request per message. Messages
+    carry their own `timestamp`, set when the chat turn happened, which
+    FirebaseService.get_chat_history orders a session's messages by.
+
+    All methods are blocking; run them on an executor.
+    """
+
+    def __init__(self, db=None, collection: str = 'chat_messages', client: Optional[Callable[[], Any]] = None):
+        self._db = db
+        self._client = client or firestore.client
+        self.collection = collection
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = self._client()
+        return self._db
+
+    def save_batch(self, messages: List[Dict[str, Any]]) -> List[str]:
+        """Write messages in order; returns their document ids"""
+        collection = self.db.collection(self.collection)
+        ids = []
+        for start in range(0, len(messages), MAX_BATCH_WRITES):
+            batch = self.db.batch()
+            for message in messages[start:start + MAX_BATCH_WRITES]:
+                reference = collection.document()
+                batch.set(reference, message)
+                ids.append(reference.id)
+            batch.commit()
+        return ids
@@ -0,0 +1,123 @@
+"""
+Per-connection WebSocket chat worker with streaming replies
+"""
+
+import asyncio
+import inspect
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, Iterator, Union
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+ChatHandler = Callable[[Dict[str, Any]], Union[Dict[str, Any], Awaitable[Dict[str, Any]]]]
+
+
+def split_reply(text: str, words_per_chunk: int = 4) -> Iterator[str]:
+    """Split a reply into chunks of a few words; the chunks join back to the original text"""
+    pieces = re.findall(r'\S+\s*|\s+', text)
+    for start in range(0, len(pieces), words_per_chunk):
+        yield ''.join(pieces[start:start + words_per_chunk])
+
+
+class ChatConnection:
+    """
+    Serves one chat WebSocket with separate reader, worker and sender tasks.
+
+    Incoming messages and outgoing frames go through bounded queues. A slow
+    client fills the outgoing queue, which pauses the worker, which fills the
+    incoming queue, which stops reads from the socket; memory per connection
+    stays bounded. A client that does not accept a frame within `send_timeout`
+    is disconnected.
+
+    In streaming mode (`?stream=true` on the connection, or `"stream": true` on a
+    message) a reply is sent as `chunk` frames followed by a `done` frame with
+    the full response; otherwise the response is sent as one frame.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        handle: ChatHandler,
+        stream: bool = False,
+        inbound_size: int = 8,
+        outbound_size: int = 32,
+        send_timeout: float = 10.0
+    ):
+        self.websocket = websocket
+        self.handle = handle
+        self.stream = stream
+        self.send_timeout = send_timeout
+        self._inbound: "asyncio.Queue[str]" = asyncio.Queue(inbound_size)
+        self._outbound: "asyncio.Queue[str]" = asyncio.Queue(outbound_size)
+        self._closed = False
+
+    async def serve(self):
+        """Run until the client disconnects or stops keeping up"""
+        worker = asyncio.ensure_future(self._work())
+        sender = asyncio.ensure_future(self._send())
+        try:
+            while not self._closed:
+                data = await self.websocket.receive_text()
+                await self._inbound.put(data)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            worker.cancel()
+            sender.cancel()
+            await asyncio.gather(worker, sender, return_exceptions=True)
+
+    async def emit(self, frame: str):
+        """Queue a frame for this client"""
+        # Once the sender has given up, frames are discarded so nothing stays blocked
+        if not self._closed:
+            await self._outbound.put(frame)
+
+    def offer(self, frame: str) -> bool:
+        """Queue a frame without waiting; a client too far behind misses it"""
+        if self._closed or self._outbound.full():
+            return False
+        self._outbound.put_nowait(frame)
+        return True
+
+    async def _work(self):
+        while True:
+            data = await self._inbound.get()
+            try:
+                message_data = json.loads(data)
+                response = self.handle(message_data)
+                if inspect.isawaitable(response):
+                    response = await response
+            except Exception as e:
+                await self.emit(json.dumps({"error": str(e)}))
+                continue
+
+            if message_data.get('stream', self.stream) and isinstance(response.get('message'), str):
+                for delta in split_reply(response['message']):
+                    await self.emit(json.dumps({
+                        'type': 'chunk',
+                        'session_id': response.get('session_id'),
+                        'delta': delta
+                    }))
+                await self.emit(json.dumps({'type': 'done', **response}, default=str))
+            else:
+                await self.emit(json.dumps(response, default=str))
+
+    async def _send(self):
+        try:
+            while True:
+                frame = await self._outbound.get()
+                await asyncio.wait_for(self.websocket.send_text(frame), self.send_timeout)
+        except asyncio.TimeoutError:
+            # 1013: try again later
+            try:
+                await self.websocket.close(code=1013)
+            except Exception:
+                pass
+        except Exception:
+            pass
+        finally:
+            self._closed = True
+            # Free the queue so a worker blocked on a full queue can finish
+            while not self._outbound.empty():
+                self._outbound.get_nowait()
@@ -0,0 +1,84 @@
+"""
+Memoized complaint classification keyed by normalized content
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, Hashable, Tuple
+
+from services.ttl_cache import TTLCache
+
+MISSING = object()
+
+_whitespace = re.compile(r'\s+')
+
+
+def normalize_text(text: Any) -> str:
+    """Case- and whitespace-insensitive form of a text, so trivial resubmissions match"""
+    return _whitespace.sub(' ', str(text or '')).strip().lower()
+
+
+def content_hash(*parts: Any, normalize: bool = True) -> str:
+    texts = (normalize_text(part) if normalize else str(part or '') for part in parts)
+    return hashlib.sha256('\x1f'.join(texts).encode()).hexdigest()
+
+
+class ClassificationCache:
+    """
+    LRU cache with TTL for classifier results.
+
+    Entries are keyed by operation, generation and a hash of the normalized
+    inputs. `invalidate()` moves to a new model version and a new generation
+    and drops everything; results computed by the old model that finish
+    afterwards are stored under the old generation and never served, even if
+    a later invalidation returns to the same model version (a rollback).
+    Cached values are shared between callers and must not be modified.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600.0, model_version: Hashable = 0):
+        self._cache = TTLCache(max_size, ttl)
+        self.model_version = model_version
+        self.generation = 0
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def key(self, operation: str, *parts: Any, normalize: bool = True) -> Tuple[str, int, str]:
+        """
+        Cache key for the current generation; take it before computing a result.
+        Pass `normalize=False` for a classifier that does not ignore case and
+        whitespace, so only identical inputs share an entry.
+        """
+        return (operation, self.generation, content_hash(*parts, normalize=normalize))
+
+    def get(self, key: Tuple[str, int, str]) -> Any:
+        """Cached value for `key`, or MISSING"""
+        value = self._cache.get(key, MISSING)
+        counts = self._counts.setdefault(key[0], {"hits": 0, "misses": 0})
+        counts["misses" if value is MISSING else "hits"] += 1
+        return value
+
+    def set(self, key: Tuple[str, int, str], value: Any):
+        self._cache.set(key, value)
+
+    def invalidate(self, model_version: Hashable = None):
+        """Switch to a new model version (the next integer by default) and drop all entries"""
+        self.model_version = self.model_version + 1 if model_version is None else model_version
+        self.generation += 1
+        self._cache.clear()
+
+    def hit_rates(self) -> Dict[str, float]:
+        return {
+            operation: counts["hits"] / (counts["hits"] + counts["misses"])
+            for operation, counts in self._counts.items()
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        hit_rates = self.hit_rates()
+        return {
+            **self._cache.stats(),
+            "model_version": self.model_version,
+            "generation": self.generation,
+            "operations": {
+                operation: {**counts, "hit_rate": hit_rates[operation]}
+                for operation, counts in self._counts.items()
+            }
+        }
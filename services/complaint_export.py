@@ -0,0 +1,76 @@
+"""
+Streaming complaint export as NDJSON or CSV
+"""
+
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from services.pagination import CursorKey, cursor_key
+
+# Fetches up to `limit` complaints after the cursor key, in (created_at, id) order
+FetchPage = Callable[[Optional[CursorKey], int], Awaitable[List[Dict[str, Any]]]]
+
+CSV_FIELDS = (
+    'id', 'user_id', 'title', 'description', 'category', 'priority', 'status',
+    'escalation_level', 'created_at', 'updated_at'
+)
+
+# Output is sent in chunks of roughly this many characters
+CHUNK_SIZE = 64 * 1024
+
+
+async def iter_complaints(fetch_page: FetchPage, page_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+    """Yield every complaint one page at a time, so only one page is held in memory"""
+    after = None
+    while True:
+        page = await fetch_page(after, page_size)
+        for complaint in page:
+            yield complaint
+        if len(page) < page_size:
+            return
+        after = cursor_key(page[-1])
+
+
+async def ndjson_export(complaints: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    lines = []
+    size = 0
+    async for complaint in complaints:
+        line = json.dumps(complaint, default=str) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(lines)
+            lines, size = [], 0
+    if lines:
+        yield ''.join(lines)
+
+
+def _csv_cell(value: Any) -> str:
+    value = getattr(value, 'value', value)
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value, default=str)
+    value = str(value)
+    # Keep spreadsheet apps from evaluating user-supplied text as a formula
+    if value[:1] in ('=', '+', '-', '@'):
+        value = "'" + value
+    return value
+
+
+async def csv_export(
+    complaints: AsyncIterator[Dict[str, Any]],
+    fields: Sequence[str] = CSV_FIELDS
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    async for complaint in complaints:
+        writer.writerow([_csv_cell(complaint.get(field)) for field in fields])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,44 @@
+"""
+Keyset-paged complaint queries against Firestore
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+from firebase_admin import firestore
+
+from services.pagination import DOCUMENT_ID, CursorKey, document_cursor
+
+
+class ComplaintQuery:
+    """
+    Pages through `complaints` newest first in (created_at, document id)
+    order. A page after a cursor starts with Firestore's start_after, so it
+    seeks to the cursor instead of reading and skipping the rows before it.
+
+    Filtered listings need a composite index on the filtered fields followed
+    by created_at and __name__, both descending. All methods are blocking;
+    run them on an executor.
+    """
+
+    def __init__(self, db=None, collection: str = 'complaints', client: Optional[Callable[[], Any]] = None):
+        self._db = db
+        self._client = client or firestore.client
+        self.collection = collection
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = self._client()
+        return self._db
+
+    def page(self, filters: Dict[str, Any], limit: int, start_after: Optional[CursorKey] = None) -> List[Dict[str, Any]]:
+        """Up to `limit` complaints matching every filter exactly, after `start_after` when given"""
+        collection = self.db.collection(self.collection)
+        query = collection
+        for field, value in filters.items():
+            query = query.where(field, '==', value)
+        query = query.order_by('created_at', direction=firestore.Query.DESCENDING) \
+            .order_by(DOCUMENT_ID, direction=firestore.Query.DESCENDING)
+        if start_after is not None:
+            query = query.start_after(document_cursor(collection, start_after))
+        return [{**snapshot.to_dict(), 'id': snapshot.id} for snapshot in query.limit(limit).stream()]
@@ -0,0 +1,136 @@
+"""
+Indexed in-memory complaint store used by the demo backends
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Fields that get a secondary index
+INDEXED_FIELDS = ('user_id', 'status', 'category', 'priority')
+
+# Complaints are ordered by (created_at, id)
+OrderKey = Tuple[str, str]
+
+
+class ComplaintStore:
+    """In-memory complaint store with per-field indexes and a created_at ordering"""
+
+    def __init__(self):
+        self._complaints: Dict[str, Dict[str, Any]] = {}
+        self._order: List[OrderKey] = []
+        self._indexes: Dict[str, Dict[Any, List[OrderKey]]] = {field: {} for field in INDEXED_FIELDS}
+
+    @staticmethod
+    def _key(complaint: Dict[str, Any]) -> OrderKey:
+        return (complaint.get('created_at') or '', complaint['id'])
+
+    def _index(self, complaint: Dict[str, Any]):
+        key = self._key(complaint)
+        insort(self._order, key)
+        for field in INDEXED_FIELDS:
+            insort(self._indexes[field].setdefault(complaint.get(field), []), key)
+
+    def _unindex(self, complaint: Dict[str, Any]):
+        key = self._key(complaint)
+        _remove_sorted(self._order, key)
+        for field in INDEXED_FIELDS:
+            value = complaint.get(field)
+            keys = self._indexes[field].get(value)
+            if keys is not None:
+                _remove_sorted(keys, key)
+                if not keys:
+                    del self._indexes[field][value]
+
+    def add(self, complaint: Dict[str, Any]):
+        """Add or replace a complaint"""
+        existing = self._complaints.get(complaint['id'])
+        if existing is not None:
+            self._unindex(existing)
+        self._complaints[complaint['id']] = complaint
+        self._index(complaint)
+
+    def add_many(self, complaints: Iterable[Dict[str, Any]]):
+        """Add or replace a batch of complaints"""
+        for complaint in complaints:
+            self.add(complaint)
+
+    def get(self, complaint_id: str) -> Optional[Dict[str, Any]]:
+        return self._complaints.get(complaint_id)
+
+    def update(self, complaint_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Apply changes to a stored complaint, keeping the indexes in sync"""
+        complaint = self._complaints.get(complaint_id)
+        if complaint is None:
+            return None
+        self._unindex(complaint)
+        complaint.update(changes)
+        self._index(complaint)
+        return complaint
+
+    def delete(self, complaint_id: str) -> bool:
+        complaint = self._complaints.pop(complaint_id, None)
+        if complaint is None:
+            return False
+        self._unindex(complaint)
+        return True
+
+    def query(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        descending: bool = False,
+        after: Optional[OrderKey] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return complaints matching every filter in created_at order.
+
+        Scanning starts from the smallest matching index and stops as soon as
+        `limit` results are found, so the cost follows the result size rather
+        than the size of the store. With `after`, scanning starts just past that
+        (created_at, id) key, so every page of a keyset walk costs the same.
+        """
+        filters = {field: value for field, value in (filters or {}).items() if value is not None}
+
+        keys = self._order
+        for field, value in filters.items():
+            if field in self._indexes:
+                candidates = self._indexes[field].get(value, [])
+                if len(candidates) < len(keys):
+                    keys = candidates
+
+        results = []
+        if limit is not None and limit <= 0:
+            return results
+        if descending:
+            end = bisect_left(keys, after) if after is not None else len(keys)
+            positions = range(end - 1, -1, -1)
+        else:
+            start = bisect_right(keys, after) if after is not None else 0
+            positions = range(start, len(keys))
+        for position in positions:
+            complaint_id = keys[position][1]
+            complaint = self._complaints[complaint_id]
+            if all(complaint.get(field) == value for field, value in filters.items()):
+                results.append(complaint)
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+
+    def count(self, field: str, value: Any) -> int:
+        """Number of complaints with an indexed field equal to value"""
+        return len(self._indexes[field].get(value, []))
+
+    def values(self) -> Iterator[Dict[str, Any]]:
+        return (self._complaints[complaint_id] for _, complaint_id in self._order)
+
+    def __contains__(self, complaint_id: str) -> bool:
+        return complaint_id in self._complaints
+
+    def __len__(self) -> int:
+        return len(self._complaints)
+
+
+def _remove_sorted(keys: List[OrderKey], key: OrderKey):
+    position = bisect_left(keys, key)
+    if position < len(keys) and keys[position] == key:
+        del keys[position]
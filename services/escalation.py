@@ -0,0 +1,211 @@
+"""
+Deadline-driven complaint escalation scheduler
+"""
+
+import asyncio
+import heapq
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Hours a complaint may sit at each escalation level before moving up, by priority
+ESCALATION_HOURS = {'urgent': 2, 'high': 8, 'medium': 24, 'low': 72}
+MAX_ESCALATION_LEVEL = 3
+CLOSED_STATUSES = ('resolved', 'closed', 'rejected')
+
+# Called with a due complaint; returns the complaint to schedule next, or None to drop it
+EscalateFn = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def escalation_deadline(
+    complaint: Dict[str, Any],
+    hours: Dict[str, float] = ESCALATION_HOURS,
+    max_level: int = MAX_ESCALATION_LEVEL
+) -> Optional[float]:
+    """
+    When the complaint is next due for escalation, as a Unix timestamp.
+
+    Level n escalates (n + 1) periods after creation, the period depending on
+    priority. Closed complaints and those at the top level are never due.
+    """
+    status = getattr(complaint.get('status'), 'value', complaint.get('status'))
+    level = complaint.get('escalation_level') or 0
+    if status in CLOSED_STATUSES or level >= max_level:
+        return None
+    created_at = _timestamp(complaint.get('created_at'))
+    if created_at is None:
+        return None
+    priority = getattr(complaint.get('priority'), 'value', complaint.get('priority'))
+    period = hours.get(priority, hours['medium']) * 3600
+    return created_at + period * (level + 1)
+
+
+class EscalationScheduler:
+    """
+    Escalates complaints when their deadline passes, without rescanning the store.
+
+    Open complaints sit in a min-heap keyed by deadline, so a tick only looks at
+    complaints that are due. Call `schedule` whenever a complaint is created or
+    changed; a changed complaint gets a new heap entry and the old one is skipped
+    when it surfaces.
+    """
+
+    def __init__(
+        self,
+        escalate: EscalateFn,
+        hours: Dict[str, float] = ESCALATION_HOURS,
+        max_level: int = MAX_ESCALATION_LEVEL,
+        tick_interval: float = 60.0,
+        clock: Callable[[], float] = time.time
+    ):
+        self._escalate = escalate
+        self.hours = hours
+        self.max_level = max_level
+        self.tick_interval = tick_interval
+        self._clock = clock
+
+        self._heap: List[Tuple[float, str]] = []
+        self._scheduled: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._run_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.escalated = 0
+        self.failed = 0
+        self.last_run_at: Optional[float] = None
+
+    def schedule(self, complaint: Dict[str, Any]):
+        """Track a new or changed complaint; closed or maxed-out complaints are dropped"""
+        if complaint.get('id') is None:
+            return
+        deadline = escalation_deadline(complaint, self.hours, self.max_level)
+        if deadline is None:
+            self.unschedule(complaint['id'])
+            return
+        self._push(deadline, complaint)
+
+    def _push(self, deadline: float, complaint: Dict[str, Any]):
+        self._scheduled[complaint['id']] = (deadline, complaint)
+        heapq.heappush(self._heap, (deadline, complaint['id']))
+        if self._heap[0][1] == complaint['id']:
+            # New earliest deadline; let the loop recompute how long to sleep
+            self._wakeup.set()
+
+    def schedule_many(self, complaints: Iterable[Dict[str, Any]]):
+        for complaint in complaints:
+            self.schedule(complaint)
+
+    def unschedule(self, complaint_id: str):
+        # The heap entry stays behind and is skipped when popped
+        self._scheduled.pop(complaint_id, None)
+
+    def clear(self):
+        self._heap = []
+        self._scheduled = {}
+
+    def replace(self, complaints: Iterable[Dict[str, Any]]):
+        """Swap the whole schedule for one built from `complaints`, e.g. a fresh read of the store"""
+        scheduled = {}
+        for complaint in complaints:
+            deadline = escalation_deadline(complaint, self.hours, self.max_level)
+            if complaint.get('id') is not None and deadline is not None:
+                scheduled[complaint['id']] = (deadline, complaint)
+        self._scheduled = scheduled
+        self._heap = [(deadline, complaint_id) for complaint_id, (deadline, _) in scheduled.items()]
+        heapq.heapify(self._heap)
+        self._wakeup.set()
+
+    def next_deadline(self) -> Optional[float]:
+        while self._heap:
+            deadline, complaint_id = self._heap[0]
+            entry = self._scheduled.get(complaint_id)
+            if entry is not None and entry[0] == deadline:
+                return deadline
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due(self, now: float) -> List[Dict[str, Any]]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, complaint_id = heapq.heappop(self._heap)
+            entry = self._scheduled.get(complaint_id)
+            if entry is None or entry[0] != deadline:
+                continue
+            del self._scheduled[complaint_id]
+            due.append(entry[1])
+        return due
+
+    async def run_due(self) -> List[str]:
+        """Escalate every complaint whose deadline has passed; returns their ids"""
+        async with self._run_lock:
+            escalated = []
+            for complaint in self._pop_due(self._clock()):
+                try:
+                    updated = await self._escalate(complaint)
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Escalation of complaint {complaint['id']} failed: {e}")
+                    # Try again on a later tick
+                    self._push(self._clock() + self.tick_interval, complaint)
+                    continue
+                if updated is not None:
+                    if (updated.get('escalation_level') or 0) > (complaint.get('escalation_level') or 0):
+                        escalated.append(complaint['id'])
+                        self.escalated += 1
+                    self.schedule(updated)
+            self.last_run_at = self._clock()
+            return escalated
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        """Start the background loop"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            deadline = self.next_deadline()
+            delay = self.tick_interval if deadline is None else min(self.tick_interval, deadline - self._clock())
+            self._wakeup.clear()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                await self.run_due()
+            except Exception as e:
+                print(f"Escalation run failed: {e}")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "scheduled": len(self._scheduled),
+            "next_deadline": self.next_deadline(),
+            "escalated": self.escalated,
+            "failed": self.failed,
+            "last_run_at": self.last_run_at
+        }
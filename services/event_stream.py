@@ -0,0 +1,179 @@
+"""
+Server-Sent Events broker with per-user fan-out and Last-Event-ID replay
+"""
+
+import asyncio
+import json
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+# (sequence, user_id, event_type, data)
+BufferedEvent = Tuple[int, str, str, Dict[str, Any]]
+
+
+class TooManyConnections(Exception):
+    """Raised when this worker cannot accept another event stream"""
+
+
+def format_event(event_id: Optional[str], event_type: str, data: Dict[str, Any]) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event_type}", f"data: {json.dumps(data, default=str)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+class EventSubscription:
+    def __init__(self, user_id: Optional[str], types: Optional[Set[str]], queue_size: int,
+                 last_event_id: Optional[str] = None):
+        self.user_id = user_id
+        self.types = types
+        self.last_event_id = last_event_id
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(queue_size)
+        self.backlog: List[str] = []
+        # Set when the client fell behind or the broker is closing; the stream then ends
+        self.closed = False
+
+    def wants(self, event_type: str) -> bool:
+        return self.types is None or event_type in self.types
+
+
+class EventBroker:
+    """
+    Fans events out to the SSE streams open on this worker.
+
+    Each event goes to the streams of the user it belongs to, plus any stream
+    subscribed without a user (admin firehose). The last `replay_size` events are
+    kept so a client that reconnects with Last-Event-ID gets what it missed. An
+    id from another worker, or one older than the buffer, gets a `reset` event
+    telling the client to refetch. A client whose queue fills up is disconnected
+    and can resume the same way.
+
+    A subscription counts as a connection only while its stream is running, so
+    a response that never starts cannot leak a connection slot.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 1000,
+        max_per_user: int = 5,
+        replay_size: int = 1000,
+        queue_size: int = 100,
+        instance: Optional[str] = None
+    ):
+        self.max_connections = max_connections
+        self.max_per_user = max_per_user
+        self.queue_size = queue_size
+        self.instance = instance or uuid.uuid4().hex[:8]
+        self._sequence = 0
+        self._replay: Deque[BufferedEvent] = deque(maxlen=replay_size)
+        self._subscribers: Dict[Optional[str], Set[EventSubscription]] = {}
+        self.connections = 0
+        self.published = 0
+        self.dropped_clients = 0
+
+    def _event_id(self, sequence: int) -> str:
+        return f"{self.instance}-{sequence}"
+
+    def publish(self, user_id: str, event_type: str, data: Dict[str, Any]) -> str:
+        self._sequence += 1
+        self._replay.append((self._sequence, user_id, event_type, data))
+        self.published += 1
+        frame = format_event(self._event_id(self._sequence), event_type, data)
+        for subscription in self._subscribers.get(user_id, set()) | self._subscribers.get(None, set()):
+            if subscription.closed or not subscription.wants(event_type):
+                continue
+            if subscription.queue.full():
+                subscription.closed = True
+                self.dropped_clients += 1
+            else:
+                subscription.queue.put_nowait(frame)
+        return self._event_id(self._sequence)
+
+    def subscribe(
+        self,
+        user_id: Optional[str],
+        last_event_id: Optional[str] = None,
+        types: Optional[Set[str]] = None
+    ) -> EventSubscription:
+        """
+        A stream for a user (None for every user) that replays anything after
+        `last_event_id`. Raises TooManyConnections when this worker is at a
+        limit; the stream itself is opened by `stream`.
+        """
+        self._check_limits(user_id)
+        return EventSubscription(user_id, types, self.queue_size, last_event_id)
+
+    def _check_limits(self, user_id: Optional[str]):
+        if self.connections >= self.max_connections:
+            raise TooManyConnections(f"This worker already serves {self.connections} event streams")
+        if user_id is not None and len(self._subscribers.get(user_id, ())) >= self.max_per_user:
+            raise TooManyConnections(f"At most {self.max_per_user} event streams per user")
+
+    def _open(self, subscription: EventSubscription):
+        self._check_limits(subscription.user_id)
+        if subscription.last_event_id:
+            subscription.backlog = self._replay_after(subscription, subscription.last_event_id)
+        self._subscribers.setdefault(subscription.user_id, set()).add(subscription)
+        self.connections += 1
+
+    def _replay_after(self, subscription: EventSubscription, last_event_id: str) -> List[str]:
+        instance, _, sequence = last_event_id.rpartition('-')
+        oldest = self._replay[0][0] if self._replay else self._sequence + 1
+        if instance != self.instance or not sequence.isdigit() or int(sequence) < oldest - 1:
+            return [format_event(self._event_id(self._sequence), 'reset', {'reason': 'events missed'})]
+        return [
+            format_event(self._event_id(seq), event_type, data)
+            for seq, user_id, event_type, data in self._replay
+            if seq > int(sequence) and subscription.wants(event_type)
+            and (subscription.user_id is None or user_id == subscription.user_id)
+        ]
+
+    def unsubscribe(self, subscription: EventSubscription):
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None and subscription in subscribers:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+            self.connections -= 1
+
+    async def stream(self, subscription: EventSubscription, heartbeat: float = 15.0) -> AsyncIterator[str]:
+        """SSE frames for a subscription, with a comment line every `heartbeat` idle seconds"""
+        try:
+            try:
+                self._open(subscription)
+            except TooManyConnections:
+                # Other streams started since `subscribe` checked; the client retries later
+                yield "retry: 5000\n\n"
+                return
+            yield "retry: 3000\n\n"
+            for frame in subscription.backlog:
+                yield frame
+            subscription.backlog = []
+            while not subscription.closed:
+                try:
+                    frame = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if subscription.closed:
+                    break
+                yield frame
+        finally:
+            self.unsubscribe(subscription)
+
+    def close(self):
+        """End every open stream, e.g. at shutdown"""
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.closed = True
+                if not subscription.queue.full():
+                    subscription.queue.put_nowait(": closing\n\n")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": self.connections,
+            "max_connections": self.max_connections,
+            "published": self.published,
+            "dropped_clients": self.dropped_clients,
+            "replay_buffered": len(self._replay)
+        }
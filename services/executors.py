@@ -0,0 +1,61 @@
+"""
+Bounded executors for running blocking service calls off the event loop
+"""
+
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Optional
+
+
+class ExecutorBusy(Exception):
+    """Raised when an executor already has its maximum number of calls pending"""
+
+
+class BoundedExecutor:
+    """
+    Wraps a thread or process pool with a queue-depth limit and per-call timeouts.
+
+    A call that times out keeps its slot until the underlying work really
+    finishes, so `pending` always reflects the load on the pool.
+    """
+
+    def __init__(self, name: str, executor: Executor, max_pending: int, timeout: Optional[float] = None):
+        self.name = name
+        self.executor = executor
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _release(self, _future):
+        self.pending -= 1
+
+    async def run(self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """Run func(*args, **kwargs) in the pool and await its result"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorBusy(f"{self.name} executor is busy ({self.pending} calls pending)")
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+        self.pending += 1
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout if timeout is not None else self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out
+        }
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
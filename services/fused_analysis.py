@@ -0,0 +1,125 @@
+"""
+Single-call complaint analysis on top of AIService
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Confidence reported for a category or priority supplied by the caller
+GIVEN_CONFIDENCE = 0.8
+
+
+class FusedAnalyzer:
+    """
+    AIService wrapper with one `analyze` entry point for a whole complaint.
+
+    When the service has its own `analyze` (and `analyze_batch`), which encode
+    the text once and share it across the category, priority and suggestion
+    heads, those are used. Otherwise `analyze` runs the three separate calls,
+    still as one call from the caller's side. Every other attribute is the
+    service's own.
+
+    With a `corrections` model, a category or priority it predicts more
+    confidently than the service is used in place of the service's, and the
+    complaint is analyzed again with it so priority and suggestions follow.
+    `partial_fit` trains it whenever the service cannot learn incrementally
+    itself.
+    """
+
+    def __init__(self, service: Any, corrections: Optional[Any] = None):
+        self.service = service
+        self.corrections = corrections
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.service, name)
+
+    def analyze(self, title: str, description: str, category: Optional[str] = None,
+                priority: Optional[str] = None) -> Dict[str, Any]:
+        """Category, priority and suggestions with confidences; given values are kept"""
+        result = self.analyze_batch([(title, description, category, priority)])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def analyze_batch(self, calls: Sequence[Sequence[Any]]) -> List[Any]:
+        """`analyze` for each (title, description[, category[, priority]]); a failed item's result is its exception"""
+        calls = [tuple(args) + (None,) * (4 - len(args)) for args in calls]
+        results = self._analyze_batch(calls)
+        if self.corrections is None:
+            return results
+
+        corrected: Dict[int, Tuple[Tuple[Any, ...], Dict[str, float]]] = {}
+        for index, (args, result) in enumerate(zip(calls, results)):
+            if not isinstance(result, Exception):
+                correction = self._correct(args, result)
+                if correction is not None:
+                    corrected[index] = correction
+        if corrected:
+            reanalyzed = self._analyze_batch([args for args, _ in corrected.values()])
+            for (index, (_, confidences)), result in zip(corrected.items(), reanalyzed):
+                if isinstance(result, Exception):
+                    continue
+                for label, confidence in confidences.items():
+                    result[f'{label}_confidence'] = confidence
+                results[index] = result
+        return results
+
+    def _correct(self, args: Tuple[Any, ...], analysis: Dict[str, Any]) -> Optional[Tuple[Tuple[Any, ...], Dict[str, float]]]:
+        """Arguments to analyze again with, and the corrected labels' confidences, when a correction applies"""
+        title, description, category, priority = args
+        labels = {'category': category, 'priority': priority}
+        confidences: Dict[str, float] = {}
+        for label, given in list(labels.items()):
+            if given:
+                continue
+            prediction = self.corrections.predict(label, title, description, analysis.get(f'{label}_confidence'))
+            if prediction is not None and prediction[0] != analysis.get(label):
+                labels[label], confidences[label] = prediction
+        if not confidences:
+            return None
+        return (title, description, labels['category'], labels['priority']), confidences
+
+    def _analyze_batch(self, calls: List[Tuple[Any, ...]]) -> List[Any]:
+        fused = getattr(self.service, 'analyze_batch', None)
+        if fused is not None:
+            return list(fused(calls))
+        results: List[Any] = []
+        for args in calls:
+            try:
+                results.append(self._analyze(*args))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _analyze(self, title: str, description: str, category: Optional[str],
+                 priority: Optional[str]) -> Dict[str, Any]:
+        fused = getattr(self.service, 'analyze', None)
+        if fused is not None:
+            return fused(title, description, category, priority)
+
+        confidence = pri_confidence = GIVEN_CONFIDENCE
+        if not category:
+            category, confidence = self.service.categorize_complaint(title, description)
+        if not priority:
+            priority, pri_confidence = self.service.prioritize_complaint(title, description, category)
+        suggestions = self.service.get_ai_suggestions({
+            'title': title,
+            'description': description,
+            'category': category,
+            'priority': priority
+        })
+        return {
+            'category': category,
+            'category_confidence': confidence,
+            'priority': priority,
+            'priority_confidence': pri_confidence,
+            'suggestions': suggestions
+        }
+
+    def partial_fit(self, examples: List[Dict[str, Any]]):
+        """Learn from labeled examples ({'title', 'description', 'category'?, 'priority'?}) without a retrain"""
+        incremental = getattr(self.service, 'partial_fit', None)
+        if incremental is not None:
+            return incremental(examples)
+        if self.corrections is None:
+            raise ValueError("This AI service cannot learn incrementally")
+        self.corrections.partial_fit(examples)
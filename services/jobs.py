@@ -0,0 +1,52 @@
+"""
+In-memory registry of background job status
+"""
+
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+FINISHED_STATUSES = ('completed', 'failed')
+
+
+class JobRegistry:
+    """
+    Tracks background jobs so endpoints can return a job id straight away.
+
+    Only the most recent `max_jobs` jobs are kept; the oldest finished jobs are
+    forgotten first.
+    """
+
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def create(self, kind: str, **fields: Any) -> Dict[str, Any]:
+        now = datetime.now().isoformat()
+        job = {'id': str(uuid.uuid4()), 'kind': kind, 'status': 'queued', 'created_at': now, 'updated_at': now, **fields}
+        self._jobs[job['id']] = job
+        self._evict()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    def update(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.update(fields, updated_at=datetime.now().isoformat())
+        return job
+
+    def _evict(self):
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job['status'] in FINISHED_STATUSES]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self.max_jobs:
+                return
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
@@ -0,0 +1,50 @@
+"""
+Compiled keyword rules for complaint classification
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# A rule is (label, confidence, keywords); the first matching rule of a table wins
+KeywordRule = Tuple[str, float, Sequence[str]]
+
+
+class KeywordRules:
+    """Ordered keyword rule tables compiled once and evaluated with a shared scan cache"""
+
+    def __init__(self, tables: Dict[str, Sequence[KeywordRule]]):
+        # Compile to tuples once so matching does no per-call setup
+        self.tables: List[Tuple[str, Tuple[Tuple[str, float, Tuple[str, ...]], ...]]] = [
+            (name, tuple((label, confidence, tuple(keywords)) for label, confidence, keywords in rules))
+            for name, rules in tables.items()
+        ]
+        self.keywords = sorted({
+            word for _, rules in self.tables for _, _, words in rules for word in words
+        })
+        # Without multi-word keywords, collapsing runs of whitespace in a text
+        # cannot change what it matches
+        self.whitespace_insensitive = not any(any(c.isspace() for c in word) for word in self.keywords)
+
+    def match(self, text: str) -> Dict[str, Optional[Tuple[str, float]]]:
+        """
+        Return the first matching (label, confidence) of every table, or None.
+
+        Each distinct keyword is searched for at most once per text, however many
+        tables mention it, and every table still stops at its first matching rule.
+        """
+        seen: Dict[str, bool] = {}
+        result: Dict[str, Optional[Tuple[str, float]]] = {}
+        for name, rules in self.tables:
+            result[name] = None
+            for label, confidence, words in rules:
+                hit = False
+                for word in words:
+                    found = seen.get(word)
+                    if found is None:
+                        found = seen[word] = word in text
+                    if found:
+                        hit = True
+                        break
+                if hit:
+                    result[name] = (label, confidence)
+                    break
+        return result
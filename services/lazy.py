@@ -0,0 +1,118 @@
+"""
+Lazily created services with background warm-up and readiness reporting
+"""
+
+import asyncio
+import importlib
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+# Runs a blocking callable off the event loop, e.g. an executor's `run`
+Runner = Callable[[Callable[[], Any]], Awaitable[Any]]
+
+
+def import_factory(path: str) -> Callable[[], Any]:
+    """Factory for "package.module:Class" that imports the module only when called"""
+    module_name, _, attribute = path.partition(':')
+
+    def create() -> Any:
+        return getattr(importlib.import_module(module_name), attribute)()
+    return create
+
+
+class LazyService:
+    """
+    Creates a service the first time it is used, or when `warm_up` runs.
+
+    Attribute access is passed through to the instance, creating it if needed,
+    so a LazyService can stand in for the service itself. Creation may block
+    for a long time (heavy imports, model loads), so on the event loop prefer
+    `resolve`, `warm_up`, or `method`, which resolves the instance inside the
+    executor.
+    """
+
+    def __init__(self, name: str, factory: Union[str, Callable[[], Any]]):
+        self.name = name
+        self._factory = import_factory(factory) if isinstance(factory, str) else factory
+        self._instance: Any = None
+        self._lock = threading.Lock()
+        self.state = 'cold'
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+    def get(self) -> Any:
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                self.state = 'warming'
+                started = time.perf_counter()
+                try:
+                    self._instance = self._factory()
+                except Exception as e:
+                    # Stay cold so the next use retries
+                    self.state, self.error = 'failed', repr(e)
+                    raise
+                self.load_seconds = time.perf_counter() - started
+                self.state, self.error = 'ready', None
+            return self._instance
+
+    def swap(self, instance: Any) -> Any:
+        """Replace the instance and return the old one; calls already running keep using the old one"""
+        with self._lock:
+            previous, self._instance = self._instance, instance
+            self.state, self.error = 'ready', None
+        return previous
+
+    @property
+    def ready(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def method(self, name: str) -> Callable[..., Any]:
+        """A function calling `name` on the instance, for handing to an executor"""
+        def call(*args: Any, **kwargs: Any) -> Any:
+            return getattr(self.get(), name)(*args, **kwargs)
+        call.__name__ = name
+        return call
+
+    async def resolve(self, run: Optional[Runner] = None) -> Any:
+        """The instance, created by `run(self.get)` (the loop's default executor if not given) when still cold"""
+        instance = self._instance
+        if instance is not None:
+            return instance
+        if run is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self.get)
+        return await run(self.get)
+
+    async def warm_up(self):
+        """Create the instance on a worker thread"""
+        await self.resolve()
+
+    def status(self) -> Dict[str, Any]:
+        return {"state": self.state, "load_seconds": self.load_seconds, "error": self.error}
+
+
+class AsyncServiceProxy:
+    """
+    Stands in for a LazyService whose methods are coroutines.
+
+    Every attribute is a coroutine function that resolves the service with
+    `run` before calling the method, so a cold service is created off the
+    event loop and a call never blocks the loop while warm-up holds the lock.
+    """
+
+    def __init__(self, service: LazyService, run: Optional[Runner] = None):
+        self._service = service
+        self._run = run
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            instance = await self._service.resolve(self._run)
+            return await getattr(instance, name)(*args, **kwargs)
+        call.__name__ = name
+        return call
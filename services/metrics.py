@@ -0,0 +1,187 @@
+"""
+Latency histograms, named spans and Prometheus text exposition
+"""
+
+import asyncio
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds, as used by the Prometheus client libraries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Spans recorded while handling the current request, as (name, seconds)
+request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar('request_spans', default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: str = '') -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        # labels -> ([count per bucket, +Inf last], sum)
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        labels = tuple(zip(self.label_names, label_values))
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1][0] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(labels, list(counts), total[0]) for labels, (counts, total) in sorted(self._series.items())]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {total}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Histograms plus gauges read from callbacks at scrape time"""
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._gauges: List[Tuple[str, str, Callable[[], Any]]] = []
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets=DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._histograms:
+            self._histograms[name] = Histogram(name, help_text, label_names, buckets)
+        return self._histograms[name]
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], Any]):
+        """Register a gauge; `read` returns a number or a {label value tuple: number} dict"""
+        self._gauges.append((name, help_text, read))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for histogram in self._histograms.values():
+            lines.extend(histogram.render())
+        for name, help_text, read in self._gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            try:
+                value = read()
+            except Exception:
+                continue
+            if isinstance(value, dict):
+                for labels, number in value.items():
+                    lines.append(f"{name}{_format_labels(labels)} {number}")
+            else:
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+span_seconds = registry.histogram(
+    "span_duration_seconds", "Time spent in named service calls", ("span",)
+)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block under `name`, both globally and for the current request"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        span_seconds.observe(elapsed, name)
+        spans = request_spans.get()
+        if spans is not None:
+            spans.append((name, elapsed))
+
+
+class Instrumented:
+    """Proxy that wraps every method of a service in a span named `<prefix>.<method>`"""
+
+    def __init__(self, target: Any, prefix: str):
+        self._target = target
+        self._prefix = prefix
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr) or name.startswith('_'):
+            return attr
+        span_name = f"{self._prefix}.{name}"
+
+        if inspect.iscoroutinefunction(attr):
+            async def timed(*args, **kwargs):
+                with span(span_name):
+                    return await attr(*args, **kwargs)
+        else:
+            def timed(*args, **kwargs):
+                with span(span_name):
+                    return attr(*args, **kwargs)
+        return timed
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a short sleep"""
+
+    def __init__(self, interval: float = 0.5, window: int = 120):
+        self.interval = interval
+        self.window = window
+        self._samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(time.perf_counter() - started - self.interval, 0.0))
+            del self._samples[:-self.window]
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def lag(self) -> float:
+        return self._samples[-1] if self._samples else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "lag_seconds": self.lag,
+            "max_lag_seconds": max(self._samples, default=0.0),
+            "window_seconds": self.interval * len(self._samples)
+        }
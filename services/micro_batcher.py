@@ -0,0 +1,166 @@
+"""
+Dynamic micro-batching of concurrent model calls
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from services.metrics import Histogram
+
+# (submitted_at, item, future)
+PendingItem = Tuple[float, Any, "asyncio.Future[Any]"]
+
+
+def run_batch(service: Any, method: str, calls: Sequence[Sequence[Any]]) -> List[Any]:
+    """
+    Run `method` for every argument tuple in `calls`.
+
+    Uses the service's `<method>_batch(calls)` when it has one, for a single
+    batched forward pass. Otherwise calls the method once per item, and a
+    failing item is returned as its exception so the rest still succeed.
+    """
+    batch_method = getattr(service, f"{method}_batch", None)
+    if batch_method is not None:
+        return list(batch_method([tuple(args) for args in calls]))
+    single = getattr(service, method)
+    results: List[Any] = []
+    for args in calls:
+        try:
+            results.append(single(*args))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+class MicroBatcher:
+    """
+    Collects concurrent calls into batches for one `run(items)` call.
+
+    A batch is dispatched once `max_batch_size` items are waiting, or
+    `max_wait` seconds after the first of them arrived. Batches run
+    concurrently, so collection continues while earlier batches are in
+    flight. `run` returns one result per item, in order; a result that is an
+    exception is raised to that item's caller only, and an exception from
+    `run` itself is raised to every caller in the batch.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 16,
+        max_wait: float = 0.005,
+        name: str = "batch",
+        queue_wait: Optional[Histogram] = None,
+        batch_sizes: Optional[Histogram] = None
+    ):
+        self._run_batch = run
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+        self._queue_wait = queue_wait
+        self._batch_sizes = batch_sizes
+
+        self._pending: List[PendingItem] = []
+        self._wake = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: set = set()
+
+        self.batches = 0
+        self.items = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+
+    def start(self):
+        """Start the collector task"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._collect())
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((time.perf_counter(), item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        self._wake.set()
+        return await future
+
+    async def _collect(self):
+        while True:
+            await self._wake.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.max_wait)
+            except asyncio.TimeoutError:
+                pass
+            batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+            if not self._pending:
+                self._wake.clear()
+            # Callers that gave up (e.g. a disconnected client) are not sent to the model
+            batch = [entry for entry in batch if not entry[2].done()]
+            if batch:
+                task = asyncio.ensure_future(self._dispatch(batch))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch: List[PendingItem]):
+        dispatched_at = time.perf_counter()
+        for submitted_at, _, _ in batch:
+            wait = dispatched_at - submitted_at
+            self.total_wait += wait
+            self.max_wait_seen = max(self.max_wait_seen, wait)
+            if self._queue_wait is not None:
+                self._queue_wait.observe(wait, self.name)
+        if self._batch_sizes is not None:
+            self._batch_sizes.observe(len(batch), self.name)
+        self.batches += 1
+        self.items += len(batch)
+
+        try:
+            results = await self._run_batch([item for _, item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name} returned {len(results)} results for {len(batch)} items")
+        except BaseException as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def close(self):
+        """Stop collecting and wait for batches already dispatched"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        for _, _, future in self._pending:
+            if not future.done():
+                future.set_exception(RuntimeError(f"{self.name} batcher closed"))
+        self._pending = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "in_flight_batches": len(self._in_flight),
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": self.items / self.batches if self.batches else 0.0,
+            "average_queue_wait_seconds": self.total_wait / self.items if self.items else 0.0,
+            "max_queue_wait_seconds": self.max_wait_seen
+        }
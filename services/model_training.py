@@ -0,0 +1,121 @@
+"""
+Model training in a separate process, and the live/previous model history
+"""
+
+import json
+import os
+import pickle
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from services.lazy import import_factory
+
+
+def write_ndjson(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """Write records one JSON object per line; returns the number written"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, default=str))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def read_ndjson(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def remove_stale_files(directory: str, max_age: float, keep: Iterable[str] = ()) -> int:
+    """Delete files in `directory` not modified for `max_age` seconds, except `keep`; returns how many"""
+    keep = {os.path.abspath(path) for path in keep}
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if not entry.is_file() or os.path.abspath(entry.path) in keep:
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def train_model(data_path: str, model_path: str, factory: str = "services.ai_service:AIService") -> Dict[str, Any]:
+    """
+    Train a fresh service on an NDJSON file and pickle it to `model_path`.
+
+    Runs in the training process, so the serving process never blocks on
+    training and its live models are untouched until the new one is loaded.
+    """
+    service = import_factory(factory)()
+    records = read_ndjson(data_path)
+    service.train_models(records)
+    # Written under a temporary name so a crash never leaves a partial model behind
+    partial_path = model_path + '.partial'
+    with open(partial_path, 'wb') as f:
+        pickle.dump(service, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(partial_path, model_path)
+    return {'records': len(records), 'model_path': model_path}
+
+
+def load_model(model_path: str) -> Any:
+    with open(model_path, 'rb') as f:
+        return pickle.load(f)
+
+
+class ModelHistory:
+    """
+    The live model version and the one it replaced.
+
+    Versions are dicts with at least 'version' and 'model_path' (None for the
+    model loaded at startup). A loaded model object may be kept alongside the
+    version so rolling back does not need to load it again.
+    """
+
+    def __init__(self, initial: Optional[Dict[str, Any]] = None):
+        self.current: Dict[str, Any] = initial or {
+            'version': 'initial', 'model_path': None, 'activated_at': datetime.now().isoformat()
+        }
+        self.previous: Optional[Dict[str, Any]] = None
+        self._instances: Dict[str, Any] = {}
+
+    def promote(self, version: Dict[str, Any], replaced: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        Record `version` as live. `replaced` is the model object it took over
+        from, kept for rollback. Returns the version that is no longer kept.
+        """
+        dropped = self.previous
+        if dropped is not None:
+            self._instances.pop(dropped['version'], None)
+        self.previous = self.current
+        self.current = {**version, 'activated_at': datetime.now().isoformat()}
+        self._keep(self.previous, replaced)
+        return dropped
+
+    def rollback(self, replaced: Any = None) -> Dict[str, Any]:
+        """Make the previous version live again; returns it. The current one becomes previous."""
+        if self.previous is None:
+            raise ValueError("No previous model to roll back to")
+        self.current, self.previous = {**self.previous, 'activated_at': datetime.now().isoformat()}, self.current
+        self._keep(self.previous, replaced)
+        return self.current
+
+    def _keep(self, version: Dict[str, Any], instance: Any):
+        if instance is not None:
+            self._instances[version['version']] = instance
+
+    def instance(self, version: str) -> Any:
+        """The loaded model for a version, if it is still in memory"""
+        return self._instances.get(version)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'current': self.current, 'previous': self.previous}
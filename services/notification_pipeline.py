@@ -0,0 +1,202 @@
+"""
+Async notification pipeline with per-user coalescing and batched delivery
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from services.jobs import JobRegistry
+
+# (user_id, events) for one user's coalescing window
+Digest = Tuple[str, List[Dict[str, Any]]]
+
+
+class NotificationQueueFull(Exception):
+    """Raised when the pipeline cannot take more events"""
+
+
+def notification_event(complaint: Dict[str, Any], notification_type: str) -> Dict[str, Any]:
+    return {
+        'user_id': complaint.get('user_id'),
+        'complaint_id': complaint.get('id'),
+        'complaint_title': complaint.get('title'),
+        'notification_type': notification_type,
+        'created_at': datetime.now().isoformat()
+    }
+
+
+def event_key(event: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Events with the same key within a window are delivered once"""
+    return (event['user_id'], event['complaint_id'], event['notification_type'])
+
+
+class NotificationPipeline:
+    """
+    Queues notification events and delivers them in the background.
+
+    Events for the same user that arrive within `coalesce_window` seconds are
+    collected together, and repeats of the same complaint and type among them
+    are delivered once. Windows are grouped into batches of up to
+    `write_batch_size`, waiting at most `write_interval` seconds to fill one, and
+    a pool of `workers` hands each batch's events to `send` in one call. `send`
+    returns one result per event; an exception or False counts as failed. The
+    event queue is bounded; `submit` raises NotificationQueueFull rather than
+    growing it. Submissions made with a job id update that job's
+    delivered/failed counts.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List[Dict[str, Any]]], Awaitable[Sequence[Any]]],
+        jobs: JobRegistry,
+        max_queue: int = 1000,
+        workers: int = 4,
+        coalesce_window: float = 2.0,
+        write_batch_size: int = 100,
+        write_interval: float = 0.5
+    ):
+        self._send = send
+        self.jobs = jobs
+        self.workers = workers
+        self.coalesce_window = coalesce_window
+        self.write_batch_size = write_batch_size
+        self.write_interval = write_interval
+
+        self._events: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(max_queue)
+        self._digests: "asyncio.Queue[Digest]" = asyncio.Queue(max_queue)
+        self._batches: "asyncio.Queue[List[Digest]]" = asyncio.Queue(workers)
+        # user_id -> (window closes at, events)
+        self._pending: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._tasks: List[asyncio.Task] = []
+
+        self.delivered = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def submit(self, events: List[Dict[str, Any]], job_id: Optional[str] = None):
+        """Queue events for delivery, counting them against `job_id` when given"""
+        if self._events.maxsize and self._events.qsize() + len(events) > self._events.maxsize:
+            raise NotificationQueueFull(f"Notification queue is full ({self._events.qsize()} events waiting)")
+        job = self.jobs.get(job_id) if job_id is not None else None
+        if job is not None:
+            self.jobs.update(job_id, status='running', total=job.get('total', 0) + len(events))
+        for event in events:
+            self._events.put_nowait({**event, 'job_id': job_id})
+
+    def start(self):
+        """Start the coalescer and the writer pool"""
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._coalesce()), asyncio.ensure_future(self._batch())]
+            self._tasks += [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def _coalesce(self):
+        while True:
+            closes_at = min((window[0] for window in self._pending.values()), default=None)
+            timeout = None if closes_at is None else max(closes_at - time.monotonic(), 0)
+            try:
+                event = await asyncio.wait_for(self._events.get(), timeout)
+                window = self._pending.get(event['user_id'])
+                if window is None:
+                    self._pending[event['user_id']] = (time.monotonic() + self.coalesce_window, [event])
+                else:
+                    window[1].append(event)
+            except asyncio.TimeoutError:
+                pass
+            await self._release(time.monotonic())
+
+    async def _release(self, now: Optional[float] = None):
+        """Hand every closed window (all windows when `now` is None) to the writers"""
+        for user_id, (closes_at, events) in list(self._pending.items()):
+            if now is None or closes_at <= now:
+                del self._pending[user_id]
+                await self._digests.put((user_id, events))
+
+    async def _batch(self):
+        while True:
+            batch = [await self._digests.get()]
+            deadline = time.monotonic() + self.write_interval
+            while len(batch) < self.write_batch_size:
+                try:
+                    batch.append(await asyncio.wait_for(self._digests.get(), deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    break
+            await self._batches.put(batch)
+
+    async def _work(self):
+        while True:
+            batch = await self._batches.get()
+            try:
+                await self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._digests.task_done()
+
+    async def _write_batch(self, batch: List[Digest]):
+        groups: Dict[Tuple[Any, ...], List[Dict[str, Any]]] = {}
+        for _, events in batch:
+            for event in events:
+                groups.setdefault(event_key(event), []).append(event)
+        self.coalesced += sum(len(group) - 1 for group in groups.values())
+        try:
+            results = list(await self._send([group[0] for group in groups.values()]))
+            if len(results) != len(groups):
+                raise RuntimeError(f"send returned {len(results)} results for {len(groups)} notifications")
+        except Exception as e:
+            print(f"Failed to send {len(groups)} notifications: {e}")
+            results = [e] * len(groups)
+
+        counts: Dict[str, Dict[str, int]] = {}
+        for group, result in zip(groups.values(), results):
+            outcome = 'failed' if isinstance(result, Exception) or result is False else 'delivered'
+            if outcome == 'failed':
+                self.failed += 1
+            else:
+                self.delivered += 1
+            for event in group:
+                if event['job_id'] is not None:
+                    job_counts = counts.setdefault(event['job_id'], {})
+                    job_counts[outcome] = job_counts.get(outcome, 0) + 1
+        for job_id, job_counts in counts.items():
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+            delivered = job.get('delivered', 0) + job_counts.get('delivered', 0)
+            failed = job.get('failed', 0) + job_counts.get('failed', 0)
+            fields: Dict[str, Any] = {'delivered': delivered, 'failed': failed}
+            if delivered + failed >= job.get('total', 0):
+                fields['status'] = 'failed' if failed else 'completed'
+            self.jobs.update(job_id, **fields)
+
+    async def close(self, timeout: float = 10.0):
+        """Deliver everything still queued, then stop the workers"""
+        if not self._tasks:
+            return
+        # Stop taking events, but keep the batcher and writers going until every digest is written
+        coalescer, workers = self._tasks[0], self._tasks[1:]
+        coalescer.cancel()
+        await asyncio.gather(coalescer, return_exceptions=True)
+        while not self._events.empty():
+            event = self._events.get_nowait()
+            self._pending.setdefault(event['user_id'], (0.0, []))[1].append(event)
+        await self._release()
+        try:
+            await asyncio.wait_for(self._digests.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Gave up on {self._digests.qsize()} notification digests at shutdown")
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued_events": self._events.qsize(),
+            "open_windows": len(self._pending),
+            "queued_digests": self._digests.qsize(),
+            "queued_batches": self._batches.qsize(),
+            "delivered": self.delivered,
+            "coalesced": self.coalesced,
+            "failed": self.failed
+        }
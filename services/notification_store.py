@@ -0,0 +1,169 @@
+"""
+Firestore notification inbox with per-user unread counters
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from firebase_admin import firestore
+
+from services.pagination import DOCUMENT_ID, CursorKey, cursor_key, document_cursor, encode_cursor
+
+# Firestore allows 500 writes per batch; one is left for the unread counter
+MAX_BATCH_WRITES = 499
+
+
+class NotificationStore:
+    """
+    NotificationService writes notifications to `notifications`; this store
+    reads and marks them. `notification_state/{user_id}` holds the user's
+    unread count and a version that changes on every send or read, so a poll
+    that finds nothing new costs one small document read. The counter of a
+    user whose notifications predate it is backfilled from a count of their
+    unread notifications the first time their state is read.
+
+    All methods are blocking; run them on an executor.
+    """
+
+    def __init__(
+        self,
+        db=None,
+        collection: str = 'notifications',
+        state_collection: str = 'notification_state',
+        client: Optional[Callable[[], Any]] = None
+    ):
+        self._db = db
+        self._client = client or firestore.client
+        self.collection = collection
+        self.state_collection = state_collection
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = self._client()
+        return self._db
+
+    def _state_ref(self, user_id: str):
+        return self.db.collection(self.state_collection).document(user_id)
+
+    def add_unread(self, unread: Dict[str, int]):
+        """Count newly sent notifications against each recipient's unread counter"""
+        user_ids = list(unread)
+        for start in range(0, len(user_ids), MAX_BATCH_WRITES):
+            batch = self.db.batch()
+            for user_id in user_ids[start:start + MAX_BATCH_WRITES]:
+                batch.set(self._state_ref(user_id), {
+                    'unread': firestore.Increment(unread[user_id]),
+                    'version': firestore.Increment(1)
+                }, merge=True)
+            batch.commit()
+
+    def state(self, user_id: str) -> Dict[str, int]:
+        snapshot = self._state_ref(user_id).get()
+        data = snapshot.to_dict() if snapshot.exists else {}
+        if not data.get('counted'):
+            data = self._backfill(user_id)
+        return {'unread': max(data.get('unread', 0), 0), 'version': data.get('version', 0)}
+
+    def _backfill(self, user_id: str) -> Dict[str, Any]:
+        """Set the unread counter from the notifications themselves"""
+        state_ref = self._state_ref(user_id)
+        unread_query = self.db.collection(self.collection) \
+            .where('user_id', '==', user_id).where('read', '==', False)
+
+        @firestore.transactional
+        def backfill(transaction) -> Dict[str, Any]:
+            snapshot = state_ref.get(transaction=transaction)
+            data = snapshot.to_dict() if snapshot.exists else {}
+            if data.get('counted'):
+                return data
+            # Counted in the transaction, so sends and reads made meanwhile make it retry
+            unread = unread_query.count().get(transaction=transaction)[0][0].value
+            data = {'unread': unread, 'version': data.get('version', 0) + 1, 'counted': True}
+            transaction.set(state_ref, data, merge=True)
+            return data
+
+        return backfill(self.db.transaction())
+
+    def list(self, user_id: str, limit: int, since: Optional[CursorKey] = None) -> List[Dict[str, Any]]:
+        """Newest notifications first, or with `since`, everything after that key in creation order"""
+        collection = self.db.collection(self.collection)
+        direction = firestore.Query.ASCENDING if since is not None else firestore.Query.DESCENDING
+        # Ordered by document id rather than a stored id field, which older notifications lack
+        query = collection.where('user_id', '==', user_id) \
+            .order_by('created_at', direction=direction).order_by(DOCUMENT_ID, direction=direction)
+        if since is not None:
+            query = query.start_after(document_cursor(collection, since))
+        return [{**snapshot.to_dict(), 'id': snapshot.id} for snapshot in query.limit(limit).stream()]
+
+    def poll(self, user_id: str, limit: int, since: Optional[CursorKey] = None,
+             if_none_match: Optional[str] = None) -> Tuple[Dict[str, str], Optional[Dict[str, Any]]]:
+        """
+        Response headers and body for a notification poll. The body is None
+        when `if_none_match` matches the current ETag, i.e. nothing changed.
+        """
+        state = self.state(user_id)
+        etag = f'W/"{state["version"]}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if if_none_match == etag:
+            return headers, None
+
+        notifications = self.list(user_id, limit + 1, since)
+        has_more = len(notifications) > limit
+        notifications = notifications[:limit]
+        # `cursor` is what to send as `since` on the next poll
+        if since is not None:
+            cursor = encode_cursor(cursor_key(notifications[-1]) if notifications else since)
+        else:
+            cursor = encode_cursor(cursor_key(notifications[0])) if notifications else None
+        return headers, {
+            "notifications": notifications,
+            "unread_count": state['unread'],
+            "cursor": cursor,
+            "has_more": has_more
+        }
+
+    def mark_read(self, user_id: str, notification_id: str) -> bool:
+        """Mark one of the user's notifications read; False if it is not theirs or does not exist"""
+        ref = self.db.collection(self.collection).document(notification_id)
+        state_ref = self._state_ref(user_id)
+
+        @firestore.transactional
+        def mark(transaction) -> bool:
+            snapshot = ref.get(transaction=transaction)
+            if not snapshot.exists or snapshot.get('user_id') != user_id:
+                return False
+            if not snapshot.get('read'):
+                transaction.update(ref, {'read': True, 'read_at': datetime.now().isoformat()})
+                transaction.set(state_ref, {
+                    'unread': firestore.Increment(-1),
+                    'version': firestore.Increment(1)
+                }, merge=True)
+            return True
+
+        return mark(self.db.transaction())
+
+    def mark_all_read(self, user_id: str, notification_ids: Optional[List[str]] = None) -> int:
+        """Mark the given notifications, or all unread ones, read; returns how many changed"""
+        collection = self.db.collection(self.collection)
+        if notification_ids is None:
+            query = collection.where('user_id', '==', user_id).where('read', '==', False)
+            snapshots = list(query.stream())
+        else:
+            snapshots = [
+                snapshot for snapshot in self.db.get_all([collection.document(i) for i in set(notification_ids)])
+                if snapshot.exists and snapshot.get('user_id') == user_id and not snapshot.get('read')
+            ]
+
+        read_at = datetime.now().isoformat()
+        for start in range(0, len(snapshots), MAX_BATCH_WRITES):
+            chunk = snapshots[start:start + MAX_BATCH_WRITES]
+            batch = self.db.batch()
+            for snapshot in chunk:
+                batch.update(snapshot.reference, {'read': True, 'read_at': read_at})
+            batch.set(self._state_ref(user_id), {
+                'unread': firestore.Increment(-len(chunk)),
+                'version': firestore.Increment(1)
+            }, merge=True)
+            batch.commit()
+        return len(snapshots)
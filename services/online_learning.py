@@ -0,0 +1,297 @@
+"""
+Online learning from admin corrections
+
+Admins who change a complaint's category or priority produce labeled
+examples. `CorrectionFeed` collects them and applies them in micro-batches
+through `partial_fit`, so the classifier keeps improving without a full
+retrain.
+"""
+
+import asyncio
+import math
+import os
+import pickle
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+LABELS = ('category', 'priority')
+
+_token = re.compile(r'\w+')
+
+
+def _value(value: Any) -> Any:
+    return getattr(value, 'value', value)
+
+
+def correction_example(complaint: Dict[str, Any], changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Labeled example for the category/priority an update changed, or None if it changed neither"""
+    labels = {
+        label: _value(changes[label]) for label in LABELS
+        if changes.get(label) is not None and _value(changes[label]) != _value(complaint.get(label))
+    }
+    if not labels:
+        return None
+    return {
+        'title': changes.get('title', complaint.get('title', '')),
+        'description': changes.get('description', complaint.get('description', '')),
+        **labels
+    }
+
+
+class HashedSGDClassifier:
+    """
+    Multinomial logistic regression over hashed word and word-pair features.
+
+    Features are hashed into `n_features` buckets with CRC32 (stable across
+    processes) and a sign bit, so no vocabulary is kept and new words need no
+    refit. Weights are sparse and updated one example at a time by SGD in
+    `partial_fit`; classes are added as they first appear.
+
+    There is no intercept unless `fit_intercept` is set: with one, the share
+    of each class among the examples becomes a prior, and text sharing no
+    words with them would still get the majority class confidently.
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, learning_rate: float = 0.5, l2: float = 1e-4,
+                 fit_intercept: bool = False):
+        self.n_features = n_features
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.fit_intercept = fit_intercept
+        self.classes: List[str] = []
+        self.class_counts: Dict[str, int] = {}
+        self._weights: Dict[str, Dict[int, float]] = {}
+        self._bias: Dict[str, float] = {}
+        self.examples_seen = 0
+
+    def features(self, text: str) -> Dict[int, float]:
+        tokens = _token.findall(text.lower())
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        vector: Dict[int, float] = {}
+        for gram in grams:
+            h = zlib.crc32(gram.encode())
+            index = h % self.n_features
+            vector[index] = vector.get(index, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {index: value / norm for index, value in vector.items() if value} if norm else {}
+
+    def _scores(self, x: Dict[int, float]) -> Dict[str, float]:
+        scores = {}
+        for label in self.classes:
+            weights = self._weights[label]
+            scores[label] = self._bias[label] + sum(weights.get(index, 0.0) * value for index, value in x.items())
+        return scores
+
+    def _probabilities(self, x: Dict[int, float], reference: bool = False) -> Dict[str, float]:
+        """Softmax over the classes, plus a fixed zero-score reference class when `reference` is set"""
+        scores = self._scores(x)
+        top = max(max(scores.values()), 0.0) if reference else max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exps.values()) + (math.exp(-top) if reference else 0.0)
+        return {label: value / total for label, value in exps.items()}
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        if not self.classes:
+            return {}
+        return self._probabilities(self.features(text))
+
+    def predict(self, text: str) -> Optional[Tuple[str, float]]:
+        """(label, probability) of the most likely class, or None before any training"""
+        probabilities = self.predict_proba(text)
+        if not probabilities:
+            return None
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    def partial_fit(self, texts: List[str], labels: List[str]):
+        for text, label in zip(texts, labels):
+            if label not in self._weights:
+                self.classes.append(label)
+                self._weights[label] = {}
+                self._bias[label] = 0.0
+            self.class_counts[label] = self.class_counts.get(label, 0) + 1
+            x = self.features(text)
+            # Trained against a reference class, so examples still teach something
+            # while only one class has been seen
+            probabilities = self._probabilities(x, reference=True)
+            for cls in self.classes:
+                gradient = probabilities[cls] - (1.0 if cls == label else 0.0)
+                weights = self._weights[cls]
+                for index, value in x.items():
+                    weight = weights.get(index, 0.0)
+                    weights[index] = weight - self.learning_rate * (gradient * value + self.l2 * weight)
+                if self.fit_intercept:
+                    self._bias[cls] -= self.learning_rate * gradient
+            self.examples_seen += 1
+
+
+class CorrectionModel:
+    """
+    Category and priority classifiers learned only from corrections.
+
+    A head offers predictions once it has seen `min_examples` corrections
+    covering at least two classes with `min_class_examples` each, and only
+    for one of those classes. A prediction is used only when its probability
+    reaches `threshold` and beats the main model's own confidence; otherwise
+    the main model's answer stands.
+    """
+
+    def __init__(self, min_examples: int = 20, threshold: float = 0.6, min_class_examples: int = 5,
+                 **classifier_options: Any):
+        self.min_examples = min_examples
+        self.threshold = threshold
+        self.min_class_examples = min_class_examples
+        self.heads = {label: HashedSGDClassifier(**classifier_options) for label in LABELS}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def save(self, path: str):
+        """Pickle the model to `path`, replacing the previous file only once the new one is complete"""
+        with self._lock:
+            data = pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+        partial_path = path + '.partial'
+        with open(partial_path, 'wb') as f:
+            f.write(data)
+        os.replace(partial_path, path)
+
+    @staticmethod
+    def load(path: str) -> "CorrectionModel":
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    @staticmethod
+    def text(title: str, description: str) -> str:
+        return f"{title or ''} {description or ''}"
+
+    def partial_fit(self, examples: List[Dict[str, Any]]):
+        with self._lock:
+            for label, head in self.heads.items():
+                labeled = [example for example in examples if example.get(label)]
+                if labeled:
+                    head.partial_fit(
+                        [self.text(example.get('title', ''), example.get('description', '')) for example in labeled],
+                        [example[label] for example in labeled]
+                    )
+
+    def predict(self, label: str, title: str, description: str,
+                base_confidence: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """(label, probability) to use instead of the main model's, or None to keep its answer"""
+        head = self.heads[label]
+        with self._lock:
+            if head.examples_seen < self.min_examples:
+                return None
+            trusted = {cls for cls, count in head.class_counts.items() if count >= self.min_class_examples}
+            # With a single class every prediction would be that class at probability 1
+            if len(trusted) < 2:
+                return None
+            prediction = head.predict(self.text(title, description))
+        if prediction is None or prediction[0] not in trusted:
+            return None
+        if prediction[1] < max(self.threshold, base_confidence or 0.0):
+            return None
+        return prediction
+
+    def stats(self) -> Dict[str, Any]:
+        return {label: {"examples": head.examples_seen, "classes": dict(head.class_counts)}
+                for label, head in self.heads.items()}
+
+
+class CorrectionFeed:
+    """
+    Buffers labeled examples and hands them to `apply` in micro-batches.
+
+    A batch goes out every `flush_interval` seconds, or sooner once
+    `batch_size` examples are waiting. At most `max_pending` examples are
+    kept; beyond that the oldest are dropped. A failed batch is dropped and
+    counted rather than retried, since newer corrections keep arriving.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        batch_size: int = 32,
+        flush_interval: float = 30.0,
+        max_pending: int = 10000
+    ):
+        self._apply = apply
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Deque[Dict[str, Any]] = deque(maxlen=max_pending)
+        self._flush_needed = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.received = 0
+        self.applied = 0
+        self.batches = 0
+        self.failed = 0
+        self.last_applied_at: Optional[float] = None
+
+    def add(self, example: Dict[str, Any]):
+        self._pending.append(example)
+        self.received += 1
+        if len(self._pending) >= self.batch_size:
+            self._flush_needed.set()
+
+    def start(self):
+        """Start the periodic flush task"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_needed.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_needed.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Apply everything waiting, one batch at a time"""
+        async with self._flush_lock:
+            while self._pending:
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                try:
+                    await self._apply(batch)
+                except Exception as e:
+                    self.failed += len(batch)
+                    print(f"Applying {len(batch)} corrections failed: {e}")
+                    continue
+                self.applied += len(batch)
+                self.batches += 1
+                self.last_applied_at = time.time()
+
+    async def close(self):
+        """Stop the flush task and apply what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "received": self.received,
+            "applied": self.applied,
+            "batches": self.batches,
+            "failed": self.failed,
+            "dropped": self.received - self.applied - self.failed - len(self._pending),
+            "last_applied_at": self.last_applied_at
+        }
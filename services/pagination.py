@@ -0,0 +1,61 @@
+"""
+Opaque keyset cursors for paging through complaints
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Complaints are paged in (created_at, id) order
+CursorKey = Tuple[str, str]
+
+# Firestore's name for the document id in orderings and cursors
+DOCUMENT_ID = '__name__'
+
+
+def cursor_key(complaint: Dict[str, Any]) -> CursorKey:
+    created_at = complaint.get('created_at') or ''
+    if not isinstance(created_at, str):
+        created_at = created_at.isoformat()
+    return (created_at, complaint['id'])
+
+
+def document_cursor(collection, key: CursorKey):
+    """
+    Firestore start_after cursor for a key in a (created_at, __name__) ordering.
+
+    The cursor document's own snapshot carries created_at in the type it is
+    stored as; the key's ISO string is only used if it has been deleted.
+    """
+    snapshot = collection.document(key[1]).get()
+    if snapshot.exists:
+        return snapshot
+    return {'created_at': key[0], DOCUMENT_ID: key[1]}
+
+
+def encode_cursor(key: CursorKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> CursorKey:
+    """Turn a cursor back into its key; raises ValueError for anything malformed"""
+    try:
+        created_at, complaint_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(created_at, str) or not isinstance(complaint_id, str):
+        raise ValueError("Invalid cursor")
+    return (created_at, complaint_id)
+
+
+def complaint_page(complaints: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    """
+    Build a page from up to `limit + 1` complaints.
+
+    Fetching one extra row tells whether another page exists without a count query.
+    """
+    next_cursor: Optional[str] = None
+    if len(complaints) > limit:
+        complaints = complaints[:limit]
+        next_cursor = encode_cursor(cursor_key(complaints[-1]))
+    return {"complaints": complaints, "next_cursor": next_cursor}
@@ -0,0 +1,43 @@
+"""
+Opt-in cProfile breakdown of a single request
+"""
+
+import cProfile
+import io
+import pstats
+from typing import Optional
+
+
+class RequestProfiler:
+    """
+    Profiles the event-loop thread while one request is handled.
+
+    cProfile sees every coroutine that runs on the thread in that window, so
+    other concurrent requests can show up in the report. Only one request is
+    profiled at a time; `start` returns False while another is in progress.
+    """
+
+    _active = False
+
+    def __init__(self):
+        self._profile: Optional[cProfile.Profile] = None
+
+    def start(self) -> bool:
+        if RequestProfiler._active:
+            return False
+        RequestProfiler._active = True
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        return True
+
+    def stop(self):
+        if self._profile is not None:
+            self._profile.disable()
+            RequestProfiler._active = False
+
+    def report(self, limit: int = 40, sort: str = 'cumulative') -> str:
+        if self._profile is None:
+            return ''
+        output = io.StringIO()
+        pstats.Stats(self._profile, stream=output).strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
@@ -0,0 +1,299 @@
+"""
+Chat session registry and message bus shared across workers
+
+`InProcessSessionBackend` keeps everything in this process. `RedisSessionBackend`
+stores sessions and fans messages out through any server that speaks the Redis
+protocol (RESP), so every uvicorn worker and node sees the same sessions and
+receives messages published for its users.
+"""
+
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+
+class Subscription(ABC):
+    """Async iterator over messages published to one channel"""
+
+    def __init__(self, channel: str):
+        self.channel = channel
+
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self
+
+    @abstractmethod
+    async def __anext__(self) -> Dict[str, Any]:
+        """The next message; raises StopAsyncIteration once the subscription ends"""
+
+    async def close(self):
+        pass
+
+
+class InProcessSubscription(Subscription):
+    def __init__(self, backend: "InProcessSessionBackend", channel: str, max_pending: int):
+        super().__init__(channel)
+        self._backend = backend
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(max_pending)
+
+    async def __anext__(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+    async def close(self):
+        self._backend._subscribers.get(self.channel, set()).discard(self)
+
+
+class InProcessSessionBackend:
+    """Session registry and message bus for a single process"""
+
+    def __init__(self, session_ttl: float = 3600.0, max_pending: int = 100):
+        self.session_ttl = session_ttl
+        self.max_pending = max_pending
+        self._sessions: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._user_sessions: Dict[str, Set[str]] = {}
+        self._subscribers: Dict[str, Set[InProcessSubscription]] = {}
+        self._leases: Dict[str, Tuple[float, str]] = {}
+
+    async def register_session(self, session: Dict[str, Any]):
+        """Create or refresh a session; it expires after `session_ttl` without activity"""
+        self._sessions[session['session_id']] = (time.time() + self.session_ttl, session)
+        self._user_sessions.setdefault(session['user_id'], set()).add(session['session_id'])
+
+    async def get_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+        now = time.time()
+        sessions = []
+        for session_id in list(self._user_sessions.get(user_id, ())):
+            entry = self._sessions.get(session_id)
+            if entry is None or entry[0] <= now:
+                self._sessions.pop(session_id, None)
+                self._user_sessions[user_id].discard(session_id)
+                continue
+            sessions.append(entry[1])
+        return sessions
+
+    async def remove_session(self, session_id: str, user_id: str):
+        self._sessions.pop(session_id, None)
+        self._user_sessions.get(user_id, set()).discard(session_id)
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        for subscription in list(self._subscribers.get(channel, ())):
+            # A subscriber that has fallen too far behind loses messages rather than memory
+            if not subscription.queue.full():
+                subscription.queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> Subscription:
+        subscription = InProcessSubscription(self, channel, self.max_pending)
+        self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew the lease `name` for `owner` for `ttl` seconds; False while someone else holds it"""
+        now = time.time()
+        expires_at, holder = self._leases.get(name, (0.0, owner))
+        if holder != owner and expires_at > now:
+            return False
+        self._leases[name] = (now + ttl, owner)
+        return True
+
+    async def close(self):
+        pass
+
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+class RespConnection:
+    """
+    Minimal client for the Redis serialization protocol.
+
+    Commands run one round-trip at a time. A command interrupted between
+    sending and reading its reply (e.g. cancelled) closes the connection,
+    since the unread reply would otherwise be taken as the next command's.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._lock = asyncio.Lock()
+        self.closed = False
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> "RespConnection":
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    @staticmethod
+    def encode(*args: Any) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def read_reply(self) -> Any:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RespError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self.reader.readexactly(length + 2)
+            return data[:-2].decode()
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self.read_reply() for _ in range(length)]
+        raise RespError(f"Unexpected reply: {line!r}")
+
+    async def execute(self, *args: Any) -> Any:
+        async with self._lock:
+            if self.closed:
+                raise ConnectionError("Connection is closed")
+            try:
+                self.writer.write(self.encode(*args))
+                await self.writer.drain()
+                return await self.read_reply()
+            except RespError:
+                raise
+            except BaseException:
+                self.closed = True
+                self.writer.close()
+                raise
+
+    async def close(self):
+        self.closed = True
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except Exception:
+            pass
+
+
+class RedisSubscription(Subscription):
+    def __init__(self, connection: RespConnection, channel: str):
+        super().__init__(channel)
+        self._connection = connection
+
+    async def __anext__(self) -> Dict[str, Any]:
+        while True:
+            try:
+                reply = await self._connection.read_reply()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise StopAsyncIteration
+            if isinstance(reply, list) and len(reply) == 3 and reply[0] == "message":
+                return json.loads(reply[2])
+
+    async def close(self):
+        await self._connection.close()
+
+
+class RedisSessionBackend:
+    """Session registry and message bus backed by a Redis-protocol server"""
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0,
+                 session_ttl: float = 3600.0, prefix: str = "chat"):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.session_ttl = int(session_ttl)
+        self.prefix = prefix
+        self._connection: Optional[RespConnection] = None
+        self._connect_lock = asyncio.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> "RedisSessionBackend":
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(parsed.hostname or "localhost", parsed.port or 6379, db, **kwargs)
+
+    async def _open(self) -> RespConnection:
+        connection = await RespConnection.connect(self.host, self.port)
+        if self.db:
+            await connection.execute("SELECT", self.db)
+        return connection
+
+    async def _execute(self, *args: Any) -> Any:
+        async with self._connect_lock:
+            if self._connection is None or self._connection.closed:
+                # A broken or interrupted connection is replaced on the next call
+                self._connection = await self._open()
+            connection = self._connection
+        return await connection.execute(*args)
+
+    def _session_key(self, session_id: str) -> str:
+        return f"{self.prefix}:session:{session_id}"
+
+    def _user_key(self, user_id: str) -> str:
+        return f"{self.prefix}:user_sessions:{user_id}"
+
+    async def register_session(self, session: Dict[str, Any]):
+        """Create or refresh a session; it expires after `session_ttl` without activity"""
+        user_key = self._user_key(session['user_id'])
+        await self._execute("SET", self._session_key(session['session_id']), json.dumps(session, default=str),
+                            "EX", self.session_ttl)
+        await self._execute("SADD", user_key, session['session_id'])
+        await self._execute("EXPIRE", user_key, self.session_ttl)
+
+    async def get_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+        session_ids = await self._execute("SMEMBERS", self._user_key(user_id)) or []
+        if not session_ids:
+            return []
+        values = await self._execute("MGET", *[self._session_key(session_id) for session_id in session_ids])
+        sessions = []
+        for session_id, value in zip(session_ids, values):
+            if value is None:
+                await self._execute("SREM", self._user_key(user_id), session_id)
+            else:
+                sessions.append(json.loads(value))
+        return sessions
+
+    async def remove_session(self, session_id: str, user_id: str):
+        await self._execute("DEL", self._session_key(session_id))
+        await self._execute("SREM", self._user_key(user_id), session_id)
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        await self._execute("PUBLISH", f"{self.prefix}:{channel}", json.dumps(message, default=str))
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew the lease `name` for `owner` for `ttl` seconds; False while someone else holds it"""
+        key = f"{self.prefix}:lease:{name}"
+        if await self._execute("SET", key, owner, "NX", "EX", max(int(ttl), 1)) == "OK":
+            return True
+        # Renewed by the holder well before it expires, so the lease cannot change
+        # hands between these two commands
+        if await self._execute("GET", key) == owner:
+            await self._execute("EXPIRE", key, max(int(ttl), 1))
+            return True
+        return False
+
+    async def subscribe(self, channel: str) -> Subscription:
+        # A subscribed connection can only receive pushes, so each subscription gets its own
+        connection = await self._open()
+        await connection.execute("SUBSCRIBE", f"{self.prefix}:{channel}")
+        return RedisSubscription(connection, channel)
+
+    async def close(self):
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+def create_session_backend(url: Optional[str] = None, **kwargs: Any):
+    """Build a backend from a URL: empty or "memory" for in-process, "redis://host:port/db" for Redis"""
+    if not url or url == "memory":
+        return InProcessSessionBackend(**kwargs)
+    if url.startswith("redis://"):
+        return RedisSessionBackend.from_url(url, **kwargs)
+    raise ValueError(f"Unsupported session backend: {url}")
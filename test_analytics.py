@@ -0,0 +1,92 @@
+"""
+Tests for the incrementally maintained complaint analytics
+"""
+
+from services.analytics import AnalyticsScan, ComplaintAnalyticsAggregator
+
+
+def complaint(status="pending", category="technical", priority="high", escalation_level=0, day="2024-05-01"):
+    return {
+        'status': status,
+        'category': category,
+        'priority': priority,
+        'escalation_level': escalation_level,
+        'created_at': f"{day}T10:00:00"
+    }
+
+
+def test_record_create_update_and_escalate():
+    analytics = ComplaintAnalyticsAggregator()
+    first, second = complaint(), complaint(category="billing", day="2024-05-02")
+    analytics.record(None, first)
+    analytics.record(None, second)
+    analytics.record(first, {**first, 'status': "resolved"})
+    analytics.record(second, {**second, 'escalation_level': 1})
+
+    snapshot = analytics.snapshot()
+    assert snapshot['total_complaints'] == 2
+    assert snapshot['by_status'] == {"pending": 1, "resolved": 1}
+    assert snapshot['by_category'] == {"technical": 1, "billing": 1}
+    assert snapshot['by_escalation_level'] == {"0": 1, "1": 1}
+    assert snapshot['by_day'] == {"2024-05-01": 1, "2024-05-02": 1}
+
+
+def test_reconcile_matches_incremental_counts():
+    complaints = [complaint(status=s, priority=p) for s in ("pending", "closed") for p in ("low", "high")]
+    incremental = ComplaintAnalyticsAggregator()
+    for item in complaints:
+        incremental.record(None, item)
+
+    rebuilt = ComplaintAnalyticsAggregator()
+    rebuilt.record(None, complaint(category="other"))  # drift that the full scan corrects
+    rebuilt.reconcile(complaints)
+
+    assert rebuilt.reconciled_at is not None
+    for key in ('total_complaints', 'by_status', 'by_category', 'by_priority', 'by_day'):
+        assert rebuilt.snapshot()[key] == incremental.snapshot()[key]
+
+
+def test_changes_recorded_during_a_scan_survive_reconcile():
+    analytics = ComplaintAnalyticsAggregator()
+    first = {**complaint(), 'id': "a"}
+    second = {**complaint(category="billing"), 'id': "b"}
+    analytics.record(None, first)
+    analytics.record(None, second)
+
+    analytics.begin_reconcile()
+    scanned = [first, second]  # read before the changes below
+    resolved = {**first, 'status': "resolved"}
+    analytics.record(first, resolved)
+    analytics.record(second, None)
+    created = {**complaint(priority="low"), 'id': "c"}
+    analytics.record(None, created)
+    analytics.reconcile(scanned)
+
+    snapshot = analytics.snapshot()
+    assert snapshot['total_complaints'] == 2
+    assert snapshot['by_status'] == {"resolved": 1, "pending": 1}
+    assert snapshot['by_category'] == {"technical": 2}
+    assert snapshot['by_priority'] == {"high": 1, "low": 1}
+
+    # Journaling stops with the reconcile
+    analytics.record(created, {**created, 'status': "closed"})
+    analytics.reconcile([resolved, created])
+    assert analytics.snapshot()['by_status'] == {"resolved": 1, "pending": 1}
+
+
+def test_reconcile_from_a_scan_folded_page_by_page():
+    pages = [
+        [{**complaint(status="pending"), 'id': "a", 'description': "x" * 1000}],
+        [{**complaint(status="closed", day="2024-05-03"), 'id': "b"}, complaint(category="other")],
+    ]
+    scan = AnalyticsScan()
+    for page in pages:
+        scan.add(page)
+    assert scan.by_id["a"] == ("pending", "technical", "high", 0, "2024-05-01")
+
+    analytics = ComplaintAnalyticsAggregator()
+    analytics.reconcile(scan)
+    snapshot = analytics.snapshot()
+    assert snapshot['total_complaints'] == 3
+    assert snapshot['by_status'] == {"pending": 2, "closed": 1}
+    assert snapshot['by_day'] == {"2024-05-01": 2, "2024-05-03": 1}
@@ -0,0 +1,70 @@
+"""
+Tests for the benchmark helpers, corpus generator and Firebase stand-in
+"""
+
+import asyncio
+
+from benchmarks.classifier_bench import benchmark_module, compare as compare_cases
+from benchmarks.corpus import generate_corpus
+from benchmarks.firebase_standin import StandInFirebaseService
+from benchmarks.load_test import compare, percentile
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(n) for n in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.95) == 0.0
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {'results': {
+        'fast': {'status': 'ok', 'rps': 500.0, 'p95_ms': 40.0, 'p99_ms': 60.0, 'rss_peak_mb': 50.0},
+        'main': {'status': 'skipped', 'reason': "no firebase"},
+    }}
+    results = {'results': {
+        'fast': {'status': 'ok', 'rps': 400.0, 'p95_ms': 44.0, 'p99_ms': 90.0, 'rss_peak_mb': 51.0},
+        'main': {'status': 'ok', 'rps': 1.0, 'p95_ms': 1000.0, 'p99_ms': 1000.0, 'rss_peak_mb': 1.0},
+    }}
+    assert compare(results, baseline, 0.15) == ["fast: p99_ms 60.0 -> 90.0", "fast: rps 500.0 -> 400.0"]
+
+
+def test_stand_in_stores_complaints_in_its_firestore():
+    async def scenario():
+        service = StandInFirebaseService()
+        created = [await service.create_complaint({'user_id': "u1", 'title': str(n)}) for n in range(3)]
+        await service.update_complaint(created[0]['id'], {'status': "resolved"})
+        listed = await service.get_all_complaints({'user_id': "u1"}, 2)
+        admin = await service.get_user("admin_1")
+        return service, created, listed, admin
+
+    service, created, listed, admin = asyncio.run(scenario())
+    assert [c['title'] for c in listed] == ["2", "1"]
+    stored = service.db.collection('complaints').document(created[0]['id']).get().to_dict()
+    assert stored['status'] == "resolved"
+    assert admin['role'] == "admin"
+
+
+def test_corpus_is_reproducible_and_honours_density():
+    keywords = ["refund", "error"]
+    corpus = generate_corpus(50, keywords, length=(20, 20), keyword_density=0.5, seed=7)
+    assert corpus == generate_corpus(50, keywords, length=(20, 20), keyword_density=0.5, seed=7)
+    assert corpus != generate_corpus(50, keywords, length=(20, 20), keyword_density=0.5, seed=8)
+    assert all(len(text.split()) == 20 for text in corpus)
+
+    words = " ".join(corpus).lower().replace(".", "").split()
+    share = sum(word in keywords for word in words) / len(words)
+    assert 0.4 < share < 0.6
+    assert not any(word in keywords for word in " ".join(generate_corpus(20, keywords, keyword_density=0)).split())
+
+
+def test_classifier_bench_covers_fast_backend():
+    import main_fast
+
+    cases = benchmark_module(main_fast, size=5, rounds=1, seed=1)
+    assert {case.split("/")[0] for case in cases} == {"single", "batch"}
+    assert all(timing['median_ns'] > 0 for timing in cases.values())
+
+    slower = {'results': {'fast': {'cases': {case: {**timing, 'median_ns': timing['median_ns'] * 2}
+                                             for case, timing in cases.items()}}}}
+    assert compare_cases(slower, {'results': {'fast': {'cases': cases}}}, 0.1)
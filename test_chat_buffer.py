@@ -0,0 +1,100 @@
+"""
+Tests for the write-behind chat transcript buffer
+"""
+
+import asyncio
+
+import pytest
+
+from services.chat_buffer import ChatTranscriptBuffer
+
+
+def test_flush_writes_each_session_in_order():
+    async def scenario():
+        saved = []
+
+        async def save(messages):
+            await asyncio.sleep(0)
+            saved.append(messages)
+
+        buffer = ChatTranscriptBuffer(save, write_batch_size=5)
+        for turn in range(3):
+            for session_id in ("a", "b"):
+                buffer.add(session_id, [
+                    {'session_id': session_id, 'message': f"user {turn}"},
+                    {'session_id': session_id, 'message': f"bot {turn}"}
+                ])
+        assert buffer.stats()["buffered_messages"] == 12
+        await buffer.flush()
+        assert buffer.stats()["buffered_messages"] == 0
+        return saved
+
+    batches = asyncio.run(scenario())
+    assert [len(batch) for batch in batches] == [5, 5, 2]
+    saved = [message for batch in batches for message in batch]
+    for session_id in ("a", "b"):
+        messages = [m['message'] for m in saved if m['session_id'] == session_id]
+        assert messages == [f"{role} {turn}" for turn in range(3) for role in ("user", "bot")]
+
+
+def test_failed_write_is_retried_before_newer_messages():
+    async def scenario():
+        saved = []
+        failures = {"first": 1}
+
+        async def save(messages):
+            for message in messages:
+                if failures.get(message['message']):
+                    failures[message['message']] -= 1
+                    raise RuntimeError("store unavailable")
+            saved.extend(message['message'] for message in messages)
+
+        buffer = ChatTranscriptBuffer(save, write_batch_size=1)
+        buffer.add("a", [{'message': "first"}, {'message': "second"}])
+        await buffer.flush()
+        assert saved == []
+        buffer.add("a", [{'message': "third"}])
+        await buffer.close()
+        return saved, buffer.stats()
+
+    saved, stats = asyncio.run(scenario())
+    assert saved == ["first", "second", "third"]
+    assert stats["failed"] == 1
+    assert stats["dropped"] == 0
+
+
+def test_size_threshold_triggers_background_flush():
+    async def scenario():
+        saved = []
+
+        async def save(messages):
+            saved.extend(messages)
+
+        buffer = ChatTranscriptBuffer(save, max_batch=2, flush_interval=60)
+        buffer.start()
+        buffer.add("a", [{'message': "user"}, {'message': "bot"}])
+        await asyncio.sleep(0.01)
+        count = len(saved)
+        await buffer.close()
+        return count
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_store_writes_a_batch_in_one_commit():
+    pytest.importorskip("firebase_admin")
+    from benchmarks.firestore_standin import StandInFirestore
+    from services.chat_store import ChatMessageStore
+
+    db = StandInFirestore()
+    commits = []
+    batch = db.batch
+    db.batch = lambda: commits.append(1) or batch()
+    store = ChatMessageStore(db)
+    ids = store.save_batch([{'session_id': "s", 'message': str(n), 'timestamp': n} for n in range(3)])
+
+    assert len(commits) == 1
+    stored = [db.collection('chat_messages').document(id).get().to_dict() for id in ids]
+    assert [message['message'] for message in stored] == ["0", "1", "2"]
+    # Stored as set when the turn happened, not when the batch was written
+    assert [message['timestamp'] for message in stored] == [0, 1, 2]
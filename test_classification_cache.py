@@ -0,0 +1,43 @@
+"""
+Tests for the classification memoization cache
+"""
+
+from services.classification_cache import MISSING, ClassificationCache, content_hash
+
+
+def test_normalized_text_shares_an_entry():
+    assert content_hash("Payment  FAILED\n", "x") == content_hash("payment failed", "X ")
+    assert content_hash("a", "b c") != content_hash("a b", "c")
+
+    cache = ClassificationCache()
+    cache.set(cache.key("categorize", "Login broken"), ("account", 0.9))
+    assert cache.get(cache.key("categorize", "  login   BROKEN ")) == ("account", 0.9)
+    assert cache.get(cache.key("prioritize", "login broken")) is MISSING
+    assert cache.hit_rates() == {"categorize": 1.0, "prioritize": 0.0}
+
+
+def test_invalidate_drops_results_of_the_old_model():
+    cache = ClassificationCache()
+    stale_key = cache.key("categorize", "text")
+    cache.set(stale_key, "billing")
+
+    cache.invalidate()
+    assert cache.model_version == 1 and len(cache._cache) == 0
+    # A result from a call that started before training lands under the old version
+    cache.set(stale_key, "billing")
+    assert cache.get(cache.key("categorize", "text")) is MISSING
+
+    stats = cache.stats()
+    assert stats["model_version"] == 1
+    assert stats["operations"]["categorize"] == {"hits": 0, "misses": 1, "hit_rate": 0.0}
+
+
+def test_returning_to_a_model_version_does_not_revive_old_results():
+    cache = ClassificationCache(model_version="a")
+    stale_key = cache.key("categorize", "text")
+
+    cache.invalidate("b")
+    cache.invalidate("a")
+    # A late result from before the first swap must not be served after rolling back
+    cache.set(stale_key, "billing")
+    assert cache.get(cache.key("categorize", "text")) is MISSING
@@ -0,0 +1,59 @@
+"""
+Tests for the streaming complaint export
+"""
+
+import asyncio
+import csv
+import io
+import json
+
+from services import complaint_export
+from services.complaint_export import csv_export, iter_complaints, ndjson_export
+from services.complaint_store import ComplaintStore
+
+
+def make_store(count):
+    store = ComplaintStore()
+    store.add_many({
+        'id': f"c{n:03d}",
+        'user_id': "u1",
+        'title': f"Complaint {n}",
+        'status': "registered",
+        'created_at': f"2024-01-01T00:{n // 60:02d}:{n % 60:02d}",
+        'tags': ["a", "b"]
+    } for n in range(count))
+    return store
+
+
+def collect(chunks):
+    async def run():
+        return [chunk async for chunk in chunks]
+    return asyncio.run(run())
+
+
+def paged_fetch(store, calls):
+    async def fetch_page(after, limit):
+        calls.append(after)
+        return store.query(limit=limit, descending=True, after=after)
+    return fetch_page
+
+
+def test_ndjson_export_pages_through_store(monkeypatch):
+    monkeypatch.setattr(complaint_export, "CHUNK_SIZE", 200)
+    store, calls = make_store(25), []
+    chunks = collect(ndjson_export(iter_complaints(paged_fetch(store, calls), page_size=10)))
+
+    rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [row['id'] for row in rows] == [c['id'] for c in store.query(descending=True)]
+    assert len(calls) == 3 and calls[0] is None
+    assert len(chunks) > 1
+
+
+def test_csv_export_has_header_and_escapes_formulas():
+    store = make_store(3)
+    store.update("c001", {'title': "=HYPERLINK(\"x\")"})
+    text = "".join(collect(csv_export(iter_complaints(paged_fetch(store, []), page_size=2))))
+
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert [row['id'] for row in rows] == ["c002", "c001", "c000"]
+    assert rows[1]['title'].startswith("'=")
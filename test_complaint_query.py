@@ -0,0 +1,44 @@
+"""
+Tests for keyset-paged complaint queries
+"""
+
+import pytest
+
+pytest.importorskip("firebase_admin")
+
+from benchmarks.firestore_standin import StandInFirestore
+from services.complaint_query import ComplaintQuery
+from services.pagination import cursor_key
+
+
+def store(complaints):
+    db = StandInFirestore()
+    for complaint in complaints:
+        db.collection('complaints').document(complaint.pop('id')).set(complaint)
+    return db
+
+
+def test_pages_newest_first_and_seeks_past_the_cursor():
+    db = store([
+        {'id': f"c{n}", 'user_id': "u1" if n % 2 else "u2", 'created_at': f"2024-01-0{n}T00:00:00"}
+        for n in range(1, 8)
+    ])
+    query = ComplaintQuery(db)
+
+    first = query.page({'user_id': "u1"}, 2)
+    rest = query.page({'user_id': "u1"}, 10, cursor_key(first[-1]))
+
+    assert [c['id'] for c in first] == ["c7", "c5"]
+    assert [c['id'] for c in rest] == ["c3", "c1"]
+
+
+def test_equal_timestamps_are_ordered_by_id_and_deleted_cursors_still_work():
+    db = store([{'id': f"c{n}", 'created_at': "2024-01-01T00:00:00"} for n in range(4)])
+    query = ComplaintQuery(db)
+
+    first = query.page({}, 2)
+    db.collection('complaints').document(first[-1]['id']).delete()
+    rest = query.page({}, 10, cursor_key(first[-1]))
+
+    assert [c['id'] for c in first] == ["c3", "c2"]
+    assert [c['id'] for c in rest] == ["c1", "c0"]
@@ -0,0 +1,54 @@
+"""
+Tests for the indexed demo complaint store
+"""
+
+from services.complaint_store import ComplaintStore
+
+
+def make_complaint(number, user_id="u1", status="registered", category="billing", priority="high"):
+    return {
+        'id': f"c{number}",
+        'user_id': user_id,
+        'status': status,
+        'category': category,
+        'priority': priority,
+        'created_at': f"2024-01-01T00:00:{number:02d}"
+    }
+
+
+def test_query_uses_created_at_order_and_limit():
+    store = ComplaintStore()
+    store.add_many(make_complaint(n) for n in (3, 1, 2))
+    assert [c['id'] for c in store.query({'user_id': 'u1'})] == ['c1', 'c2', 'c3']
+    assert [c['id'] for c in store.query({'user_id': 'u1'}, limit=2, descending=True)] == ['c3', 'c2']
+
+
+def test_query_resumes_after_key():
+    store = ComplaintStore()
+    store.add_many(make_complaint(n) for n in range(1, 6))
+    store.add(make_complaint(6, user_id="u2"))
+    after = ("2024-01-01T00:00:03", "c3")
+    assert [c['id'] for c in store.query({'user_id': 'u1'}, after=after)] == ['c4', 'c5']
+    assert [c['id'] for c in store.query({'user_id': 'u1'}, limit=1, descending=True, after=after)] == ['c2']
+    assert [c['id'] for c in store.query(after=after, descending=True)] == ['c2', 'c1']
+
+
+def test_query_combines_filters():
+    store = ComplaintStore()
+    store.add(make_complaint(1))
+    store.add(make_complaint(2, user_id="u2"))
+    store.add(make_complaint(3, status="resolved"))
+    assert [c['id'] for c in store.query({'user_id': 'u1', 'status': 'registered'})] == ['c1']
+    assert store.query({'user_id': 'nobody'}) == []
+
+
+def test_update_and_delete_keep_indexes_in_sync():
+    store = ComplaintStore()
+    store.add(make_complaint(1))
+    store.update('c1', {'status': 'resolved'})
+    assert store.query({'status': 'registered'}) == []
+    assert store.count('status', 'resolved') == 1
+
+    assert store.delete('c1')
+    assert 'c1' not in store
+    assert store.count('status', 'resolved') == 0
@@ -0,0 +1,86 @@
+"""
+Tests for the escalation scheduler
+"""
+
+import asyncio
+from datetime import datetime
+
+from services.escalation import EscalationScheduler, escalation_deadline
+
+START = datetime(2024, 1, 1, 9, 0).timestamp()
+HOUR = 3600
+
+
+def make_complaint(complaint_id, priority="high", level=0, status="registered"):
+    return {
+        'id': complaint_id,
+        'priority': priority,
+        'status': status,
+        'escalation_level': level,
+        'created_at': datetime.fromtimestamp(START).isoformat()
+    }
+
+
+def test_deadline_follows_priority_and_level():
+    assert escalation_deadline(make_complaint("a", "urgent")) == START + 2 * HOUR
+    assert escalation_deadline(make_complaint("a", "high", level=1)) == START + 16 * HOUR
+    assert escalation_deadline(make_complaint("a", status="resolved")) is None
+    assert escalation_deadline(make_complaint("a", level=3)) is None
+
+
+def test_run_due_only_touches_due_complaints():
+    now = [START]
+    touched = []
+
+    async def escalate(complaint):
+        touched.append(complaint['id'])
+        return {**complaint, 'escalation_level': complaint['escalation_level'] + 1}
+
+    async def scenario():
+        scheduler = EscalationScheduler(escalate, clock=lambda: now[0])
+        scheduler.schedule_many([make_complaint("urgent", "urgent"), make_complaint("low", "low")])
+        scheduler.schedule(make_complaint("closed", "urgent"))
+        scheduler.schedule(make_complaint("closed", "urgent", status="closed"))
+
+        assert await scheduler.run_due() == []
+        now[0] = START + 3 * HOUR
+        assert await scheduler.run_due() == ["urgent"]
+        assert scheduler.next_deadline() == START + 4 * HOUR
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert touched == ["urgent"]
+    assert stats['scheduled'] == 2 and stats['escalated'] == 1
+
+
+def test_failed_escalation_is_retried_later():
+    now = [START + 10 * HOUR]
+
+    async def escalate(complaint):
+        raise RuntimeError("store unavailable")
+
+    async def scenario():
+        scheduler = EscalationScheduler(escalate, tick_interval=60, clock=lambda: now[0])
+        scheduler.schedule(make_complaint("a"))
+        await scheduler.run_due()
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.failed == 1
+    assert scheduler.next_deadline() == now[0] + 60
+
+
+def test_replace_swaps_in_a_fresh_schedule():
+    async def escalate(complaint):
+        return None
+
+    async def scenario():
+        scheduler = EscalationScheduler(escalate)
+        scheduler.schedule(make_complaint("gone"))
+        scheduler.replace([make_complaint("a", "urgent"), make_complaint("b", status="closed")])
+        return scheduler.stats(), scheduler.running
+
+    stats, running = asyncio.run(scenario())
+    assert stats['scheduled'] == 1
+    assert stats['next_deadline'] == START + 2 * HOUR
+    assert not running
@@ -0,0 +1,99 @@
+"""
+Tests for the Server-Sent Events broker
+"""
+
+import asyncio
+
+import pytest
+
+from services.event_stream import EventBroker, TooManyConnections
+
+
+async def take(stream, count):
+    return [await stream.__anext__() for _ in range(count)]
+
+
+def test_events_reach_only_their_user_and_type():
+    async def scenario():
+        broker = EventBroker(instance="w1")
+        mine = broker.stream(broker.subscribe("u1", types={"notification"}), heartbeat=5)
+        firehose = broker.stream(broker.subscribe(None), heartbeat=5)
+        await take(mine, 1)
+        await take(firehose, 1)
+
+        broker.publish("u2", "notification", {'n': 1})
+        broker.publish("u1", "complaint.updated", {'n': 2})
+        broker.publish("u1", "notification", {'n': 3})
+        frames = await take(mine, 1), await take(firehose, 3)
+        broker.close()
+        return frames
+
+    (mine,), firehose = asyncio.run(scenario())
+    assert mine == 'id: w1-3\nevent: notification\ndata: {"n": 3}\n\n'
+    assert [frame.split("\n")[0] for frame in firehose] == ["id: w1-1", "id: w1-2", "id: w1-3"]
+
+
+def test_last_event_id_replays_or_resets():
+    async def scenario():
+        broker = EventBroker(replay_size=2, instance="w1")
+        for n in range(3):
+            broker.publish("u1", "notification", {'n': n})
+        resumed = await take(broker.stream(broker.subscribe("u1", last_event_id="w1-2")), 2)
+        too_old = await take(broker.stream(broker.subscribe("u1", last_event_id="w1-0")), 2)
+        foreign = await take(broker.stream(broker.subscribe("u1", last_event_id="w2-5")), 2)
+        return resumed[1], too_old[1], foreign[1]
+
+    resumed, too_old, foreign = asyncio.run(scenario())
+    assert resumed.startswith("id: w1-3\nevent: notification")
+    assert "event: reset" in too_old and "event: reset" in foreign
+
+
+def test_heartbeat_and_connection_limits():
+    async def scenario():
+        broker = EventBroker(max_connections=2, max_per_user=1)
+        stream = broker.stream(broker.subscribe("u1"), heartbeat=0.01)
+        frames = await take(stream, 2)
+        with pytest.raises(TooManyConnections):
+            broker.subscribe("u1")
+        other = broker.stream(broker.subscribe("u2"), heartbeat=0.01)
+        await take(other, 1)
+        with pytest.raises(TooManyConnections):
+            broker.subscribe("u3")
+        await stream.aclose()
+        return frames, broker.connections
+
+    frames, connections = asyncio.run(scenario())
+    assert frames[1] == ": heartbeat\n\n"
+    assert connections == 1
+
+
+def test_only_running_streams_hold_a_connection():
+    async def scenario():
+        broker = EventBroker(max_connections=1)
+        first, second = broker.subscribe("u1"), broker.subscribe("u2")
+        # A response that never starts its body holds nothing
+        assert broker.connections == 0
+        stream = broker.stream(first)
+        await take(stream, 1)
+        late = [frame async for frame in broker.stream(second)]
+        connections = broker.connections
+        await stream.aclose()
+        return late, connections, broker.connections
+
+    late, connections, after = asyncio.run(scenario())
+    assert late == ["retry: 5000\n\n"]
+    assert connections == 1 and after == 0
+
+
+def test_slow_client_is_disconnected():
+    async def scenario():
+        broker = EventBroker(queue_size=1)
+        stream = broker.stream(broker.subscribe("u1"))
+        await take(stream, 1)
+        broker.publish("u1", "notification", {})
+        broker.publish("u1", "notification", {})
+        return [frame async for frame in stream], broker.stats()
+
+    frames, stats = asyncio.run(scenario())
+    assert frames == []
+    assert stats['dropped_clients'] == 1 and stats['connections'] == 0
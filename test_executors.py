@@ -0,0 +1,43 @@
+"""
+Tests for the bounded executors
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.executors import BoundedExecutor, ExecutorBusy
+
+
+def test_rejects_when_queue_is_full():
+    async def scenario():
+        release = threading.Event()
+        executor = BoundedExecutor("test", ThreadPoolExecutor(1), max_pending=1)
+        first = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(ExecutorBusy):
+            await executor.run(sum, [1, 2])
+        release.set()
+        assert await first is True
+        assert await executor.run(sum, [1, 2]) == 3
+        assert executor.stats()["rejected"] == 1
+        executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_timeout_keeps_slot_until_work_finishes():
+    async def scenario():
+        release = threading.Event()
+        executor = BoundedExecutor("test", ThreadPoolExecutor(1), max_pending=1, timeout=0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(release.wait)
+        assert executor.pending == 1
+        release.set()
+        await asyncio.sleep(0.05)
+        assert executor.pending == 0
+        executor.shutdown()
+
+    asyncio.run(scenario())
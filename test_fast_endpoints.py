@@ -0,0 +1,109 @@
+"""
+Endpoint tests for the fast backend
+"""
+
+import json
+
+from fastapi.testclient import TestClient
+
+import main_fast
+
+client = TestClient(main_fast.app)
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_complaints_batch_streams_per_item_results():
+    response = client.post("/complaints/batch", json=[
+        {"title": "Refund", "description": "Payment failed with an error"},
+        {"title": "Missing description"},
+    ])
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    results = {item["index"]: item for item in read_ndjson(response)}
+    assert results[0]["status"] == "created"
+    assert results[0]["complaint"]["category"] == "billing"
+    assert results[0]["complaint"]["id"] in main_fast.demo_complaints
+    assert results[1]["status"] == "error"
+
+
+def test_complaints_cursor_pagination(monkeypatch):
+    monkeypatch.setattr(main_fast, "demo_complaints", main_fast.ComplaintStore())
+    client.post("/complaints/batch", json=[
+        {"title": f"Complaint {n}", "description": "Internet is slow"} for n in range(5)
+    ])
+
+    seen, cursor = [], None
+    while True:
+        response = client.get("/complaints", params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["complaints"]) <= 2
+        seen.extend(complaint["id"] for complaint in page["complaints"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    expected = [complaint["id"] for complaint in main_fast.demo_complaints.query(descending=True)]
+    assert seen == expected and len(seen) == 5
+    assert client.get("/complaints", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_classify_batch():
+    response = client.post("/ai/classify/batch", json=[{"description": "Cannot login"}])
+    assert response.status_code == 200
+    [result] = read_ndjson(response)
+    assert (result["category"], result["priority"]) == ("account", "high")
+
+
+def test_batch_size_limit(monkeypatch):
+    monkeypatch.setattr(main_fast, "MAX_BATCH_SIZE", 1)
+    response = client.post("/ai/classify/batch", json=[{"description": "a"}, {"description": "b"}])
+    assert response.status_code == 400
+
+
+def test_websocket_reply_as_single_frame():
+    with client.websocket_connect("/ws/chat/demo_user_1") as websocket:
+        websocket.send_text(json.dumps({"message": "hello", "session_id": "s1"}))
+        reply = json.loads(websocket.receive_text())
+    assert reply["session_id"] == "s1"
+    assert reply["message"] == "Hello! How can I assist you today?"
+
+
+def test_websocket_streaming_reply():
+    with client.websocket_connect("/ws/chat/demo_user_1?stream=true") as websocket:
+        websocket.send_text(json.dumps({"message": "help", "session_id": "s1"}))
+        deltas = []
+        while True:
+            frame = json.loads(websocket.receive_text())
+            if frame["type"] == "done":
+                break
+            deltas.append(frame["delta"])
+    assert len(deltas) > 1
+    assert "".join(deltas) == frame["message"]
+
+
+def test_resubmitted_description_is_served_from_cache():
+    main_fast.analysis_cache.invalidate()
+    first = client.post("/complaints", json={"title": "Login", "description": "Cannot login, password rejected"})
+    second = client.post("/complaints", json={"title": "Login", "description": "cannot login, PASSWORD rejected"})
+    assert first.json()["ai_analysis"]["suggestions"] == second.json()["ai_analysis"]["suggestions"]
+    assert client.get("/health").json()["analysis_cache"]["operations"]["analyze"]["hits"] >= 1
+
+
+def test_whitespace_in_phrases_still_counts():
+    # "not working" only matches with a single space, as before the cache
+    assert main_fast.analyze_complaint_description("App is not\nworking")["category"] == "general"
+    assert main_fast.analyze_complaint_description("not  working at all")["category"] == "general"
+    assert main_fast.analyze_complaint_description("App is not working")["category"] == "technical"
+
+
+def test_complaints_do_not_share_cached_suggestions():
+    created = client.post("/complaints", json={"title": "Bug", "description": "Crash on start"}).json()
+    stored = main_fast.demo_complaints.get(created["complaint"]["id"])
+    cached = main_fast.analyze_complaint_description("Crash on start")["suggestions"]
+    assert stored["ai_analysis"]["suggestions"] == cached
+    assert stored["ai_analysis"]["suggestions"] is not cached
@@ -0,0 +1,55 @@
+"""
+Tests for single-call complaint analysis
+"""
+
+from services.fused_analysis import FusedAnalyzer
+from services.micro_batcher import run_batch
+
+
+class SeparateHeads:
+    def __init__(self):
+        self.calls = []
+
+    def categorize_complaint(self, title, description):
+        self.calls.append('categorize')
+        return "billing", 0.9
+
+    def prioritize_complaint(self, title, description, category):
+        self.calls.append('prioritize')
+        return ("high" if category == "billing" else "low"), 0.7
+
+    def get_ai_suggestions(self, complaint):
+        self.calls.append('suggest')
+        return [f"Check {complaint['category']} ({complaint['priority']})"]
+
+    def train_models(self, data):
+        return len(data)
+
+
+class SharedEncoder(SeparateHeads):
+    def analyze(self, title, description, category=None, priority=None):
+        self.calls.append('analyze')
+        return {'category': category or "account", 'category_confidence': 0.95,
+                'priority': priority or "urgent", 'priority_confidence': 0.9, 'suggestions': []}
+
+
+def test_composes_separate_calls():
+    service = SeparateHeads()
+    analysis = FusedAnalyzer(service).analyze("Refund", "Charged twice")
+    assert analysis == {'category': "billing", 'category_confidence': 0.9, 'priority': "high",
+                        'priority_confidence': 0.7, 'suggestions': ["Check billing (high)"]}
+    assert service.calls == ['categorize', 'prioritize', 'suggest']
+
+    service.calls.clear()
+    analysis = FusedAnalyzer(service).analyze("Refund", "Charged twice", "account", "low")
+    assert (analysis['category'], analysis['category_confidence'], analysis['priority']) == ("account", 0.8, "low")
+    assert service.calls == ['suggest']
+
+
+def test_prefers_fused_analyze_and_delegates_the_rest():
+    service = SharedEncoder()
+    analyzer = FusedAnalyzer(service)
+    results = run_batch(analyzer, 'analyze', [("a", "b", None, None), ("c", "d", "billing", None)])
+    assert [(r['category'], r['priority']) for r in results] == [("account", "urgent"), ("billing", "urgent")]
+    assert service.calls == ['analyze', 'analyze']
+    assert analyzer.train_models([1, 2]) == 2
@@ -0,0 +1,46 @@
+"""
+Tests for the compiled keyword rule engine
+"""
+
+from services.keyword_rules import KeywordRules
+
+rules = KeywordRules({
+    "category": [
+        ("billing", 0.9, ["payment", "refund"]),
+        ("technical", 0.85, ["error", "not working"]),
+    ],
+    "priority": [
+        ("high", 0.85, ["error", "down"]),
+        ("low", 0.7, ["design"]),
+    ],
+})
+
+
+def test_first_matching_rule_wins():
+    matches = rules.match("refund failed with an error")
+    assert matches["category"] == ("billing", 0.9)
+    assert matches["priority"] == ("high", 0.85)
+
+
+def test_keyword_shared_between_tables():
+    matches = rules.match("site shows an error")
+    assert matches["category"] == ("technical", 0.85)
+    assert matches["priority"] == ("high", 0.85)
+
+
+def test_substring_and_phrase_matching():
+    matches = rules.match("checkout is not working, redesign please")
+    assert matches["category"] == ("technical", 0.85)
+    assert matches["priority"] == ("low", 0.7)
+
+
+def test_no_match_returns_none():
+    assert rules.match("hello there") == {"category": None, "priority": None}
+
+
+def test_whitespace_insensitive_only_without_phrases():
+    assert not rules.whitespace_insensitive
+    words = KeywordRules({"category": [("billing", 0.9, ["payment", "refund"])]})
+    assert words.whitespace_insensitive
+    for text in ("refund\n\nplease", "late  payment ", "no match"):
+        assert words.match(text) == words.match(" ".join(text.split()))
@@ -0,0 +1,94 @@
+"""
+Tests for lazily created services
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.lazy import AsyncServiceProxy, LazyService
+
+
+class Model:
+    created = 0
+
+    def __init__(self):
+        Model.created += 1
+        time.sleep(0.05)
+
+    def predict(self, text):
+        return text.upper()
+
+
+def test_created_once_on_first_use():
+    Model.created = 0
+    service = LazyService('model', Model)
+    assert service.status()['state'] == 'cold' and not service.ready
+
+    threads = [threading.Thread(target=service.get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Model.created == 1
+    assert service.predict("hi") == "HI"
+    assert service.status()['state'] == 'ready' and service.status()['load_seconds'] >= 0.05
+
+
+def test_import_spec_and_method():
+    service = LazyService('counter', "collections:Counter")
+    update = service.method('update')
+    assert update.__name__ == 'update' and not service.ready
+    update("aab")
+    assert service.get()['a'] == 2
+
+
+def test_warm_up_off_the_loop_and_retry_after_failure():
+    attempts = []
+
+    def flaky():
+        attempts.append(threading.current_thread().name)
+        if len(attempts) == 1:
+            raise RuntimeError("credentials missing")
+        return Model()
+
+    async def scenario():
+        service = LazyService('flaky', flaky)
+        with pytest.raises(RuntimeError):
+            await service.warm_up()
+        assert service.status()['state'] == 'failed' and 'credentials missing' in service.status()['error']
+        await service.warm_up()
+        return service
+
+    service = asyncio.run(scenario())
+    assert service.status() == {"state": "ready", "load_seconds": service.load_seconds, "error": None}
+    assert threading.main_thread().name not in attempts
+
+
+def test_async_proxy_creates_the_service_through_the_runner():
+    class Store:
+        def __init__(self):
+            self.thread = threading.current_thread().name
+
+        async def fetch(self, key):
+            return f"{key}@{self.thread}"
+
+    async def scenario():
+        service = LazyService('store', Store)
+        runs = []
+
+        async def run(func):
+            runs.append(func)
+            return await asyncio.get_running_loop().run_in_executor(None, func)
+
+        proxy = AsyncServiceProxy(service, run)
+        first = await proxy.fetch("a")
+        second = await proxy.fetch("b")
+        return first, second, runs
+
+    first, second, runs = asyncio.run(scenario())
+    assert len(runs) == 1
+    assert first.split("@")[1] == second.split("@")[1] != threading.main_thread().name
@@ -0,0 +1,72 @@
+"""
+Tests for latency histograms, spans and the profiler
+"""
+
+import asyncio
+
+from services.metrics import Instrumented, LoopLagMonitor, MetricsRegistry, request_spans, span, span_seconds
+from services.profiling import RequestProfiler
+
+
+def test_histogram_renders_cumulative_buckets():
+    metrics = MetricsRegistry()
+    latency = metrics.histogram("request_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    latency.observe(0.05, "/a")
+    latency.observe(0.5, "/a")
+    latency.observe(5, "/a")
+    metrics.gauge("queue_depth", "Depth", lambda: {(("queue", "io"),): 3})
+
+    text = metrics.render()
+    assert 'request_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'request_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'request_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'request_seconds_count{route="/a"} 3' in text
+    assert 'queue_depth{queue="io"} 3' in text
+
+
+def test_spans_are_collected_for_the_current_request():
+    class Service:
+        async def get_complaint(self, complaint_id):
+            return {'id': complaint_id}
+
+    async def scenario():
+        spans = []
+        token = request_spans.set(spans)
+        try:
+            with span("auth"):
+                pass
+            result = await Instrumented(Service(), "firebase").get_complaint("c1")
+        finally:
+            request_spans.reset(token)
+        return result, [name for name, _ in spans]
+
+    result, names = asyncio.run(scenario())
+    assert result == {'id': "c1"}
+    assert names == ["auth", "firebase.get_complaint"]
+    assert 'span_duration_seconds_count{span="firebase.get_complaint"}' in "\n".join(span_seconds.render())
+
+
+def test_loop_lag_monitor_reports_blocking():
+    import time
+
+    async def scenario():
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.05)
+        await asyncio.sleep(0.02)
+        await monitor.close()
+        return monitor.stats()
+
+    assert asyncio.run(scenario())["max_lag_seconds"] >= 0.03
+
+
+def test_only_one_request_is_profiled_at_a_time():
+    first, second = RequestProfiler(), RequestProfiler()
+    assert first.start()
+    assert not second.start()
+    sum(range(1000))
+    first.stop()
+    assert "function calls" in first.report()
+    assert second.start()
+    second.stop()
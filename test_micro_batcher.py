@@ -0,0 +1,79 @@
+"""
+Tests for the dynamic micro-batcher
+"""
+
+import asyncio
+
+import pytest
+
+from services.metrics import Histogram
+from services.micro_batcher import MicroBatcher, run_batch
+
+
+class Classifier:
+    def categorize(self, text):
+        if not text:
+            raise ValueError("empty text")
+        return text.upper()
+
+
+class BatchClassifier(Classifier):
+    def __init__(self):
+        self.batches = []
+
+    def categorize_batch(self, calls):
+        self.batches.append(len(calls))
+        return [text.upper() for (text,) in calls]
+
+
+def test_run_batch_prefers_batch_method():
+    service = BatchClassifier()
+    assert run_batch(service, 'categorize', [("a",), ("b",)]) == ["A", "B"]
+    assert service.batches == [2]
+
+    results = run_batch(Classifier(), 'categorize', [("a",), ("",)])
+    assert results[0] == "A" and isinstance(results[1], ValueError)
+
+
+def test_concurrent_calls_share_a_batch():
+    service = BatchClassifier()
+    queue_wait = Histogram("wait", "", ("method",))
+
+    async def run(calls):
+        return run_batch(service, 'categorize', calls)
+
+    async def scenario():
+        batcher = MicroBatcher(run, max_batch_size=4, max_wait=0.05, name="categorize", queue_wait=queue_wait)
+        results = await asyncio.gather(*(batcher.submit((text,)) for text in "abcdef"))
+        stats = batcher.stats()
+        await batcher.close()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert results == list("ABCDEF")
+    # A full batch goes at once; the remainder after max_wait
+    assert service.batches == [4, 2]
+    assert stats["batches"] == 2 and stats["average_batch_size"] == 3
+    assert 'wait_count{method="categorize"} 6' in "\n".join(queue_wait.render())
+
+
+def test_errors_reach_only_their_callers():
+    async def run(calls):
+        return run_batch(Classifier(), 'categorize', calls)
+
+    async def failing(calls):
+        raise RuntimeError("model unavailable")
+
+    async def scenario():
+        batcher = MicroBatcher(run, max_batch_size=8, max_wait=0.01)
+        results = await asyncio.gather(batcher.submit(("ok",)), batcher.submit(("",)), return_exceptions=True)
+        await batcher.close()
+
+        broken = MicroBatcher(failing, max_batch_size=8, max_wait=0.01)
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            await broken.submit(("x",))
+        await broken.close()
+        return results
+
+    ok, error = asyncio.run(scenario())
+    assert ok == "OK" and isinstance(error, ValueError)
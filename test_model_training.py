@@ -0,0 +1,80 @@
+"""
+Tests for out-of-process model training and the model history
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from services.lazy import LazyService
+from services.model_training import ModelHistory, load_model, remove_stale_files, train_model, write_ndjson
+
+
+class KeywordModel:
+    """Picklable stand-in for AIService"""
+
+    def __init__(self):
+        self.labels = {}
+
+    def train_models(self, records):
+        for record in records:
+            self.labels[record['text']] = record['category']
+
+    def categorize_complaint(self, title, description):
+        return self.labels.get(description, "general"), 0.9
+
+
+def test_train_in_a_separate_process(tmp_path):
+    data_path = str(tmp_path / "data.ndjson")
+    model_path = str(tmp_path / "model.pkl")
+    assert write_ndjson(data_path, [{'text': "charged twice", 'category': "billing"}]) == 1
+
+    with ProcessPoolExecutor(1) as pool:
+        result = pool.submit(train_model, data_path, model_path, "test_model_training:KeywordModel").result(30)
+
+    assert result == {'records': 1, 'model_path': model_path}
+    assert load_model(model_path).categorize_complaint("", "charged twice") == ("billing", 0.9)
+    assert not (tmp_path / "model.pkl.partial").exists()
+
+
+def test_bad_training_data_leaves_no_model(tmp_path):
+    data_path = tmp_path / "data.ndjson"
+    data_path.write_text('{"text": "ok", "category": "billing"}\nnot json\n')
+    with pytest.raises(json.JSONDecodeError):
+        train_model(str(data_path), str(tmp_path / "model.pkl"), "test_model_training:KeywordModel")
+    assert list(tmp_path.iterdir()) == [data_path]
+
+
+def test_swap_and_rollback():
+    live = LazyService('ai', KeywordModel)
+    initial = live.get()
+    history = ModelHistory()
+
+    trained = KeywordModel()
+    history.promote({'version': "v1", 'model_path': "v1.pkl"}, live.swap(trained))
+    assert live.get() is trained and history.previous['version'] == "initial"
+
+    target = history.previous
+    history.rollback(live.swap(history.instance(target['version'])))
+    assert live.get() is initial
+    assert (history.current['version'], history.previous['version']) == ("initial", "v1")
+    assert history.instance("v1") is trained
+
+    dropped = history.promote({'version': "v2", 'model_path': "v2.pkl"}, live.swap(KeywordModel()))
+    assert dropped['version'] == "v1" and history.instance("v1") is None
+    assert history.instance("initial") is initial
+
+
+def test_remove_stale_files_keeps_recent_and_in_use(tmp_path):
+    old, recent, in_use = (tmp_path / name for name in ("old.ndjson", "recent.ndjson", "in-use.ndjson"))
+    for path in (old, recent, in_use):
+        path.write_text("{}\n")
+    for path in (old, in_use):
+        os.utime(path, (time.time() - 7200, time.time() - 7200))
+
+    assert remove_stale_files(str(tmp_path), 3600, keep=[str(in_use)]) == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["in-use.ndjson", "recent.ndjson"]
+    assert remove_stale_files(str(tmp_path / "missing"), 3600) == 0
@@ -0,0 +1,108 @@
+"""
+Tests for the notification pipeline
+"""
+
+import asyncio
+
+import pytest
+
+from services.jobs import JobRegistry
+from services.notification_pipeline import NotificationPipeline, NotificationQueueFull, notification_event
+
+
+def event(user_id, complaint_id, notification_type="escalated"):
+    return notification_event({'id': complaint_id, 'user_id': user_id, 'title': "Refund"}, notification_type)
+
+
+def test_repeated_events_are_coalesced_and_sent_in_batches():
+    sends = []
+
+    async def send(events):
+        sends.append(events)
+        return [True] * len(events)
+
+    async def scenario():
+        jobs = JobRegistry()
+        pipeline = NotificationPipeline(send, jobs, coalesce_window=0.05, write_interval=0.05)
+        pipeline.start()
+        job = jobs.create('notification', total=0, delivered=0, failed=0)
+        pipeline.submit([event("u1", "c1"), event("u1", "c1"), event("u1", "c2"), event("u2", "c3")], job['id'])
+        await asyncio.sleep(0.3)
+        await pipeline.close()
+        return jobs.get(job['id']), pipeline.stats()
+
+    job, stats = asyncio.run(scenario())
+    assert len(sends) == 1
+    assert sorted((e['user_id'], e['complaint_id']) for e in sends[0]) == [("u1", "c1"), ("u1", "c2"), ("u2", "c3")]
+    assert job['status'] == "completed" and job['delivered'] == 4
+    assert stats['coalesced'] == 1 and stats['delivered'] == 3
+
+
+def test_close_delivers_open_windows():
+    sent = []
+
+    async def send(events):
+        sent.extend(events)
+        return [True] * len(events)
+
+    async def scenario():
+        pipeline = NotificationPipeline(send, JobRegistry(), coalesce_window=60)
+        pipeline.start()
+        pipeline.submit([event("u1", "c1")])
+        await asyncio.sleep(0.01)
+        await pipeline.close()
+
+    asyncio.run(scenario())
+    assert [e['complaint_id'] for e in sent] == ["c1"]
+
+
+def test_failed_send_marks_job_failed():
+    async def send(events):
+        raise RuntimeError("store unavailable")
+
+    async def scenario():
+        jobs = JobRegistry()
+        pipeline = NotificationPipeline(send, jobs, coalesce_window=0.01, write_interval=0.01)
+        pipeline.start()
+        job = jobs.create('notification', total=0, delivered=0, failed=0)
+        pipeline.submit([event("u1", "c1")], job['id'])
+        await pipeline.close()
+        return jobs.get(job['id'])
+
+    assert asyncio.run(scenario())['status'] == "failed"
+
+
+def test_unsent_events_count_as_failed():
+    async def send(events):
+        return [event['complaint_id'] != "missing" for event in events]
+
+    async def scenario():
+        jobs = JobRegistry()
+        pipeline = NotificationPipeline(send, jobs, coalesce_window=0.01, write_interval=0.01)
+        pipeline.start()
+        job = jobs.create('notification', total=0, delivered=0, failed=0)
+        pipeline.submit([event("u1", "c1"), event("u1", "missing")], job['id'])
+        await pipeline.close()
+        return jobs.get(job['id'])
+
+    job = asyncio.run(scenario())
+    assert (job['status'], job['delivered'], job['failed']) == ("failed", 1, 1)
+
+
+def test_full_queue_is_rejected():
+    async def scenario():
+        pipeline = NotificationPipeline(lambda records: None, JobRegistry(), max_queue=1)
+        pipeline.submit([event("u1", "c1")])
+        with pytest.raises(NotificationQueueFull):
+            pipeline.submit([event("u1", "c2")])
+
+    asyncio.run(scenario())
+
+
+def test_job_registry_forgets_oldest_finished_jobs():
+    jobs = JobRegistry(max_jobs=2)
+    first = jobs.create('notification')
+    second = jobs.create('notification', status='completed')
+    third = jobs.create('notification')
+    assert jobs.get(second['id']) is None
+    assert jobs.get(first['id']) is not None and jobs.get(third['id']) is not None
@@ -0,0 +1,72 @@
+"""
+Tests for the notification inbox: unread counters, delta polls and ETags
+"""
+
+import pytest
+
+pytest.importorskip("firebase_admin")
+
+from benchmarks.firestore_standin import StandInFirestore
+from services.notification_store import NotificationStore
+from services.pagination import decode_cursor
+
+
+def legacy_inbox():
+    """Notifications as NotificationService writes them: no id field and no counter document"""
+    db = StandInFirestore()
+    for n in range(1, 4):
+        db.collection('notifications').document(f"n{n}").set({
+            'user_id': "u1", 'read': n == 1, 'created_at': f"2024-01-0{n}T00:00:00", 'message': str(n)
+        })
+    db.collection('notifications').document("other").set({
+        'user_id': "u2", 'read': False, 'created_at': "2024-01-05T00:00:00"
+    })
+    return db, NotificationStore(db)
+
+
+def test_legacy_notifications_are_listed_and_counted():
+    db, store = legacy_inbox()
+
+    assert [n['id'] for n in store.list("u1", 10)] == ["n3", "n2", "n1"]
+    assert store.state("u1")['unread'] == 2
+    # The backfill happens once; later sends are counted on top of it
+    store.add_unread({"u1": 1})
+    assert store.state("u1")['unread'] == 3
+
+
+def test_poll_returns_304_until_something_changes():
+    db, store = legacy_inbox()
+
+    headers, page = store.poll("u1", 10)
+    assert page['unread_count'] == 2 and headers['ETag']
+    assert store.poll("u1", 10, if_none_match=headers['ETag']) == (headers, None)
+
+    assert store.mark_read("u1", "n2")
+    changed, page = store.poll("u1", 10, if_none_match=headers['ETag'])
+    assert changed['ETag'] != headers['ETag'] and page['unread_count'] == 1
+
+
+def test_poll_since_returns_only_newer_notifications():
+    db, store = legacy_inbox()
+    _, first = store.poll("u1", 2)
+    assert [n['id'] for n in first['notifications']] == ["n3", "n2"] and first['has_more']
+
+    db.collection('notifications').document("n4").set({
+        'user_id': "u1", 'read': False, 'created_at': "2024-01-04T00:00:00"
+    })
+    _, delta = store.poll("u1", 10, decode_cursor(first['cursor']))
+    assert [n['id'] for n in delta['notifications']] == ["n4"]
+
+    _, empty = store.poll("u1", 10, decode_cursor(delta['cursor']))
+    assert empty['notifications'] == [] and empty['cursor'] == delta['cursor']
+
+
+def test_mark_all_read_only_touches_the_users_unread_notifications():
+    db, store = legacy_inbox()
+
+    assert store.mark_read("u1", "other") is False
+    assert store.mark_all_read("u1", ["n2", "other", "missing"]) == 1
+    assert store.state("u1")['unread'] == 1
+    assert store.mark_all_read("u1") == 1
+    assert store.state("u1")['unread'] == 0
+    assert db.collection('notifications').document("other").get().get('read') is False
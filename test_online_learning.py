@@ -0,0 +1,117 @@
+"""
+Tests for learning from admin corrections
+"""
+
+import asyncio
+import os
+
+from services.fused_analysis import FusedAnalyzer
+from services.online_learning import CorrectionFeed, CorrectionModel, HashedSGDClassifier, correction_example
+
+
+class BaseModel:
+    def categorize_complaint(self, title, description):
+        return "general", 0.5
+
+    def prioritize_complaint(self, title, description, category):
+        return ("high" if category == "billing" else "low"), 0.5
+
+    def get_ai_suggestions(self, complaint):
+        return [complaint['category']]
+
+
+def test_correction_example_only_for_changed_labels():
+    complaint = {'title': "Refund", 'description': "Charged twice", 'category': "general", 'priority': "low"}
+    assert correction_example(complaint, {'status': "resolved"}) is None
+    assert correction_example(complaint, {'category': "general"}) is None
+    assert correction_example(complaint, {'category': "billing", 'priority': "low"}) == {
+        'title': "Refund", 'description': "Charged twice", 'category': "billing"
+    }
+
+
+def test_hashed_classifier_learns_incrementally():
+    classifier = HashedSGDClassifier()
+    assert classifier.predict("anything") is None
+    texts = ["card charged twice", "refund for payment", "cannot log in", "password reset fails"]
+    labels = ["billing", "billing", "account", "account"]
+    for _ in range(5):
+        classifier.partial_fit(texts, labels)
+    assert classifier.predict("charged twice for payment")[0] == "billing"
+    assert classifier.predict("log in password")[0] == "account"
+    assert classifier.features("Charged  TWICE") == classifier.features("charged twice")
+
+
+def learned_examples():
+    examples = [{'title': "Refund", 'description': f"charged twice on my card {n}", 'category': "billing"}
+                for n in range(4)]
+    examples += [{'title': "Login", 'description': f"cannot log in {n}", 'category': "account"} for n in range(2)]
+    return examples
+
+
+def test_corrections_override_the_base_model():
+    corrections = CorrectionModel(min_examples=4, min_class_examples=2)
+    analyzer = FusedAnalyzer(BaseModel(), corrections)
+    assert analyzer.analyze("Refund", "charged twice on my card")['category'] == "general"
+
+    for _ in range(3):
+        analyzer.partial_fit(learned_examples())
+
+    analysis = analyzer.analyze("Refund", "charged twice on my card")
+    # The corrected category also drives priority and suggestions
+    assert (analysis['category'], analysis['priority'], analysis['suggestions']) == ("billing", "high", ["billing"])
+    assert analysis['category_confidence'] >= corrections.threshold
+    assert analyzer.analyze("Refund", "charged twice", category="account")['category'] == "account"
+
+    # Batched calls get the same corrections
+    batch = analyzer.analyze_batch([("Refund", "charged twice on my card"), ("Hello", "nothing learned here")])
+    assert [result['category'] for result in batch] == ["billing", "general"]
+
+
+def test_skewed_corrections_do_not_override():
+    corrections = CorrectionModel()
+    corrections.partial_fit([{'title': "Password reset", 'description': f"reset link {n}", 'priority': "high"}
+                             for n in range(20)])
+    # Only one class seen: no prediction, rather than that class at probability 1
+    assert corrections.predict('priority', "Password reset", "change my avatar") is None
+
+    corrections.partial_fit([{'title': "Dark mode", 'description': f"theme colour {n}", 'priority': "low"}
+                             for n in range(5)])
+    # Text unlike any correction gets no confident prediction despite the 20:5 skew
+    assert corrections.predict('priority', "Profile", "change my avatar") is None
+    prediction = corrections.predict('priority', "Password reset", "reset link")
+    assert prediction is not None and prediction[0] == "high"
+    # The main model keeps its answer when it is more confident
+    assert corrections.predict('priority', "Password reset", "reset link", base_confidence=0.999) is None
+
+
+def test_corrections_survive_a_save_and_load(tmp_path):
+    corrections = CorrectionModel(min_examples=4, min_class_examples=2)
+    for _ in range(3):
+        corrections.partial_fit(learned_examples())
+    path = os.path.join(tmp_path, "corrections.pkl")
+    corrections.save(path)
+
+    loaded = CorrectionModel.load(path)
+    assert loaded.stats() == corrections.stats()
+    assert loaded.predict('category', "Refund", "charged twice on my card")[0] == "billing"
+    loaded.partial_fit(learned_examples())
+
+
+def test_feed_applies_micro_batches():
+    applied = []
+
+    async def apply(batch):
+        applied.append(len(batch))
+
+    async def scenario():
+        feed = CorrectionFeed(apply, batch_size=3, flush_interval=60)
+        feed.start()
+        for n in range(7):
+            feed.add({'description': str(n), 'category': "billing"})
+        await asyncio.sleep(0.01)
+        await feed.close()
+        return feed.stats()
+
+    stats = asyncio.run(scenario())
+    assert sum(applied) == 7 and max(applied) == 3
+    assert (stats['applied'], stats['pending'], stats['dropped']) == (7, 0, 0)
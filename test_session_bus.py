@@ -0,0 +1,160 @@
+"""
+Tests for the chat session registry and message bus
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.session_bus import (
+    InProcessSessionBackend, RedisSessionBackend, RespConnection, create_session_backend
+)
+
+
+class RespStandIn:
+    """Just enough of a Redis-protocol server for the session backend"""
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.subscribers = {}
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @staticmethod
+    def reply(value):
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(RespStandIn.reply(item) for item in value)
+        data = str(value).encode()
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    async def handle(self, reader, writer):
+        connection = RespConnection(reader, writer)
+        while True:
+            try:
+                command = await connection.read_reply()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                return
+            name, args = command[0].upper(), command[1:]
+            if name == "SET":
+                if "NX" in args[2:] and args[0] in self.values:
+                    result = None
+                else:
+                    self.values[args[0]] = args[1]
+                    result = "OK"
+            elif name == "GET":
+                result = self.values.get(args[0])
+            elif name == "MGET":
+                result = [self.values.get(key) for key in args]
+            elif name == "DEL":
+                result = int(self.values.pop(args[0], None) is not None)
+            elif name == "SADD":
+                self.sets.setdefault(args[0], set()).update(args[1:])
+                result = 1
+            elif name == "SREM":
+                self.sets.get(args[0], set()).difference_update(args[1:])
+                result = 1
+            elif name == "SMEMBERS":
+                result = sorted(self.sets.get(args[0], ()))
+            elif name == "EXPIRE":
+                result = 1
+            elif name == "SLEEP":
+                await asyncio.sleep(float(args[0]))
+                result = "slept"
+            elif name == "PUBLISH":
+                for subscriber in self.subscribers.get(args[0], []):
+                    subscriber.write(self.reply(["message", args[0], args[1]]))
+                result = len(self.subscribers.get(args[0], []))
+            elif name == "SUBSCRIBE":
+                self.subscribers.setdefault(args[0], []).append(writer)
+                result = ["subscribe", args[0], 1]
+            else:
+                result = None
+            writer.write(self.reply(result) if result != "OK" else b"+OK\r\n")
+            await writer.drain()
+
+
+async def exercise_backend(backend):
+    await backend.register_session({'session_id': "s1", 'user_id': "u1"})
+    await backend.register_session({'session_id': "s2", 'user_id': "u2"})
+    assert [s['session_id'] for s in await backend.get_user_sessions("u1")] == ["s1"]
+
+    subscription = await backend.subscribe("user:u1")
+    await backend.publish("user:u1", {'response': "hello"})
+    assert await asyncio.wait_for(subscription.__anext__(), 1) == {'response': "hello"}
+    await subscription.close()
+
+    await backend.remove_session("s1", "u1")
+    assert await backend.get_user_sessions("u1") == []
+
+    assert await backend.acquire_lease("escalation", "w1", 60)
+    assert not await backend.acquire_lease("escalation", "w2", 60)
+    assert await backend.acquire_lease("escalation", "w1", 60)
+
+
+def test_in_process_backend():
+    asyncio.run(exercise_backend(InProcessSessionBackend()))
+
+
+def test_in_process_sessions_expire():
+    async def scenario():
+        backend = InProcessSessionBackend(session_ttl=60)
+        await backend.register_session({'session_id': "s1", 'user_id': "u1"})
+        backend._sessions["s1"] = (time.time() - 1, backend._sessions["s1"][1])
+        return await backend.get_user_sessions("u1")
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_redis_backend_against_stand_in():
+    async def scenario():
+        server = RespStandIn()
+        port = await server.start()
+        backend = RedisSessionBackend("127.0.0.1", port)
+        try:
+            await exercise_backend(backend)
+        finally:
+            await backend.close()
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_command_does_not_shift_replies():
+    async def scenario():
+        server = RespStandIn()
+        port = await server.start()
+        backend = RedisSessionBackend("127.0.0.1", port)
+        try:
+            slow = asyncio.ensure_future(backend._execute("SLEEP", 0.2))
+            await asyncio.sleep(0.05)
+            slow.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await slow
+            # The SLEEP reply arrives later on the old connection, not as this command's reply
+            assert await backend._execute("SET", "k", "v") == "OK"
+            await asyncio.sleep(0.2)
+            return await backend._execute("MGET", "k")
+        finally:
+            await backend.close()
+            await server.stop()
+
+    assert asyncio.run(scenario()) == ["v"]
+
+
+def test_redis_backend_from_url():
+    backend = RedisSessionBackend.from_url("redis://cache:6380/2")
+    assert (backend.host, backend.port, backend.db) == ("cache", 6380, 2)
+    with pytest.raises(ValueError):
+        create_session_backend("memcached://cache")
@@ -0,0 +1,35 @@
+"""
+Tests for the TTL cache
+"""
+
+import time
+
+from services.ttl_cache import TTLCache
+
+
+def test_entries_expire():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set("token", "claims", expires_at=time.time() - 1)
+    cache.set("user", "doc", ttl=60)
+    assert cache.get("token") is None
+    assert cache.get("user") == "doc"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_delete_invalidates():
+    cache = TTLCache()
+    cache.set("user", "doc")
+    cache.delete("user")
+    assert cache.get("user") is None